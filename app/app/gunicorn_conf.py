@@ -0,0 +1,101 @@
+"""
+Gunicorn configuration for running the app in production:
+
+    gunicorn -c python:app.gunicorn_conf app.wsgi
+
+Every setting can be overridden from the environment (GUNICORN_*).
+Workers are threaded (gthread): requests mostly wait on the database,
+so a few threads per process serve more requests than extra processes
+for the same memory. The defaults derive from the CPUs available to
+the container.
+"""
+import multiprocessing
+import os
+import shutil
+
+
+def cpu_count():
+    """Return the CPUs this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+def default_workers(cpus):
+    """One process per CPU plus one, so a CPU stays busy while a worker blocks"""
+    return cpus + 1
+
+
+def default_threads(cpus):
+    """Threads per worker, fewer once there are many processes"""
+    return 4 if cpus <= 4 else 2
+
+
+def _env_int(name, default):
+    return int(os.environ.get(name, default))
+
+
+def _env_bool(name, default):
+    return os.environ.get(name, str(default)).lower() in ('1', 'true', 'yes')
+
+
+_cpus = cpu_count()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = _env_int('GUNICORN_WORKERS', default_workers(_cpus))
+threads = _env_int('GUNICORN_THREADS', default_threads(_cpus))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Read by the settings: a local memory cache is not shared by workers
+os.environ.setdefault('SERVER_PROCESSES', str(workers))
+
+# Load the app once in the master: workers fork with the code already
+# imported, which starts them faster and shares the memory pages
+preload_app = _env_bool('GUNICORN_PRELOAD', True)
+
+# Recycle workers after a number of requests, against slow leaks; the
+# jitter keeps the workers from restarting all at once
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10)
+
+# Workers silent for longer are killed; on reload or shutdown requests
+# in progress get graceful_timeout seconds to finish
+timeout = _env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+# Behind the proxy connections are reused, keep them a little longer
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+# Heartbeat files in memory, a slow overlay filesystem would stall workers
+worker_tmp_dir = os.environ.get('GUNICORN_WORKER_TMP_DIR', '/dev/shm')
+
+forwarded_allow_ips = os.environ.get('GUNICORN_FORWARDED_ALLOW_IPS', '127.0.0.1')
+# An empty GUNICORN_ACCESSLOG turns access logging off
+accesslog = os.environ.get('GUNICORN_ACCESSLOG', '-') or None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOGLEVEL', 'info')
+
+
+def pre_fork(server, worker):
+    """
+    Close the database connections the master may have opened while
+    preloading, a socket inherited by several workers would mix their
+    protocol streams.
+    """
+    from django.db import connections
+    connections.close_all()
+
+
+def on_starting(server):
+    """Start with empty Prometheus metrics, the files of old workers are stale"""
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+
+
+def child_exit(server, worker):
+    """Fold the gauges of an exited worker out of the live metrics"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -20,12 +20,15 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 # See https://docs.djangoproject.com/en/2.1/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = '3gc064nce%ltwjbqz8c*j+n8!1jnu(b&eld422=1wkqvp$tjd_'
+SECRET_KEY = os.environ.get(
+    'SECRET_KEY', '3gc064nce%ltwjbqz8c*j+n8!1jnu(b&eld422=1wkqvp$tjd_'
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = bool(int(os.environ.get('DEBUG', 1)))
 
 ALLOWED_HOSTS = ['0.0.0.0', '127.0.0.1']
+ALLOWED_HOSTS.extend(filter(None, os.environ.get('ALLOWED_HOSTS', '').split(',')))
 
 
 # Application definition
@@ -37,13 +40,16 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
-    'core',
-    'user'
+    'core.apps.CoreConfig',
+    'user.apps.UserConfig',
+    'recipe.apps.RecipeConfig',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,6 +59,19 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Request timing, for a sample of the requests (core.middleware)
+PERFORMANCE_MIDDLEWARE = bool(int(os.environ.get('PERFORMANCE_MIDDLEWARE', 0)))
+PERFORMANCE_SAMPLE_RATE = float(os.environ.get('PERFORMANCE_SAMPLE_RATE', 0.1))
+PERFORMANCE_SERVER_TIMING = bool(int(os.environ.get('PERFORMANCE_SERVER_TIMING', 1)))
+if PERFORMANCE_MIDDLEWARE:
+    MIDDLEWARE.insert(0, 'core.middleware.PerformanceMiddleware')
+
+# Prometheus metrics at /metrics (core.metrics), aggregated across
+# server processes through PROMETHEUS_MULTIPROC_DIR
+METRICS_ENABLED = bool(int(os.environ.get('METRICS_ENABLED', 1)))
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, 'core.middleware.MetricsMiddleware')
+
 ROOT_URLCONF = 'app.urls'
 
 TEMPLATES = [
@@ -80,17 +99,105 @@ WSGI_APPLICATION = 'app.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        # 'HOST': os.environ.get('DB_HOST'),
-        # 'NAME': os.environ.get('DB_NAME'),
-        # 'USER': os.environ.get('DB_USER'),
-        # 'PASSWORD': os.environ.get('DB_PASS'),
-        'HOST': "localhost",
-        'NAME': "app",
-        'USER': "postgres",
-        'PASSWORD': "supersecretpassword",
+        'HOST': os.environ.get('DB_HOST', 'localhost'),
+        'PORT': os.environ.get('DB_PORT', ''),
+        'NAME': os.environ.get('DB_NAME', 'app'),
+        'USER': os.environ.get('DB_USER', 'postgres'),
+        'PASSWORD': os.environ.get('DB_PASS', 'supersecretpassword'),
+        # Seconds a connection is kept for following requests, 0 closes
+        # it after every request
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        # Check reused connections before each request (core.db)
+        'CONN_HEALTH_CHECKS': bool(int(os.environ.get('DB_CONN_HEALTH_CHECKS', 1))),
+        # Behind pgbouncer in transaction mode a cursor cannot outlive
+        # its transaction, so querysets are iterated client side
+        'DISABLE_SERVER_SIDE_CURSORS': bool(int(os.environ.get('DB_PGBOUNCER', 0))),
+    }
+}
+
+# Read replicas as a comma separated list of host[:port], they share
+# the credentials of the primary unless DB_REPLICA_USER/PASS are set.
+# Requests with safe methods read from them (core.routers)
+DATABASE_REPLICAS = []
+for _number, _address in enumerate(
+        filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    _host, _, _port = _address.strip().partition(':')
+    DATABASE_REPLICAS.append(f'replica{_number}')
+    DATABASES[f'replica{_number}'] = dict(
+        DATABASES['default'],
+        HOST=_host,
+        PORT=_port,
+        USER=os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+        PASSWORD=os.environ.get('DB_REPLICA_PASS', DATABASES['default']['PASSWORD']),
+        TEST={'MIRROR': 'default'},
+    )
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Seconds the reads of a user go to the primary after their data changed,
+# longer than the replication lag
+DB_PRIMARY_PIN_SECONDS = int(os.environ.get('DB_PRIMARY_PIN_SECONDS', 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'recipes-api'),
     }
 }
 
+# Whether every process of the deployment (gunicorn workers, image
+# worker) reads the same cache. Writes invalidate cached list responses,
+# tokens and primary pins through it, so these are only cached when it
+# is; docker-compose-deploy.yml runs memcached. A local memory cache is
+# only shared in a single process, like the development server: gunicorn
+# sets SERVER_PROCESSES (app.gunicorn_conf)
+CACHE_SHARED = bool(int(os.environ.get(
+    'CACHE_SHARED',
+    not CACHES['default']['BACKEND'].endswith('.LocMemCache')
+    or int(os.environ.get('SERVER_PROCESSES', 1)) == 1
+)))
+
+# Build recipe, tag and ingredient list and detail responses from rows
+# instead of serializing model instances (recipe.fastread)
+RECIPE_FAST_READS = bool(int(os.environ.get('RECIPE_FAST_READS', 1)))
+# Seconds a cached API list response is kept
+API_CACHE_TIMEOUT = int(os.environ.get('API_CACHE_TIMEOUT', 300))
+# Seconds an authentication token and its user are cached
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.environ.get('AUTH_TOKEN_CACHE_TIMEOUT', 60))
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/2.1/topics/auth/passwords/
+
+# Hasher of new passwords: argon2, bcrypt or pbkdf2. Hashes made by the
+# others, or with other costs, are upgraded at the next login
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'argon2')
+_PASSWORD_HASHERS = {
+    'argon2': 'core.hashers.Argon2PasswordHasher',
+    'bcrypt': 'core.hashers.BCryptSHA256PasswordHasher',
+    'pbkdf2': 'core.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in _PASSWORD_HASHERS.items() if name != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 512))
+PASSWORD_ARGON2_PARALLELISM = int(os.environ.get('PASSWORD_ARGON2_PARALLELISM', 2))
+PASSWORD_BCRYPT_ROUNDS = int(os.environ.get('PASSWORD_BCRYPT_ROUNDS', 12))
+PASSWORD_PBKDF2_ITERATIONS = int(os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 120000))
+
+# Upgrade hashes on a background thread rather than during the login
+PASSWORD_REHASH_ASYNC = bool(int(os.environ.get('PASSWORD_REHASH_ASYNC', 1)))
+PASSWORD_REHASH_QUEUE = int(os.environ.get('PASSWORD_REHASH_QUEUE', 100))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.1/ref/settings/#auth-password-validators
@@ -131,7 +238,58 @@ USE_TZ = True
 STATIC_URL = '/static/'
 MEDIA_URL = '/media/'
 
-# MEDIA_ROOT = '/vol/web/media'
-# STATIC_ROOT = '/vol/web/static'
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', os.path.join(BASE_DIR, 'media'))
+STATIC_ROOT = os.environ.get('STATIC_ROOT', os.path.join(BASE_DIR, 'static'))
+
+# Hashed static file names with gzip copies, written by collectstatic
+if os.environ.get('STATIC_MANIFEST'):
+    STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
+
+# How media files are served:
+#   django   - by Django's static() view, only with DEBUG
+#   accel    - Django answers with X-Accel-Redirect to MEDIA_ACCEL_PREFIX
+#   sendfile - Django answers with X-Sendfile (Apache, lighttpd)
+MEDIA_SERVE_MODE = os.environ.get('MEDIA_SERVE_MODE', 'django')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+MEDIA_CACHE_MAX_AGE = 365 * 24 * 60 * 60
+
+# Recipe images larger than this are rejected with 413 while uploading
+RECIPE_IMAGE_MAX_SIZE = int(os.environ.get('RECIPE_IMAGE_MAX_SIZE', 16 * 1024 * 1024))
+RECIPE_IMAGE_MAX_PIXELS = int(os.environ.get('RECIPE_IMAGE_MAX_PIXELS', 40 * 1000 * 1000))
+RECIPE_IMAGE_FORMATS = ('JPEG', 'PNG', 'WEBP', 'GIF')
+
+AUTH_USER_MODEL = 'core.User'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'message': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'json': {'class': 'logging.StreamHandler', 'formatter': 'message'},
+    },
+    'loggers': {
+        # One JSON line per measured request
+        'core.performance': {'handlers': ['json'], 'level': 'INFO', 'propagate': False},
+    },
+}
 
-AUTH_USER_MODEL = 'core.User'
\ No newline at end of file
+REST_FRAMEWORK = {
+    # Proxies in front of the app, their X-Forwarded-For entries are
+    # trusted to identify clients for throttling
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+    # Requests per user, or per address when anonymous (core.throttling).
+    # Counters live in the default cache: unless it is shared by every
+    # process (CACHE_SHARED), each gunicorn worker counts on its own,
+    # multiplying the rates by the number of workers and making
+    # Retry-After depend on the worker that answers. An empty rate turns
+    # the scope's throttling off
+    'DEFAULT_THROTTLE_RATES': {
+        'read': os.environ.get('READ_THROTTLE_RATE', '1200/min') or None,
+        'write': os.environ.get('WRITE_THROTTLE_RATE', '300/min') or None,
+        'upload_image': os.environ.get('UPLOAD_IMAGE_THROTTLE_RATE', '30/min') or None,
+        'token': os.environ.get('TOKEN_THROTTLE_RATE', '20/min') or None,
+        'login_email': os.environ.get('LOGIN_EMAIL_THROTTLE_RATE', '10/min') or None,
+    },
+}
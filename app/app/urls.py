@@ -16,11 +16,23 @@ Including another URLconf
 
 from django.contrib import admin
 from django.conf import settings
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf.urls.static import static
 
+from core.views import serve_media, metrics
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/user/', include("user.urls")),
     path('api/recipe/', include("recipe.urls"))
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
+
+if settings.METRICS_ENABLED:
+    urlpatterns += [path('metrics', metrics, name='metrics')]
+
+if settings.MEDIA_SERVE_MODE in ('accel', 'sendfile'):
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'), serve_media),
+    ]
+elif settings.MEDIA_SERVE_MODE == 'django':
+    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
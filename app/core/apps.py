@@ -1,5 +1,10 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from core.db import close_unusable_connections
+        request_started.connect(close_unusable_connections)
@@ -0,0 +1,112 @@
+import random
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import transaction
+from django.contrib.auth import get_user_model
+
+from core.models import Tag, Ingredient, Recipe
+
+# Words synthetic recipe titles are made of
+TITLE_WORDS = (
+    'apple', 'bean', 'beef', 'bread', 'cake', 'carrot', 'cheese', 'chicken',
+    'chili', 'chocolate', 'curry', 'egg', 'fish', 'garlic', 'ginger', 'lemon',
+    'lentil', 'mushroom', 'noodle', 'onion', 'pasta', 'pepper', 'pie',
+    'pork', 'potato', 'rice', 'salad', 'salmon', 'soup', 'spinach', 'stew',
+    'tart', 'tofu', 'tomato', 'vanilla',
+)
+
+
+@contextmanager
+def rolled_back(using=None):
+    """Run the block in a transaction that is always rolled back"""
+    with transaction.atomic(using=using):
+        yield
+        transaction.set_rollback(True, using=using)
+
+
+def timed(func, repeat=1):
+    """Call func repeat times and return the durations in seconds"""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def percentile(values, pct):
+    """Return the pct-th percentile of values using nearest rank"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100 * len(ordered))) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def create_library(user, recipes, tags, ingredients, tags_per_recipe=3,
+                   ingredients_per_recipe=5, batch_size=5000, seed=0):
+    """
+    Bulk create a synthetic recipe library for user and return the ids
+    of the created tags, ingredients and recipes.
+    """
+    rnd = random.Random(seed)
+
+    Tag.objects.bulk_create(
+        (Tag(user=user, name=f'Tag {i}') for i in range(tags)),
+        batch_size=batch_size
+    )
+    Ingredient.objects.bulk_create(
+        (Ingredient(user=user, name=f'Ingredient {i}') for i in range(ingredients)),
+        batch_size=batch_size
+    )
+    Recipe.objects.bulk_create(
+        (
+            Recipe(
+                user=user,
+                title=' '.join(rnd.sample(TITLE_WORDS, 3)),
+                time_minutes=rnd.randint(5, 180),
+                price=Decimal(rnd.randint(100, 99999)) / 100,
+            )
+            for i in range(recipes)
+        ),
+        batch_size=batch_size
+    )
+
+    tag_ids = list(Tag.objects.filter(user=user).values_list('id', flat=True))
+    ingredient_ids = list(
+        Ingredient.objects.filter(user=user).values_list('id', flat=True)
+    )
+    recipe_ids = list(Recipe.objects.filter(user=user).values_list('id', flat=True))
+
+    _link(Recipe.tags.through, 'tag_id', recipe_ids, tag_ids,
+          tags_per_recipe, batch_size, rnd)
+    _link(Recipe.ingredients.through, 'ingredient_id', recipe_ids,
+          ingredient_ids, ingredients_per_recipe, batch_size, rnd)
+
+    return {
+        'tags': tag_ids,
+        'ingredients': ingredient_ids,
+        'recipes': recipe_ids,
+    }
+
+
+def create_benchmark_user(email='benchmark@example.com'):
+    """Create a user without paying for password hashing"""
+    user = get_user_model()(email=email, name='Benchmark')
+    user.set_unusable_password()
+    user.save()
+    return user
+
+
+def _link(through, target, recipe_ids, target_ids, per_recipe, batch_size, rnd):
+    if not target_ids or not per_recipe:
+        return
+    per_recipe = min(per_recipe, len(target_ids))
+    rows = (
+        through(recipe_id=recipe_id, **{target: target_id})
+        for recipe_id in recipe_ids
+        for target_id in rnd.sample(target_ids, per_recipe)
+    )
+    through.objects.bulk_create(rows, batch_size=batch_size)
@@ -0,0 +1,80 @@
+from django.db import connections, router
+from django.db.models import CASCADE, Case, Value, When
+from django.db.models.deletion import get_candidate_relations_to_delete
+from django.db.models.functions import Cast
+
+
+def bulk_create_with_pks(model, objs, batch_size=None):
+    """
+    Insert objs with as few queries as possible and make sure each one
+    gets its primary key. Backends that cannot return ids from a bulk
+    insert (e.g. SQLite) fall back to one INSERT per object.
+    """
+    connection = connections[router.db_for_write(model)]
+    if connection.features.can_return_ids_from_bulk_insert:
+        return model.objects.bulk_create(objs, batch_size=batch_size)
+
+    for obj in objs:
+        obj.save(force_insert=True)
+    return objs
+
+
+def bulk_update(model, objs, field_names, batch_size=500):
+    """Update field_names of objs with one UPDATE ... CASE per batch"""
+    fields = [model._meta.get_field(name) for name in field_names]
+    for start in range(0, len(objs), batch_size):
+        batch = objs[start:start + batch_size]
+        updates = {}
+        for field in fields:
+            whens = [
+                When(pk=obj.pk, then=Cast(
+                    Value(getattr(obj, field.attname), output_field=field),
+                    output_field=field
+                ))
+                for obj in batch
+            ]
+            updates[field.attname] = Case(*whens, output_field=field)
+        model.objects.filter(pk__in=[obj.pk for obj in batch]).update(**updates)
+
+
+def bulk_set_relations(model, field_name, relations, replace=False, batch_size=None):
+    """
+    Link objects through the M2M field_name with a single bulk insert.
+
+    relations maps each saved source object to an iterable of target
+    objects or primary keys. With replace, existing links of the source
+    objects are deleted first.
+    """
+    field = model._meta.get_field(field_name)
+    through = field.remote_field.through
+    source = field.m2m_field_name() + '_id'
+    target = field.m2m_reverse_field_name() + '_id'
+
+    if replace:
+        bulk_delete(through.objects.filter(
+            **{source + '__in': [obj.pk for obj in relations]}
+        ))
+
+    rows = [
+        through(**{source: obj.pk, target: pk})
+        for obj, values in relations.items()
+        for pk in {getattr(value, 'pk', value) for value in values}
+    ]
+    through.objects.bulk_create(rows, batch_size=batch_size)
+
+
+def bulk_delete(queryset):
+    """
+    Delete the objects of queryset, and the rows that cascade from them,
+    with one DELETE per table and without loading them or sending model
+    signals. Only CASCADE relations are followed, other on_delete
+    behaviours are left to the database constraints.
+    """
+    using = router.db_for_write(queryset.model)
+    queryset = queryset.using(using)
+    for relation in get_candidate_relations_to_delete(queryset.model._meta):
+        if relation.on_delete is CASCADE:
+            bulk_delete(relation.related_model._base_manager.filter(
+                **{relation.field.name + '__in': queryset.values('pk')}
+            ))
+    return queryset._raw_delete(using)
@@ -0,0 +1,18 @@
+from django.db import connections
+
+
+def close_unusable_connections(**kwargs):
+    """
+    Close persistent connections that stopped working since the last
+    request (server restart, pooler or firewall timeout), so the request
+    opens a new one instead of failing on its first query. Enabled per
+    database with CONN_HEALTH_CHECKS; costs one round trip per request
+    on reused connections only.
+    """
+    for conn in connections.all():
+        if (conn.connection is None
+                or conn.in_atomic_block
+                or not conn.settings_dict.get('CONN_HEALTH_CHECKS')):
+            continue
+        if not conn.is_usable():
+            conn.close()
@@ -0,0 +1,93 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model, hashers
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_rehash_lock = threading.Lock()
+_rehash_executor = None
+_rehash_slots = None
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Argon2 with the costs of the PASSWORD_ARGON2_* settings"""
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    """bcrypt with PASSWORD_BCRYPT_ROUNDS rounds"""
+
+    @property
+    def rounds(self):
+        return settings.PASSWORD_BCRYPT_ROUNDS
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """PBKDF2 with PASSWORD_PBKDF2_ITERATIONS iterations"""
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+def schedule_rehash(user, raw_password):
+    """
+    Store raw_password with the preferred hasher and costs, after a
+    login proved it right. With PASSWORD_REHASH_ASYNC the hashing runs
+    on a background thread instead of delaying the login; when more than
+    PASSWORD_REHASH_QUEUE rehashes wait, the hash is upgraded at a later
+    login instead.
+    """
+    if not settings.PASSWORD_REHASH_ASYNC:
+        user.set_password(raw_password)
+        user.save(update_fields=['password'])
+        return
+
+    executor, slots = _rehash_pool()
+    if not slots.acquire(blocking=False):
+        return
+    executor.submit(_rehash_in_background, slots, user.pk, user.password, raw_password)
+
+
+def rehash_password(user_id, encoded, raw_password):
+    """Replace the hash of a user unless it changed since it was checked"""
+    get_user_model().objects.filter(pk=user_id, password=encoded).update(
+        password=hashers.make_password(raw_password)
+    )
+
+
+def _rehash_in_background(slots, user_id, encoded, raw_password):
+    try:
+        rehash_password(user_id, encoded, raw_password)
+    except Exception:
+        logger.exception("Could not rehash the password of user %s", user_id)
+    finally:
+        connections.close_all()
+        slots.release()
+
+
+def _rehash_pool():
+    # Created on first use, so forked server workers get their own thread
+    global _rehash_executor, _rehash_slots
+    with _rehash_lock:
+        if _rehash_executor is None:
+            _rehash_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='password-rehash'
+            )
+            _rehash_slots = threading.BoundedSemaphore(settings.PASSWORD_REHASH_QUEUE)
+        return _rehash_executor, _rehash_slots
@@ -0,0 +1,195 @@
+import traceback
+from io import BytesIO
+
+from PIL import Image, features
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.models import ImageJob, ImageDerivative, Recipe
+
+# Name and longest edge in pixels of every derivative
+DERIVATIVE_SIZES = (
+    ('thumbnail', 200),
+    ('medium', 800),
+    ('large', 1600),
+)
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+FORMAT_EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+EXIF_ORIENTATION = 0x0112
+ORIENTATION_TRANSPOSES = {
+    2: Image.FLIP_LEFT_RIGHT,
+    3: Image.ROTATE_180,
+    4: Image.FLIP_TOP_BOTTOM,
+    5: Image.TRANSPOSE,
+    6: Image.ROTATE_270,
+    7: Image.TRANSVERSE,
+    8: Image.ROTATE_90,
+}
+
+
+def derivative_formats():
+    """WebP and JPEG, or only JPEG when Pillow was built without WebP"""
+    if features.check('webp'):
+        return ('webp', 'jpeg')
+    return ('jpeg',)
+
+
+def enqueue_image_job(recipe):
+    """Queue derivative generation for the current image of recipe"""
+    return ImageJob.objects.create(recipe=recipe, source=recipe.image.name)
+
+
+def claim_image_jobs(limit, stale_after):
+    """
+    Mark up to limit queued jobs as running and return them. Rows locked
+    by other workers are skipped; running jobs not updated for
+    stale_after (a timedelta) are assumed abandoned and claimed again.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(ImageJob.objects.select_for_update(skip_locked=True).filter(
+            Q(status=ImageJob.PENDING) |
+            Q(status=ImageJob.RUNNING, updated_at__lt=now - stale_after)
+        ).order_by('id')[:limit])
+        ImageJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=ImageJob.RUNNING,
+            attempts=F('attempts') + 1,
+            updated_at=now
+        )
+    for job in jobs:
+        job.status = ImageJob.RUNNING
+        job.attempts += 1
+    return jobs
+
+
+def run_image_job(job, max_attempts):
+    """
+    Generate the derivatives of a claimed job. Failed jobs are queued
+    again until they were attempted max_attempts times.
+    """
+    try:
+        recipe = Recipe.objects.get(pk=job.recipe_id)
+        # A newer upload has its own job
+        if recipe.image.name == job.source:
+            generate_derivatives(recipe)
+    except Exception:
+        job.error = traceback.format_exc()
+        job.status = ImageJob.FAILED if job.attempts >= max_attempts \
+            else ImageJob.PENDING
+    else:
+        job.error = ''
+        job.status = ImageJob.DONE
+    job.save(update_fields=('status', 'error', 'updated_at'))
+    return job
+
+
+def referenced_files(names):
+    """Return which of the stored file names a recipe or derivative uses"""
+    names = list(names)
+    referenced = set(Recipe.objects.filter(
+        image__in=names
+    ).values_list('image', flat=True))
+    referenced.update(ImageDerivative.objects.filter(
+        file__in=names
+    ).values_list('file', flat=True))
+    return referenced
+
+
+def generate_derivatives(recipe):
+    """
+    Store resized copies of the recipe image in every size and format
+    and replace the recipe's previous derivatives. EXIF orientation is
+    applied to the pixels; no metadata is copied to the derivatives.
+    Derivatives of an image already processed for another recipe reuse
+    the stored files.
+    """
+    source = recipe.image.name
+    storage = ImageDerivative._meta.get_field('file').storage
+    stored = {
+        derivative.file.name: derivative
+        for derivative in ImageDerivative.objects.filter(source=source)
+    }
+
+    image = None
+    derivatives = []
+    for name, size in DERIVATIVE_SIZES:
+        resized = None
+        for image_format in derivative_formats():
+            derivative = ImageDerivative(
+                recipe=recipe,
+                source=source,
+                name=name,
+                format=image_format,
+            )
+            filename = f'{name}.{FORMAT_EXTENSIONS[image_format]}'
+            path = derivative.file.field.generate_filename(derivative, filename)
+            match = stored.get(path)
+            if match is not None and storage.reuse(path):
+                derivative.file.name = path
+                derivative.width, derivative.height = match.width, match.height
+            else:
+                if image is None:
+                    image = _open_normalized(recipe.image)
+                if resized is None:
+                    resized = image.copy()
+                    resized.thumbnail((size, size), Image.LANCZOS)
+                derivative.width, derivative.height = resized.size
+                derivative.file.save(
+                    filename,
+                    ContentFile(_encode(resized, image_format)),
+                    save=False
+                )
+            derivatives.append(derivative)
+
+    # Files are shared by every recipe with the same image and are never
+    # deleted here; gc_images removes the ones left unreferenced.
+    with transaction.atomic():
+        # Lock the recipe so concurrent jobs replace derivatives in turn
+        current = Recipe.objects.select_for_update().filter(
+            pk=recipe.pk,
+            image=source
+        ).exists()
+        if current:
+            recipe.image_derivatives.all().delete()
+            ImageDerivative.objects.bulk_create(derivatives)
+
+
+def _open_normalized(field_file):
+    """
+    Decode an image upright and in a mode every format saves. Large JPEGs
+    are downscaled by the decoder while reading.
+    """
+    with field_file.open('rb'), Image.open(field_file) as image:
+        largest = max(size for name, size in DERIVATIVE_SIZES)
+        image.draft('RGB', (largest, largest))
+        return _normalized(image)
+
+
+def _normalized(image):
+    exif = image._getexif() if hasattr(image, '_getexif') else None
+    transpose = ORIENTATION_TRANSPOSES.get((exif or {}).get(EXIF_ORIENTATION))
+    has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    if transpose is not None:
+        image = image.transpose(transpose)
+    return image
+
+
+def _encode(image, image_format):
+    content = BytesIO()
+    if image_format == 'jpeg':
+        if image.mode == 'RGBA':
+            background = Image.new('RGB', image.size, (255, 255, 255))
+            background.paste(image, mask=image.split()[-1])
+            image = background
+        image.save(
+            content, 'JPEG',
+            quality=JPEG_QUALITY, optimize=True, progressive=True
+        )
+    else:
+        image.save(content, 'WEBP', quality=WEBP_QUALITY)
+    return content.getvalue()
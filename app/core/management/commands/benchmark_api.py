@@ -0,0 +1,260 @@
+import json
+import random
+import platform
+import tracemalloc
+from io import BytesIO
+
+import django
+from PIL import Image
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core import benchmarking
+from core.models import Recipe
+from core.search import update_search_vectors
+
+RESULT_FIELDS = ('p50_ms', 'p95_ms', 'p99_ms', 'queries', 'peak_memory_kb')
+
+
+class Command(BaseCommand):
+    """
+    Django command to benchmark the recipe API end to end through the
+    test client on a synthetic data set, which is rolled back afterwards.
+
+    Every scenario is timed over --repeat requests, then run a few more
+    times to count queries and trace memory, so that neither distorts
+    the timings. The cache is cleared before each request unless
+    --warm-cache is given, so responses are built from the database.
+    Results can be written to JSON and compared with an earlier run.
+    """
+    help = "Benchmark the recipe API on synthetic data"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--recipes', type=int, default=1000, help="Recipes per user")
+        parser.add_argument('--tags', type=int, default=50, help="Tags per user")
+        parser.add_argument('--ingredients', type=int, default=200, help="Ingredients per user")
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--profile-repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--warm-cache', action='store_true')
+        parser.add_argument(
+            '--scenarios', nargs='+',
+            help="Only run these scenarios (default: all)"
+        )
+        parser.add_argument('--output', help="Write the results to this JSON file")
+        parser.add_argument('--baseline', help="JSON results to compare with")
+        parser.add_argument(
+            '--max-regression', type=float,
+            help="Fail when a p50 is this many percent above the baseline"
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)
+
+        self.rnd = random.Random(options['seed'])
+        self.options = options
+        # Benchmark traffic would be throttled
+        rest_framework = dict(settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES={})
+        with override_settings(REST_FRAMEWORK=rest_framework), benchmarking.rolled_back():
+            self._generate()
+            results = self._run()
+        self._delete_uploads()
+
+        report = {'meta': self._meta(), 'results': results}
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+        if baseline is not None:
+            self._compare(results, baseline['results'])
+
+    def _generate(self):
+        options = self.options
+        self.stdout.write(
+            f"Generating {options['users']} users with {options['recipes']} recipes, "
+            f"{options['tags']} tags and {options['ingredients']} ingredients each..."
+        )
+        for number in range(options['users']):
+            user = benchmarking.create_benchmark_user(f'api-benchmark-{number}@example.com')
+            library = benchmarking.create_library(
+                user,
+                recipes=options['recipes'],
+                tags=options['tags'],
+                ingredients=options['ingredients'],
+                seed=options['seed'] + number,
+            )
+            if number == 0:
+                self.user, self.library = user, library
+        update_search_vectors(Recipe.objects.filter(user__email__startswith='api-benchmark-'))
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        self.client = APIClient(HTTP_HOST='127.0.0.1')
+        self.client.force_authenticate(self.user)
+        self.image = _sample_jpeg()
+        self.uploaded = set()
+
+    def _scenarios(self):
+        recipes, tags, ingredients = (
+            self.library['recipes'], self.library['tags'], self.library['ingredients']
+        )
+        recipe_url = reverse('recipe:recipe-list')
+
+        def detail():
+            return self.client.get(
+                reverse('recipe:recipe-detail', args=[self.rnd.choice(recipes)])
+            )
+
+        def create():
+            return self.client.post(recipe_url, {
+                'title': 'Benchmark recipe',
+                'time_minutes': 30,
+                'price': '12.50',
+                'tags': self.rnd.sample(tags, min(3, len(tags))),
+                'ingredients': self.rnd.sample(ingredients, min(5, len(ingredients))),
+            }, format='json')
+
+        def upload_image():
+            self.image.seek(0)
+            response = self.client.post(
+                reverse('recipe:recipe-upload-image', args=[self.rnd.choice(recipes)]),
+                {'image': self.image},
+                format='multipart'
+            )
+            if response.status_code == 200:
+                self.uploaded.add(Recipe.objects.get(pk=response.data['id']).image.name)
+            return response
+
+        def filtered(relation, ids):
+            return lambda: self.client.get(recipe_url, {
+                relation: ','.join(str(pk) for pk in self.rnd.sample(ids, min(2, len(ids))))
+            })
+
+        return {
+            'recipe_list': lambda: self.client.get(recipe_url),
+            'recipe_detail': detail,
+            'recipe_filter_tags': filtered('tags', tags),
+            'recipe_filter_ingredients': filtered('ingredients', ingredients),
+            'recipe_search': lambda: self.client.get(recipe_url, {
+                'search': ' '.join(self.rnd.sample(benchmarking.TITLE_WORDS, 2))
+            }),
+            'tag_list': lambda: self.client.get(reverse('recipe:tag-list')),
+            'ingredient_list': lambda: self.client.get(reverse('recipe:ingredient-list')),
+            'recipe_create': create,
+            'upload_image': upload_image,
+        }
+
+    def _run(self):
+        scenarios = self._scenarios()
+        names = self.options['scenarios'] or list(scenarios)
+        unknown = set(names) - set(scenarios)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}.")
+
+        results = {}
+        for name in names:
+            results[name] = self._run_scenario(scenarios[name])
+            self.stdout.write(f"{name:<26} " + ' '.join(
+                f'{field}={results[name][field]}' for field in RESULT_FIELDS
+            ))
+        return results
+
+    def _run_scenario(self, request):
+        statuses = set()
+
+        def timed_request():
+            if not self.options['warm_cache']:
+                cache.clear()
+            statuses.add(request().status_code)
+
+        timed_request()
+        durations = benchmarking.timed(timed_request, self.options['repeat'])
+
+        queries, peak = [], 0
+        for _ in range(self.options['profile_repeat']):
+            if not self.options['warm_cache']:
+                cache.clear()
+            tracemalloc.start()
+            with CaptureQueriesContext(connection) as captured:
+                statuses.add(request().status_code)
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+            queries.append(len(captured))
+
+        return {
+            'p50_ms': round(benchmarking.percentile(durations, 50) * 1000, 2),
+            'p95_ms': round(benchmarking.percentile(durations, 95) * 1000, 2),
+            'p99_ms': round(benchmarking.percentile(durations, 99) * 1000, 2),
+            'queries': max(queries) if queries else None,
+            'peak_memory_kb': round(peak / 1024),
+            'statuses': sorted(statuses),
+        }
+
+    def _delete_uploads(self):
+        """
+        Delete the uploaded images, which outlive the rolled back rows,
+        unless recipes share them: storage is addressed by content.
+        """
+        shared = set(Recipe.objects.filter(
+            image__in=self.uploaded
+        ).values_list('image', flat=True))
+        for name in self.uploaded - shared:
+            default_storage.delete(name)
+
+    def _meta(self):
+        return {
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'options': {
+                name: self.options[name]
+                for name in ('users', 'recipes', 'tags', 'ingredients', 'repeat',
+                             'seed', 'warm_cache')
+            },
+        }
+
+    def _compare(self, results, baseline):
+        regressions = []
+        self.stdout.write("\nCompared with the baseline (p50, p95, queries):")
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            change = _change(before['p50_ms'], result['p50_ms'])
+            self.stdout.write(
+                f"{name:<26} p50 {change:+.1f}% "
+                f"p95 {_change(before['p95_ms'], result['p95_ms']):+.1f}% "
+                f"queries {before['queries']} -> {result['queries']}"
+            )
+            max_regression = self.options['max_regression']
+            if max_regression is not None and change > max_regression:
+                regressions.append(name)
+        if regressions:
+            raise CommandError(
+                f"p50 regressed by more than {self.options['max_regression']}% in: "
+                f"{', '.join(regressions)}."
+            )
+
+
+def _change(before, after):
+    return (after - before) / before * 100 if before else 0.0
+
+
+def _sample_jpeg():
+    content = BytesIO()
+    Image.new('RGB', (800, 600), (180, 90, 40)).save(content, 'JPEG')
+    content.name = 'benchmark.jpg'
+    content.seek(0)
+    return content
@@ -0,0 +1,115 @@
+from io import BytesIO
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from core import benchmarking
+
+
+class Command(BaseCommand):
+    """
+    Django command to measure what database connection reuse is worth
+    per request. Recipe list requests go through the WSGI handler one
+    after the other, so connections are opened and closed exactly as in
+    a server worker, with:
+
+      - a new connection per request (CONN_MAX_AGE=0)
+      - persistent connections
+      - persistent connections with health checks
+      - optionally a pooler such as pgbouncer (--pooler host:port)
+    """
+    help = "Benchmark requests/sec with and without connection reuse"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--recipes', type=int, default=200)
+        parser.add_argument(
+            '--pooler',
+            help="host:port of a transaction pooler in front of the database"
+        )
+
+    def handle(self, *args, **options):
+        if options['pooler'] and ':' not in options['pooler']:
+            raise CommandError("--pooler must be given as host:port.")
+
+        user = benchmarking.create_benchmark_user('connection-benchmark@example.com')
+        original = dict(connection.settings_dict)
+        try:
+            benchmarking.create_library(
+                user, recipes=options['recipes'], tags=20, ingredients=100
+            )
+            token = Token.objects.create(user=user)
+            environ = {
+                'REQUEST_METHOD': 'GET',
+                'PATH_INFO': reverse('recipe:recipe-list'),
+                'SERVER_NAME': '127.0.0.1',
+                'SERVER_PORT': '80',
+                'wsgi.url_scheme': 'http',
+                'HTTP_AUTHORIZATION': f'Token {token.key}',
+            }
+            cases = [
+                ('new connection per request', {
+                    'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False,
+                }),
+                ('persistent', {
+                    'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': False,
+                }),
+                ('persistent, health checks', {
+                    'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True,
+                }),
+            ]
+            if options['pooler']:
+                host, port = options['pooler'].rsplit(':', 1)
+                pooled = {
+                    'HOST': host, 'PORT': port, 'DISABLE_SERVER_SIDE_CURSORS': True,
+                }
+                cases += [
+                    ('pooler, new connection per request', dict(
+                        pooled, CONN_MAX_AGE=0, CONN_HEALTH_CHECKS=False
+                    )),
+                    ('pooler, persistent', dict(
+                        pooled, CONN_MAX_AGE=600, CONN_HEALTH_CHECKS=False
+                    )),
+                ]
+
+            handler = WSGIHandler()
+            # Benchmark traffic would be throttled
+            rest_framework = dict(settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES={})
+            with override_settings(REST_FRAMEWORK=rest_framework):
+                for name, database in cases:
+                    connection.close()
+                    connection.settings_dict.update(original, **database)
+                    self._run_case(name, handler, environ, options['requests'])
+        finally:
+            connection.close()
+            connection.settings_dict.update(original)
+            user.delete()
+
+    def _run_case(self, name, handler, environ, count):
+        statuses = []
+
+        def request():
+            response = handler(
+                dict(environ, **{'wsgi.input': BytesIO()}),
+                lambda status, headers, exc_info=None: statuses.append(status)
+            )
+            for chunk in response:
+                pass
+            response.close()
+
+        # Warm up caches and the first connection
+        request()
+        durations = benchmarking.timed(request, repeat=count)
+
+        failed = sum(1 for status in statuses if not status.startswith('200'))
+        self.stdout.write(
+            f"{name:<36} rps={count / sum(durations):.0f} "
+            f"p50={benchmarking.percentile(durations, 50) * 1000:.2f}ms "
+            f"p95={benchmarking.percentile(durations, 95) * 1000:.2f}ms "
+            f"failed={failed}"
+        )
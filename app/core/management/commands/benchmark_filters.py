@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.core.management.base import BaseCommand
+
+from core import benchmarking
+from core.bulk import bulk_delete
+from core.models import Recipe
+from recipe.filters import RecipeRelationFilter
+
+BENCHMARK_EMAIL = 'filter-benchmark@example.com'
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare recipe tag/ingredient filtering plans on a
+    synthetic library. Queries have the shape of a recipe list page.
+
+    Generated data is rolled back afterwards, so by default the tables
+    are never vacuumed: their visibility map stays empty and Postgres
+    will not pick index-only scans. With --vacuum the data is committed,
+    the tables are vacuumed so index-only scans can be planned, as on a
+    settled database, and the data is deleted at the end.
+    """
+    help = "Benchmark recipe relation filtering"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--tags', type=int, default=50)
+        parser.add_argument('--ingredients', type=int, default=300)
+        parser.add_argument('--filter-size', type=int, default=2)
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--explain', action='store_true')
+        parser.add_argument('--vacuum', action='store_true')
+
+    def handle(self, *args, **options):
+        if not options['vacuum']:
+            with benchmarking.rolled_back():
+                self._benchmark(options)
+            return
+        try:
+            self._benchmark(options)
+        finally:
+            bulk_delete(get_user_model().objects.filter(email=BENCHMARK_EMAIL))
+
+    def _benchmark(self, options):
+        user = benchmarking.create_benchmark_user(BENCHMARK_EMAIL)
+        self.stdout.write(f"Generating {options['recipes']} recipes...")
+        ids = benchmarking.create_library(
+            user,
+            recipes=options['recipes'],
+            tags=options['tags'],
+            ingredients=options['ingredients'],
+        )
+        if connection.vendor == 'postgresql':
+            self._analyze(options['vacuum'])
+
+        size = options['filter_size']
+        tags = ids['tags'][:size]
+        ingredients = ids['ingredients'][:size]
+        params = {
+            'tags': ','.join(map(str, tags)),
+            'ingredients': ','.join(map(str, ingredients)),
+        }
+        base = Recipe.objects.filter(user=user)
+        relation_filter = RecipeRelationFilter()
+        cases = [
+            ('legacy joins', base.filter(
+                tags__id__in=tags
+            ).filter(ingredients__id__in=ingredients)),
+            # Semi-joins written as IN (subquery), see RecipeRelationFilter
+            ('in any', relation_filter.filter_params(base, params)),
+            ('aggregate all', relation_filter.filter_params(base, dict(
+                params, tags_match='all', ingredients_match='all'
+            ))),
+        ]
+        for name, queryset in cases:
+            self._run_case(name, queryset, options)
+
+    def _analyze(self, vacuum):
+        """Refresh the planner statistics, and the visibility map with vacuum"""
+        statement = 'VACUUM ANALYZE' if vacuum else 'ANALYZE'
+        tables = [Recipe._meta.db_table] + [
+            field.remote_field.through._meta.db_table
+            for field in Recipe._meta.many_to_many
+        ]
+        with connection.cursor() as cursor:
+            for table in tables:
+                cursor.execute(f'{statement} {connection.ops.quote_name(table)}')
+
+    def _run_case(self, name, queryset, options):
+        queryset = queryset.order_by('id').values_list('id', flat=True)
+        rows = queryset.count()
+        queryset = queryset[:options['page_size']]
+        durations = benchmarking.timed(
+            lambda: list(queryset.all()), options['repeat']
+        )
+        self.stdout.write(
+            f"{name:<15} rows={rows:<8} "
+            f"p50={benchmarking.percentile(durations, 50) * 1000:.2f}ms "
+            f"p95={benchmarking.percentile(durations, 95) * 1000:.2f}ms"
+        )
+        if options['explain']:
+            analyze = connection.vendor == 'postgresql'
+            self.stdout.write(queryset.explain(analyze=analyze))
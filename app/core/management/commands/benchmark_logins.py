@@ -0,0 +1,58 @@
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+
+from core import benchmarking
+
+PASSWORD = 'benchmark-password'
+COST_PARAMETERS = ('time cost', 'memory cost', 'parallelism', 'work factor', 'iterations')
+
+
+class Command(BaseCommand):
+    """
+    Django command to measure logins per second on one core for every
+    configured password hasher at its configured cost, and for the
+    complete authenticate() path with the preferred hasher. Generated
+    data is rolled back afterwards.
+    """
+    help = "Benchmark password hashers and logins per core"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        for algorithm in ('argon2', 'bcrypt_sha256', 'pbkdf2_sha256'):
+            try:
+                hasher = get_hasher(algorithm)
+                encoded = hasher.encode(PASSWORD, hasher.salt())
+            except (ValueError, ImportError) as exc:
+                self.stderr.write(f"{algorithm}: skipped ({exc})")
+                continue
+            durations = benchmarking.timed(
+                lambda: hasher.verify(PASSWORD, encoded), repeat
+            )
+            costs = ', '.join(
+                f'{name}={value}'
+                for name, value in hasher.safe_summary(encoded).items()
+                if name in COST_PARAMETERS
+            )
+            self._report(f"{algorithm} ({costs})", durations)
+
+        with benchmarking.rolled_back():
+            user = benchmarking.create_benchmark_user('login-benchmark@example.com')
+            user.set_password(PASSWORD)
+            user.save()
+            durations = benchmarking.timed(
+                lambda: authenticate(username=user.email, password=PASSWORD),
+                repeat
+            )
+            self._report(f"authenticate() with {settings.PASSWORD_HASHER}", durations)
+
+    def _report(self, name, durations):
+        median = benchmarking.percentile(durations, 50)
+        self.stdout.write(
+            f"{name}\n    p50={median * 1000:.1f}ms "
+            f"logins/s per core={1 / median if median else 0:.0f}"
+        )
@@ -0,0 +1,70 @@
+from django.db import connection
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core import benchmarking
+from core.models import Recipe
+from core.search import update_search_vectors
+from recipe.filters import RecipeSearchFilter
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare full-text recipe search with substring
+    matching on a synthetic library. Queries have the shape of a recipe
+    list page. All generated data is rolled back afterwards.
+    """
+    help = "Benchmark recipe full-text search"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--search', default='tomato soup')
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--explain', action='store_true')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("Full-text search needs PostgreSQL.")
+
+        with benchmarking.rolled_back():
+            user = benchmarking.create_benchmark_user()
+            self.stdout.write(f"Generating {options['recipes']} recipes...")
+            benchmarking.create_library(
+                user, recipes=options['recipes'], tags=50, ingredients=300
+            )
+            update_search_vectors(Recipe.objects.filter(user=user))
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+            base = Recipe.objects.filter(user=user)
+            search_filter = RecipeSearchFilter()
+            request = Request(APIRequestFactory().get(
+                '/', {search_filter.search_param: options['search']}
+            ))
+            contains = base
+            for word in options['search'].split():
+                contains = contains.filter(title__icontains=word)
+            cases = [
+                ('title icontains', contains.order_by('id')),
+                ('search vector', search_filter.filter_queryset(
+                    request, base, None
+                ).order_by(*search_filter.rank_ordering)),
+            ]
+            for name, queryset in cases:
+                self._run_case(name, queryset, options)
+
+    def _run_case(self, name, queryset, options):
+        rows = queryset.count()
+        queryset = queryset.values_list('id', flat=True)[:options['page_size']]
+        durations = benchmarking.timed(
+            lambda: list(queryset.all()), options['repeat']
+        )
+        self.stdout.write(
+            f"{name:<16} rows={rows:<8} "
+            f"p50={benchmarking.percentile(durations, 50) * 1000:.2f}ms "
+            f"p95={benchmarking.percentile(durations, 95) * 1000:.2f}ms"
+        )
+        if options['explain']:
+            self.stdout.write(queryset.explain(analyze=True))
@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from core import benchmarking
+from core.models import Recipe
+from core.renderers import FastJSONRenderer
+from recipe.fastread import row_representation
+from recipe.serializers import RecipeSerializer
+from recipe.views import RecipeViewSet
+
+
+class Command(BaseCommand):
+    """
+    Django command to compare the throughput of the recipe list
+    representation built by RecipeSerializer from prefetched instances
+    and rendered by JSONRenderer, with the one built from rows by
+    recipe.fastread and rendered by FastJSONRenderer. Loading, building
+    and rendering are timed separately on a synthetic library, which is
+    rolled back afterwards; both must render the same bytes.
+    """
+    help = "Benchmark recipe list serialization, serializer against rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with benchmarking.rolled_back():
+            user = benchmarking.create_benchmark_user('serialization-benchmark@example.com')
+            benchmarking.create_library(
+                user, recipes=options['recipes'], tags=50, ingredients=200
+            )
+            queryset = Recipe.objects.filter(user=user).order_by('id')
+
+            viewset = RecipeViewSet(action='list')
+            serialized = self._measure(
+                'serializer',
+                lambda: list(viewset._apply_fetch_plan(queryset)),
+                lambda recipes: RecipeSerializer(recipes, many=True).data,
+                JSONRenderer(),
+                options
+            )
+            representation = row_representation(RecipeSerializer)
+            built = self._measure(
+                'rows',
+                lambda: list(representation.values(queryset)),
+                representation.build,
+                FastJSONRenderer(),
+                options
+            )
+        if serialized != built:
+            raise CommandError("The rows rendered differently from the serializer.")
+
+    def _measure(self, name, load, represent, renderer, options):
+        timings = {'load': [], 'represent': [], 'render': []}
+        for _ in range(options['repeat']):
+            items = _timed(load, timings['load'])
+            data = _timed(lambda: represent(items), timings['represent'])
+            content = _timed(lambda: renderer.render(data), timings['render'])
+
+        medians = {
+            step: benchmarking.percentile(durations, 50)
+            for step, durations in timings.items()
+        }
+        serialization = medians['represent'] + medians['render']
+        self.stdout.write(
+            f"{name:<10} " + ' '.join(
+                f"{step}={duration * 1000:.0f}ms" for step, duration in medians.items()
+            ) + f" serialization={options['recipes'] / serialization:,.0f} recipes/s"
+            f" total={sum(medians.values()) * 1000:.0f}ms"
+        )
+        return content
+
+
+def _timed(func, durations):
+    """Call func, record its duration and return its result"""
+    result = []
+    durations.extend(benchmarking.timed(lambda: result.append(func())))
+    return result[0]
@@ -0,0 +1,148 @@
+import os
+import sys
+import time
+import socket
+import http.client
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from core import benchmarking
+
+HOST = '127.0.0.1'
+
+
+class Command(BaseCommand):
+    """
+    Django command to load test the recipe list endpoint served by the
+    development server and by gunicorn with app.gunicorn_conf. Each
+    server is started in turn on a free port against the configured
+    database; concurrent keep-alive clients request the first page of
+    a synthetic library for a fixed time.
+    """
+    help = "Load test runserver against gunicorn on the recipe list"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help="Seconds of load per server"
+        )
+        parser.add_argument(
+            '--servers', nargs='+', choices=('runserver', 'gunicorn'),
+            default=['runserver', 'gunicorn']
+        )
+
+    def handle(self, *args, **options):
+        user = benchmarking.create_benchmark_user('server-benchmark@example.com')
+        try:
+            benchmarking.create_library(
+                user, recipes=options['recipes'], tags=20, ingredients=100
+            )
+            token = Token.objects.create(user=user)
+            self.path = reverse('recipe:recipe-list')
+            self.headers = {'Authorization': f'Token {token.key}'}
+
+            for server in options['servers']:
+                port = _free_port()
+                process = subprocess.Popen(
+                    self._server_command(server, port),
+                    cwd=settings.BASE_DIR,
+                    # One client token would be throttled
+                    env=dict(os.environ, READ_THROTTLE_RATE=''),
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                )
+                try:
+                    _wait_for_port(port, process)
+                    self._load(server, port, options)
+                finally:
+                    process.terminate()
+                    process.wait()
+        finally:
+            user.delete()
+
+    def _server_command(self, server, port):
+        if server == 'runserver':
+            return [
+                sys.executable, 'manage.py', 'runserver',
+                '--noreload', f'{HOST}:{port}',
+            ]
+        return [
+            sys.executable, '-c', 'from gunicorn.app.wsgiapp import run; run()',
+            '-c', 'python:app.gunicorn_conf',
+            '--bind', f'{HOST}:{port}',
+            'app.wsgi',
+        ]
+
+    def _load(self, server, port, options):
+        # One warm-up request, so imports and first connections are excluded
+        self._request(http.client.HTTPConnection(HOST, port))
+
+        deadline = time.perf_counter() + options['duration']
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            results = list(executor.map(
+                lambda _: self._client(port, deadline),
+                range(options['concurrency'])
+            ))
+
+        durations = [duration for result in results for duration in result[0]]
+        errors = sum(result[1] for result in results)
+        self.stdout.write(
+            f"{server:<10} requests={len(durations)} errors={errors} "
+            f"rps={len(durations) / options['duration']:.0f} "
+            f"p50={benchmarking.percentile(durations, 50) * 1000:.1f}ms "
+            f"p95={benchmarking.percentile(durations, 95) * 1000:.1f}ms "
+            f"p99={benchmarking.percentile(durations, 99) * 1000:.1f}ms"
+        )
+
+    def _client(self, port, deadline):
+        """Send requests over one keep-alive connection until deadline"""
+        durations, errors = [], 0
+        conn = http.client.HTTPConnection(HOST, port, timeout=30)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                status = self._request(conn)
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(HOST, port, timeout=30)
+                status = None
+            if status == 200:
+                durations.append(time.perf_counter() - start)
+            else:
+                errors += 1
+        conn.close()
+        return durations, errors
+
+    def _request(self, conn):
+        conn.request('GET', self.path, headers=self.headers)
+        response = conn.getresponse()
+        response.read()
+        if response.getheader('Connection', '').lower() == 'close':
+            conn.close()
+        return response.status
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f"Server exited with status {process.returncode}.")
+        try:
+            with socket.create_connection((HOST, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"Server did not listen on port {port} in {timeout}s.")
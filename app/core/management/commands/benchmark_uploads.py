@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from core import benchmarking
+from core.models import Recipe
+
+BOUNDARY = 'benchmark-boundary'
+
+
+class Command(BaseCommand):
+    """
+    Django command to measure the memory used by concurrent recipe image
+    uploads. Requests are streamed from files on disk through the WSGI
+    handler, so the peak traced by tracemalloc is the server's own.
+    """
+    help = "Benchmark memory use of concurrent image uploads"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--uploads', type=int, default=20)
+        parser.add_argument(
+            '--size', type=int, default=10,
+            help="Approximate image size in MB"
+        )
+
+    def handle(self, *args, **options):
+        count = options['uploads']
+        user = benchmarking.create_benchmark_user('upload-benchmark@example.com')
+        workdir = tempfile.mkdtemp()
+        try:
+            token = Token.objects.create(user=user)
+            recipes = [
+                Recipe.objects.create(
+                    user=user, title=f'Upload {i}', time_minutes=1, price=1
+                )
+                for i in range(count)
+            ]
+            body = self._write_body(workdir, options['size'] * 1024 * 1024)
+            self.stdout.write(
+                f"Uploading {count} images of {os.path.getsize(body) / 2 ** 20:.1f}MB "
+                f"(limit {settings.RECIPE_IMAGE_MAX_SIZE / 2 ** 20:.1f}MB)..."
+            )
+
+            handler = WSGIHandler()
+            tracemalloc.start()
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=count) as executor:
+                results = list(executor.map(
+                    lambda recipe: self._upload(handler, recipe, token, body),
+                    recipes
+                ))
+            elapsed = time.perf_counter() - start
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            statuses = sorted({status for status, duration in results})
+            durations = [duration for status, duration in results]
+            self.stdout.write(
+                f"statuses={statuses} total={elapsed:.2f}s "
+                f"p50={benchmarking.percentile(durations, 50) * 1000:.0f}ms "
+                f"p95={benchmarking.percentile(durations, 95) * 1000:.0f}ms\n"
+                f"peak traced memory={peak / 2 ** 20:.1f}MB "
+                f"({peak / count / 2 ** 20:.2f}MB per upload)"
+            )
+        finally:
+            for recipe in Recipe.objects.filter(user=user):
+                recipe.image.delete(save=False)
+            user.delete()
+            shutil.rmtree(workdir)
+
+    def _write_body(self, workdir, size):
+        """Write a multipart body holding a noise PNG of about size bytes"""
+        side = int((size / 3) ** 0.5)
+        image = Image.frombytes('RGB', (side, side), os.urandom(side * side * 3))
+        path = os.path.join(workdir, 'body')
+        with open(path, 'wb') as body:
+            body.write((
+                f'--{BOUNDARY}\r\n'
+                f'Content-Disposition: form-data; name="image"; filename="noise.png"\r\n'
+                f'Content-Type: image/png\r\n\r\n'
+            ).encode())
+            image.save(body, 'PNG', compress_level=0)
+            body.write(f'\r\n--{BOUNDARY}--\r\n'.encode())
+        return path
+
+    def _upload(self, handler, recipe, token, body):
+        path = reverse('recipe:recipe-upload-image', args=[recipe.id])
+        status = []
+        start = time.perf_counter()
+        try:
+            with open(body, 'rb') as stream:
+                environ = {
+                    'REQUEST_METHOD': 'POST',
+                    'PATH_INFO': path,
+                    'SERVER_NAME': '127.0.0.1',
+                    'SERVER_PORT': '80',
+                    'wsgi.url_scheme': 'http',
+                    'wsgi.input': stream,
+                    'CONTENT_TYPE': f'multipart/form-data; boundary={BOUNDARY}',
+                    'CONTENT_LENGTH': str(os.path.getsize(body)),
+                    'HTTP_AUTHORIZATION': f'Token {token.key}',
+                }
+                response = handler(
+                    environ,
+                    lambda code, headers, exc_info=None: status.append(code)
+                )
+                for chunk in response:
+                    pass
+                response.close()
+        finally:
+            connection.close()
+        return status[0], time.perf_counter() - start
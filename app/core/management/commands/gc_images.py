@@ -0,0 +1,69 @@
+import posixpath
+from datetime import timedelta
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.images import referenced_files
+from core.models import Recipe
+
+
+class Command(BaseCommand):
+    """
+    Django command to delete stored recipe images and derivatives that no
+    row references any more. Storage is walked lazily and checked in
+    batches with one query per model. Files modified within the grace
+    period are kept, as an upload or job may be about to reference them.
+    """
+    help = "Delete unreferenced recipe image files"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix', default='uploads/recipe')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--grace-period', type=int, default=24 * 60 * 60,
+            help="Seconds a new unreferenced file is kept"
+        )
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        storage = Recipe._meta.get_field('image').storage
+        cutoff = timezone.now() - timedelta(seconds=options['grace_period'])
+        names = self._walk(storage, options['prefix'])
+        scanned = deleted = freed = 0
+
+        while True:
+            batch = list(islice(names, options['batch_size']))
+            if not batch:
+                break
+            scanned += len(batch)
+            referenced = referenced_files(batch)
+            for name in batch:
+                if name in referenced:
+                    continue
+                try:
+                    if storage.get_modified_time(name) > cutoff:
+                        continue
+                    size = storage.size(name)
+                except FileNotFoundError:
+                    continue
+                if not options['dry_run']:
+                    storage.delete(name)
+                deleted += 1
+                freed += size
+            self.stdout.write(f"{scanned} files scanned, {deleted} unreferenced")
+
+        verb = "Would delete" if options['dry_run'] else "Deleted"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {deleted} of {scanned} files ({freed / 2 ** 20:.1f}MB)."
+        ))
+
+    def _walk(self, storage, path):
+        if not storage.exists(path):
+            return
+        directories, files = storage.listdir(path)
+        for name in sorted(files):
+            yield posixpath.join(path, name)
+        for directory in sorted(directories):
+            yield from self._walk(storage, posixpath.join(path, directory))
@@ -0,0 +1,224 @@
+import csv
+import sys
+import json
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from core.bulk import bulk_create_with_pks
+from core.models import Tag, Ingredient, Recipe
+from core.search import update_search_vectors
+from recipe.cache import bump_user_version
+
+RELATION_SEPARATOR = ';'
+
+
+class Command(BaseCommand):
+    """
+    Django command to bulk import recipes from a JSONL or CSV file.
+
+    Every row holds title, time_minutes, price and optionally link, user
+    (email), tags and ingredients (lists of names, or names separated by
+    ';' in CSV), which is the format written by the recipe export.
+    Tags and ingredients are deduplicated per user by name.
+    """
+    help = "Import recipes from a JSONL or CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import, '-' for stdin")
+        parser.add_argument('--format', choices=('jsonl', 'csv'))
+        parser.add_argument(
+            '--user',
+            help="Email of the owner of rows that do not name one"
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--strict', action='store_true',
+            help="Abort on the first invalid row instead of skipping it"
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.strict = options['strict']
+        self.default_user = options['user']
+        self.user_ids = {}
+        self.tag_ids = {}
+        self.ingredient_ids = {}
+        self.skipped = 0
+
+        path = options['path']
+        file_format = options['format'] or ('csv' if path.endswith('.csv') else 'jsonl')
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            imported = self._import(self._read_rows(stream, file_format))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        for user_id in self.user_ids.values():
+            if user_id is not None:
+                bump_user_version(user_id)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} recipes, skipped {self.skipped} rows."
+        ))
+
+    def _read_rows(self, stream, file_format):
+        if file_format == 'csv':
+            for line, row in enumerate(csv.DictReader(stream), start=2):
+                for relation in ('tags', 'ingredients'):
+                    value = row.get(relation) or ''
+                    row[relation] = value.split(RELATION_SEPARATOR) if value else []
+                yield line, row
+        else:
+            for line, text in enumerate(stream, start=1):
+                if not text.strip():
+                    continue
+                try:
+                    yield line, json.loads(text)
+                except ValueError as exc:
+                    self._skip(line, f"invalid JSON: {exc}")
+
+    def _import(self, rows):
+        imported = 0
+        start = time.monotonic()
+        while True:
+            chunk = list(islice(rows, self.batch_size))
+            if not chunk:
+                break
+            batch = []
+            for line, row in chunk:
+                recipe = self._parse_row(line, row)
+                if recipe is not None:
+                    batch.append(recipe)
+            if not batch:
+                # Every row of the chunk was skipped, the next may be valid
+                continue
+
+            with transaction.atomic():
+                self._import_batch(batch)
+            imported += len(batch)
+
+            elapsed = time.monotonic() - start
+            self.stdout.write(
+                f"{imported} recipes imported "
+                f"({imported / elapsed if elapsed else 0:.0f} rows/s)"
+            )
+        return imported
+
+    def _parse_row(self, line, row):
+        if not isinstance(row, dict):
+            return self._skip(line, "expected an object")
+        email = row.get('user') or self.default_user
+        if not email:
+            return self._skip(line, "no user given")
+        user_id = self._user_id(email)
+        if user_id is None:
+            return self._skip(line, f"unknown user {email}")
+        try:
+            return {
+                'user_id': user_id,
+                'title': _bounded(Recipe, 'title', str(row['title']).strip()),
+                'time_minutes': int(row['time_minutes']),
+                'price': _price(row['price']),
+                'link': _bounded(Recipe, 'link', str(row.get('link') or '')),
+                'tags': _clean_names(Tag, row.get('tags')),
+                'ingredients': _clean_names(Ingredient, row.get('ingredients')),
+            }
+        except (KeyError, TypeError, ValueError, InvalidOperation) as exc:
+            return self._skip(line, f"invalid row: {exc!r}")
+
+    def _import_batch(self, batch):
+        self._create_missing(Tag, self.tag_ids, batch, 'tags')
+        self._create_missing(Ingredient, self.ingredient_ids, batch, 'ingredients')
+
+        recipes = bulk_create_with_pks(Recipe, [
+            Recipe(
+                user_id=row['user_id'],
+                title=row['title'],
+                time_minutes=row['time_minutes'],
+                price=row['price'],
+                link=row['link'],
+            )
+            for row in batch
+        ], self.batch_size)
+
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag_id)
+            for recipe, row in zip(recipes, batch)
+            for tag_id in {self.tag_ids[(row['user_id'], name)] for name in row['tags']}
+        ], batch_size=self.batch_size)
+        Recipe.ingredients.through.objects.bulk_create([
+            Recipe.ingredients.through(recipe_id=recipe.pk, ingredient_id=ingredient_id)
+            for recipe, row in zip(recipes, batch)
+            for ingredient_id in {
+                self.ingredient_ids[(row['user_id'], name)]
+                for name in row['ingredients']
+            }
+        ], batch_size=self.batch_size)
+        update_search_vectors(
+            Recipe.objects.filter(pk__in=[recipe.pk for recipe in recipes])
+        )
+
+    def _create_missing(self, model, ids, batch, relation):
+        """Create the names of batch that are not in the (user, name) map"""
+        missing = {}
+        for row in batch:
+            for name in row[relation]:
+                key = (row['user_id'], name)
+                if key not in ids and key not in missing:
+                    missing[key] = model(user_id=row['user_id'], name=name)
+        for obj in bulk_create_with_pks(model, list(missing.values()), self.batch_size):
+            ids[(obj.user_id, obj.name)] = obj.pk
+
+    def _user_id(self, email):
+        if email not in self.user_ids:
+            user_id = get_user_model().objects.filter(
+                email=email
+            ).values_list('id', flat=True).first()
+            self.user_ids[email] = user_id
+            if user_id is not None:
+                self._load_names(Tag, self.tag_ids, user_id)
+                self._load_names(Ingredient, self.ingredient_ids, user_id)
+        return self.user_ids[email]
+
+    def _load_names(self, model, ids, user_id):
+        rows = model.objects.filter(
+            user_id=user_id
+        ).order_by('-id').values_list('name', 'id')
+        for name, pk in rows:
+            ids[(user_id, name)] = pk
+
+    def _skip(self, line, reason):
+        if self.strict:
+            raise CommandError(f"Line {line}: {reason}")
+        self.skipped += 1
+        self.stderr.write(f"Skipping line {line}: {reason}")
+
+
+def _clean_names(model, names):
+    if not names:
+        return []
+    if isinstance(names, str):
+        names = names.split(RELATION_SEPARATOR)
+    names = (str(name).strip() for name in names)
+    return [_bounded(model, 'name', name) for name in names if name]
+
+
+def _bounded(model, field_name, value):
+    max_length = model._meta.get_field(field_name).max_length
+    if len(value) > max_length:
+        raise ValueError(f"{field_name} longer than {max_length} characters")
+    return value
+
+
+def _price(value):
+    field = Recipe._meta.get_field('price')
+    price = Decimal(str(value)).quantize(Decimal(1).scaleb(-field.decimal_places))
+    if len(price.as_tuple().digits) > field.max_digits:
+        raise ValueError(f"price {value} has more than {field.max_digits} digits")
+    return price
@@ -0,0 +1,51 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core.db import close_unusable_connections
+from core.images import claim_image_jobs, run_image_job
+from core.models import ImageJob
+
+
+class Command(BaseCommand):
+    """
+    Django command to generate recipe image derivatives from the job
+    queue. Any number of workers can run side by side.
+    """
+    help = "Process queued recipe image jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10)
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help="Seconds to wait when the queue is empty"
+        )
+        parser.add_argument('--max-attempts', type=int, default=3)
+        parser.add_argument(
+            '--stale-after', type=int, default=600,
+            help="Seconds after which a running job is claimed again"
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Exit once the queue is empty"
+        )
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(seconds=options['stale_after'])
+        while True:
+            close_unusable_connections()
+            jobs = claim_image_jobs(options['batch_size'], stale_after)
+            if not jobs:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+
+            for job in jobs:
+                run_image_job(job, options['max_attempts'])
+                message = f"Job {job.pk} for {job.source}: {job.status}"
+                if job.status == ImageJob.DONE:
+                    self.stdout.write(self.style.SUCCESS(message))
+                else:
+                    self.stderr.write(message)
@@ -0,0 +1,67 @@
+"""
+Prometheus metrics of the API, served at /metrics.
+
+Under gunicorn every worker process writes its samples to memory mapped
+files in PROMETHEUS_MULTIPROC_DIR, which the endpoint aggregates; the
+directory must be set before the app is imported and emptied when the
+server starts (see app.gunicorn_conf).
+"""
+import os
+
+from prometheus_client import (
+    CollectorRegistry, Counter, Histogram, REGISTRY, generate_latest, multiprocess,
+)
+
+ROUTE_LABELS = ('route', 'action')
+
+requests_total = Counter(
+    'api_requests_total',
+    'API requests by route, action and status code',
+    ROUTE_LABELS + ('method', 'status'),
+)
+request_duration = Histogram(
+    'api_request_duration_seconds',
+    'API request latency',
+    ROUTE_LABELS,
+    buckets=(.005, .01, .025, .05, .075, .1, .25, .5, .75, 1, 2.5, 5, 10),
+)
+request_queries = Histogram(
+    'api_request_db_queries',
+    'Database queries per API request',
+    ROUTE_LABELS,
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+exceptions_total = Counter(
+    'api_request_exceptions_total',
+    'API requests that raised an unhandled exception',
+    ROUTE_LABELS,
+)
+cache_requests_total = Counter(
+    'api_cache_requests_total',
+    'Cache lookups by cache and result (hit or miss)',
+    ('cache', 'result'),
+)
+
+
+def observe_request(route, action, method, status, duration, queries):
+    requests_total.labels(route, action, method, status).inc()
+    request_duration.labels(route, action).observe(duration)
+    request_queries.labels(route, action).observe(queries)
+
+
+def observe_exception(route, action):
+    exceptions_total.labels(route, action).inc()
+
+
+def observe_cache(cache, hit):
+    cache_requests_total.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def render_latest():
+    """Return the metrics of every process in the text exposition format"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry)
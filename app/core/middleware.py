@@ -0,0 +1,159 @@
+import time
+import random
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from core import metrics
+from core.performance import RequestMetrics, measuring, log_request
+from core.routers import ReplicaReads, read_from_replicas, pin_to_primary
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Let requests with safe methods read from the database replicas, all
+    their queries from the same one. A user who wrote in the last
+    DB_PRIMARY_PIN_SECONDS reads from the primary instead, from any of
+    their devices, so they see their own writes despite replication lag.
+
+    Users are pinned when their recipe data changes (see
+    recipe.cache.bump_user_version) and after every request with another
+    method. Pins live in the default cache and are only trusted when it
+    is shared by all server processes (CACHE_SHARED).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_authenticated:
+                pin_to_primary(user.pk)
+            return response
+
+        # The user is known once the view authenticated the request
+        reads = ReplicaReads(lambda: getattr(request, 'user', None))
+        with read_from_replicas(reads):
+            response = self.get_response(request)
+        if response.streaming:
+            response.streaming_content = _from_replicas(
+                response.streaming_content, reads
+            )
+        return response
+
+
+class PerformanceMiddleware:
+    """
+    Measure a share of PERFORMANCE_SAMPLE_RATE of the requests: number
+    and time of SQL queries on every connection, serializer time (see
+    core.performance.TimedSerializerMixin), render time and response
+    size, per view and action. Measured responses get a Server-Timing
+    header and a JSON line on the core.performance logger; the others
+    only pay for a random number.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.PERFORMANCE_SAMPLE_RATE:
+            return self.get_response(request)
+
+        metrics = request._performance_metrics = RequestMetrics()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(metrics))
+            stack.enter_context(measuring(metrics))
+            response = self.get_response(request)
+        metrics.duration = time.perf_counter() - start
+
+        if settings.PERFORMANCE_SERVER_TIMING:
+            response['Server-Timing'] = metrics.server_timing()
+        log_request(metrics, request, response)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = getattr(request, '_performance_metrics', None)
+        if metrics is not None:
+            metrics.view = _view_name(request, view_func)
+
+    def process_template_response(self, request, response):
+        metrics = getattr(request, '_performance_metrics', None)
+        if metrics is not None:
+            start = time.perf_counter()
+
+            def rendered(response):
+                metrics.render_time += time.perf_counter() - start
+            response.add_post_render_callback(rendered)
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Record the rate, latency, status codes, unhandled exceptions and
+    database query count of requests per route (URL name) and action
+    for the /metrics endpoint. Requests matching no route are labelled
+    `unmatched`.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = _QueryCounter()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(counter))
+            response = self.get_response(request)
+        route, action = getattr(request, '_metrics_route', ('unmatched', ''))
+        metrics.observe_request(
+            route, action, request.method, response.status_code,
+            time.perf_counter() - start, counter.queries
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        actions = getattr(view_func, 'actions', None) or {}
+        request._metrics_route = (
+            request.resolver_match.view_name,
+            actions.get(request.method.lower(), request.method.lower()),
+        )
+
+    def process_exception(self, request, exception):
+        metrics.observe_exception(*getattr(request, '_metrics_route', ('unmatched', '')))
+
+
+class _QueryCounter:
+
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+
+def _view_name(request, view_func):
+    """Name a view as <class>.<action>, or <class>.<method> for API views"""
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if view_class is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(request.method.lower(), request.method.lower())
+    return f'{view_class.__name__}.{action}'
+
+
+def _from_replicas(content, reads):
+    """Keep reading from the same replica while a streamed body is produced"""
+    with read_from_replicas(reads):
+        yield from content
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Index the recipe M2M join tables by target first, so that matching
+    recipes for a set of tag or ingredient ids is an index-only scan.
+    """
+
+    dependencies = [
+        ('core', '0006_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            ['CREATE INDEX core_recipe_tags_tag_recipe_idx '
+             'ON core_recipe_tags (tag_id, recipe_id)'],
+            reverse_sql=['DROP INDEX core_recipe_tags_tag_recipe_idx'],
+        ),
+        migrations.RunSQL(
+            ['CREATE INDEX core_recipe_ingredients_ingredient_recipe_idx '
+             'ON core_recipe_ingredients (ingredient_id, recipe_id)'],
+            reverse_sql=['DROP INDEX core_recipe_ingredients_ingredient_recipe_idx'],
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 2.1.15 on 2026-10-18 02:56
+
+import django.contrib.postgres.search
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery, TextField
+
+SEARCH_INDEX = 'core_recipe_search_vector_gin'
+
+
+def search_document(model):
+    """
+    The search vector of a recipe as core.search built it when this
+    migration was written, frozen so that later changes to the app code
+    do not change what the migration does.
+    """
+    document = SearchVector('title', weight='A', config='english')
+    for relation, weight in (('tags', 'B'), ('ingredients', 'C')):
+        field = model._meta.get_field(relation)
+        source = field.m2m_field_name()
+        target = field.m2m_reverse_field_name()
+        names = field.remote_field.through.objects.filter(
+            **{source: OuterRef('pk')}
+        ).values(source).annotate(
+            names=StringAgg(target + '__name', ' ')
+        ).values('names')
+        document += SearchVector(
+            Subquery(names, output_field=TextField()),
+            weight=weight,
+            config='english'
+        )
+    return document
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX {SEARCH_INDEX} ON core_recipe USING gin (search_vector)'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX {SEARCH_INDEX}')
+
+
+def populate_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Recipe = apps.get_model('core', 'Recipe')
+    Recipe.objects.using(schema_editor.connection.alias).update(
+        search_vector=search_document(Recipe)
+    )
+
+
+class Migration(migrations.Migration):
+    """
+    Store a search vector on recipes with a GIN index for full-text
+    search. The index and the vectors only exist on PostgreSQL.
+    """
+
+    dependencies = [
+        ('core', '0008_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
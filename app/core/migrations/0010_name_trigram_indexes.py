@@ -0,0 +1,46 @@
+from django.db import migrations
+
+TRIGRAM_INDEXES = (
+    ('core_tag', 'core_tag_name_trgm'),
+    ('core_ingredient', 'core_ingredient_name_trgm'),
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+        )
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table, index in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX {index} ON {table} USING gin (name gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, index in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index}')
+
+
+class Migration(migrations.Migration):
+    """
+    Index tag and ingredient names by trigram for autocompletion. The
+    indexes are only created on PostgreSQL servers that ship pg_trgm;
+    the typeahead falls back to substring matching without them.
+    """
+
+    dependencies = [
+        ('core', '0009_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 2.1.15 on 2026-10-18 03:08
+
+import core.models
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_image_jobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='imagederivative',
+            name='file',
+            field=models.ImageField(db_index=True, max_length=255, storage=core.storage.DeduplicatingStorage(), upload_to=core.models.image_derivative_file_path),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(db_index=True, null=True, storage=core.storage.ContentAddressedStorage(), upload_to=core.models.recipe_image_file_path),
+        ),
+    ]
@@ -1,18 +1,34 @@
-import uuid
 from pathlib import Path
+from functools import partial
 from django.db import models
 from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.contrib.auth.hashers import check_password
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 
+from core.hashers import schedule_rehash
+from core.storage import ContentAddressedStorage, DeduplicatingStorage
+
 
 def recipe_image_file_path(instance, filename):
-    """Generate file path for new recipe image"""
-    ext = filename.split('.')[-1]
-    filename = f'{uuid.uuid4()}.{ext}'
+    """
+    Generate file path for new recipe image. The storage then names the
+    file after the SHA-256 of its content.
+    """
+    ext = filename.split('.')[-1].lower()
+    filename = f'image.{ext}'
 
     return Path('uploads/recipe') / filename
 
 
+def image_derivative_file_path(instance, filename):
+    """Store a derivative next to the image it was generated from"""
+    source = Path(instance.source)
+    ext = filename.split('.')[-1]
+
+    return source.parent / f'{source.stem}_{instance.name}.{ext}'
+
+
 class UserManager(BaseUserManager):
 
     def create_user(self, email, password=None, **extra_fields):
@@ -43,10 +59,26 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     USERNAME_FIELD = "email"
 
+    def check_password(self, raw_password):
+        """
+        Check raw_password against the stored hash. Hashes made with
+        another hasher or other costs are upgraded by core.hashers.
+        """
+        return check_password(
+            raw_password, self.password, partial(schedule_rehash, self)
+        )
+
 
 class Tag(models.Model):
     name = models.CharField(max_length=255)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-name', 'id']),
+            models.Index(fields=['user', 'updated_at']),
+        ]
 
     def __str__(self):
         return self.name
@@ -55,6 +87,13 @@ class Tag(models.Model):
 class Ingredient(models.Model):
     name = models.CharField(max_length=255)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-name', 'id']),
+            models.Index(fields=['user', 'updated_at']),
+        ]
 
     def __str__(self):
         return self.name
@@ -68,7 +107,85 @@ class Recipe(models.Model):
     link = models.CharField(max_length=255, blank=True)
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
-    image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    image = models.ImageField(
+        null=True,
+        upload_to=recipe_image_file_path,
+        storage=ContentAddressedStorage(),
+        db_index=True
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by core.search.update_search_vectors, PostgreSQL only
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id']),
+            models.Index(fields=['user', 'updated_at']),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class ImageJob(models.Model):
+    """Pending work on a recipe image, processed by process_image_jobs"""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    recipe = models.ForeignKey(
+        'Recipe',
+        on_delete=models.CASCADE,
+        related_name='image_jobs'
+    )
+    source = models.CharField(max_length=255)
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id']),
+        ]
+
+    def __str__(self):
+        return f'{self.source} ({self.status})'
+
+
+class ImageDerivative(models.Model):
+    """A resized copy of a recipe image"""
+    recipe = models.ForeignKey(
+        'Recipe',
+        on_delete=models.CASCADE,
+        related_name='image_derivatives'
+    )
+    source = models.CharField(max_length=255)
+    name = models.CharField(max_length=20)
+    format = models.CharField(max_length=10)
+    file = models.ImageField(
+        upload_to=image_derivative_file_path,
+        storage=DeduplicatingStorage(),
+        max_length=255,
+        db_index=True
+    )
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('recipe', 'name', 'format')
+
+    def __str__(self):
+        return self.file.name
@@ -0,0 +1,102 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from rest_framework.fields import empty
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """
+    Measurements of one sampled request, durations in seconds. Installed
+    as execute wrapper on the database connections, it counts queries
+    and their time.
+    """
+
+    def __init__(self):
+        self.view = None
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.render_time = 0.0
+        self.duration = 0.0
+        self.serializing = False
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - start
+
+    def server_timing(self):
+        """Return the value of a Server-Timing header, in milliseconds"""
+        return (
+            f'db;dur={self.sql_time * 1000:.1f};desc="{self.queries} queries", '
+            f'serialize;dur={self.serializer_time * 1000:.1f}, '
+            f'render;dur={self.render_time * 1000:.1f}, '
+            f'total;dur={self.duration * 1000:.1f}'
+        )
+
+
+@contextmanager
+def measuring(metrics):
+    """Add the serializer time of the block to metrics"""
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+def log_request(metrics, request, response):
+    """Log a measured request as one JSON line"""
+    logger.info(json.dumps({
+        'view': metrics.view,
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'duration_ms': round(metrics.duration * 1000, 2),
+        'db_queries': metrics.queries,
+        'db_ms': round(metrics.sql_time * 1000, 2),
+        'serialize_ms': round(metrics.serializer_time * 1000, 2),
+        'render_ms': round(metrics.render_time * 1000, 2),
+        'response_bytes': None if response.streaming else len(response.content),
+    }))
+
+
+def timed_serialization(method):
+    """Add the time spent in a representation method to sampled requests"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        metrics = _current.get()
+        # Nested serializers are part of the outer serializer's time
+        if metrics is None or metrics.serializing:
+            return method(self, *args, **kwargs)
+        metrics.serializing = True
+        start = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            metrics.serializing = False
+            metrics.serializer_time += time.perf_counter() - start
+    return wrapper
+
+
+class TimedSerializerMixin:
+    """Count the time a serializer spends in sampled requests"""
+
+    @timed_serialization
+    def to_representation(self, instance):
+        return super().to_representation(instance)
+
+    @timed_serialization
+    def run_validation(self, data=empty):
+        return super().run_validation(data)
@@ -0,0 +1,49 @@
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed, producing
+    the same bytes as the standard library for compact, non-ASCII-escaped
+    output. Types orjson does not encode itself (dates and times,
+    decimals, lazy strings...) are converted by DRF's encoder, and data
+    orjson rejects, such as non-string keys or huge integers, is rendered
+    by JSONRenderer, as are indented responses.
+
+    orjson writes floats in its own notation (`1e16` for Python's
+    `1e+16`) and NaN as null, so the renderer is meant for payloads
+    without floats.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=_default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same escapes as JSONRenderer, keeping JSON a JavaScript subset
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+_encoder = JSONEncoder()
+
+
+def _default(obj):
+    return _encoder.default(obj)
@@ -0,0 +1,111 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+PIN_KEY = 'db-primary-pin:{user_id}'
+
+_replica_reads = ContextVar('replica_reads', default=None)
+
+
+class ReplicaReads:
+    """
+    Where the reads of one request go: a replica picked at random at the
+    first read, then kept, so every query of the request sees the same
+    data; or the primary when the user wrote in the last
+    DB_PRIMARY_PIN_SECONDS. get_user is called at that first read, once
+    the request is authenticated.
+    """
+
+    def __init__(self, get_user=None):
+        self.get_user = get_user
+        self.alias = None
+
+    def db_for_read(self):
+        if self.alias is None:
+            user = self.get_user() if self.get_user is not None else None
+            if user is not None and user.is_authenticated and is_pinned(user.pk):
+                self.alias = 'default'
+            else:
+                self.alias = random.choice(settings.DATABASE_REPLICAS)
+        return self.alias
+
+    @property
+    def from_replica(self):
+        """Whether a read of the block went to a replica"""
+        return self.alias not in (None, 'default')
+
+
+@contextmanager
+def read_from_replicas(reads=None):
+    """
+    Send the reads of the block to a replica, if there are any, and
+    yield the ReplicaReads telling which one. Reads stay on the primary
+    unless CACHE_SHARED: pins set by the other processes are not seen.
+    """
+    if reads is None:
+        reads = ReplicaReads()
+    enabled = bool(settings.DATABASE_REPLICAS) and settings.CACHE_SHARED
+    token = _replica_reads.set(reads if enabled else None)
+    try:
+        yield reads
+    finally:
+        _replica_reads.reset(token)
+
+
+def read_stale_replica(user_id):
+    """
+    Whether the current block read from a replica while the user is
+    pinned to the primary: the replica may lack their last write, so
+    what was read must not be cached under their new data version.
+    """
+    reads = _replica_reads.get()
+    return reads is not None and reads.from_replica and is_pinned(user_id)
+
+
+def pin_to_primary(user_id):
+    """
+    Send the reads of a user to the primary for DB_PRIMARY_PIN_SECONDS,
+    so they see their own writes despite replication lag. Pins live in
+    the default cache, shared by all server processes (CACHE_SHARED).
+    """
+    if settings.DATABASE_REPLICAS:
+        cache.set(
+            PIN_KEY.format(user_id=user_id), True, settings.DB_PRIMARY_PIN_SECONDS
+        )
+
+
+def is_pinned(user_id):
+    """Whether the reads of a user go to the primary"""
+    return bool(cache.get(PIN_KEY.format(user_id=user_id)))
+
+
+class ReplicaRouter:
+    """
+    Route reads inside read_from_replicas() blocks to the replica the
+    block picked, everything else to the primary.
+
+    Users, tokens and sessions are always read from the primary: a
+    token or password change must apply at once, and a client that just
+    logged in has no write of its own to be pinned by.
+    """
+    primary_models = {'core.user', 'authtoken.token', 'sessions.session'}
+
+    def db_for_read(self, model, **hints):
+        reads = _replica_reads.get()
+        if reads is not None and model._meta.label_lower not in self.primary_models:
+            return reads.db_for_read()
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication
+        return db not in settings.DATABASE_REPLICAS
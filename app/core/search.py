@@ -0,0 +1,48 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import connections, router
+from django.db.models import OuterRef, Subquery, TextField
+
+SEARCH_CONFIG = 'english'
+# Recipe relations whose names are searchable, with their rank weights
+SEARCH_RELATIONS = (('tags', 'B'), ('ingredients', 'C'))
+
+
+def search_document(model):
+    """
+    Build the weighted search vector of a recipe: its title, then the
+    names of its tags and ingredients.
+    """
+    document = SearchVector('title', weight='A', config=SEARCH_CONFIG)
+    for relation, weight in SEARCH_RELATIONS:
+        document += SearchVector(
+            _related_names(model, relation),
+            weight=weight,
+            config=SEARCH_CONFIG
+        )
+    return document
+
+
+def update_search_vectors(queryset, **fields):
+    """
+    Recompute the stored search vector of the recipes in queryset with a
+    single UPDATE, which also sets any other given fields. Search vectors
+    are only stored on PostgreSQL.
+    """
+    using = router.db_for_write(queryset.model)
+    if connections[using].vendor == 'postgresql':
+        fields['search_vector'] = search_document(queryset.model)
+    if fields:
+        queryset.using(using).update(**fields)
+
+
+def _related_names(model, relation):
+    field = model._meta.get_field(relation)
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+    names = field.remote_field.through.objects.filter(
+        **{source: OuterRef('pk')}
+    ).values(source).annotate(
+        names=StringAgg(target + '__name', ' ')
+    ).values('names')
+    return Subquery(names, output_field=TextField())
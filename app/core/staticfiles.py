@@ -0,0 +1,44 @@
+import gzip
+from io import BytesIO
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Static files under content hashed names, so they can be cached
+    forever, each text asset stored next to a gzip compressed copy that
+    the front proxy sends as is (nginx `gzip_static`).
+    """
+    compressible_extensions = (
+        '.css', '.js', '.json', '.map', '.svg', '.txt', '.xml', '.html',
+    )
+    # Smaller files do not gain enough to be worth compressing
+    min_compress_size = 256
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed_names = {}
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed_names[name] = hashed_name
+            yield name, hashed_name, processed
+
+        if not dry_run:
+            for name in hashed_names.values():
+                if name.endswith(self.compressible_extensions):
+                    self._compress(name)
+
+    def _compress(self, name):
+        with self.open(name) as original:
+            content = original.read()
+        if len(content) < self.min_compress_size:
+            return
+
+        compressed = BytesIO()
+        with gzip.GzipFile(fileobj=compressed, mode='wb', compresslevel=9, mtime=0) as gz:
+            gz.write(content)
+        if compressed.tell() >= len(content) * 0.95:
+            return
+        with open(self.path(name + '.gz'), 'wb') as target:
+            target.write(compressed.getvalue())
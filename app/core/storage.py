@@ -0,0 +1,83 @@
+import os
+import hashlib
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.crypto import get_random_string
+
+
+class DeduplicatingStorage(FileSystemStorage):
+    """
+    File system storage for files whose name is derived from their
+    content: saving a name that already exists reuses the stored file
+    instead of writing a copy under a new name.
+
+    Stored files may be shared by many rows, so they are never deleted
+    along with a row; the gc_images command removes the ones no longer
+    referenced. Reusing a file refreshes its modification time, which
+    keeps it clear of the collection grace period.
+    """
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        if self.reuse(name):
+            return name
+        return super().save(name, content, max_length)
+
+    def reuse(self, name):
+        """Refresh the file stored under name and tell whether it exists"""
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def content_name(self, name, content):
+        """Return the name content is stored under"""
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        """
+        Keep the name: it follows the content, so a file stored under it
+        meanwhile holds the same bytes. A name too long for the field is
+        rejected rather than truncated.
+        """
+        if max_length is not None and len(name) > max_length:
+            raise SuspiciousFileOperation(
+                f'Storage name "{name}" is longer than {max_length} characters.'
+            )
+        return name
+
+    def _save(self, name, content):
+        # Write under a temporary name and rename, so a crash can never
+        # leave a partial file behind under a name that would be reused
+        partial = super()._save(f'{name}.{get_random_string(8)}.partial', content)
+        if self.reuse(name):
+            # Stored by a concurrent save of the same content
+            self.delete(partial)
+        else:
+            os.replace(self.path(partial), self.path(name))
+        return name
+
+
+class ContentAddressedStorage(DeduplicatingStorage):
+    """
+    Store files as `<dir>/ab/cd/<sha256>.<ext>` after the SHA-256 of
+    their content, keeping the directory and extension of the name.
+    """
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
+        digest = digest.hexdigest()
+
+        directory, filename = os.path.split(name)
+        ext = os.path.splitext(filename)[1].lower()
+        return os.path.join(directory, digest[:2], digest[2:4], digest + ext)
@@ -0,0 +1,75 @@
+"""
+Query budgets for API tests.
+
+`max_queries` fails a block or test that runs more queries than its
+budget, and `QueryBudgetMixin.assertConstantQueries` fails when an
+endpoint's query count grows with the number of objects it returns,
+which is how N+1 queries show up.
+"""
+from contextlib import ContextDecorator
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+class max_queries(ContextDecorator):
+    """
+    Fail when the block, or decorated function, runs more than `budget`
+    queries on the database `using`.
+    """
+
+    def __init__(self, budget, using=DEFAULT_DB_ALIAS):
+        self.budget = budget
+        self.using = using
+
+    def __enter__(self):
+        self.captured = CaptureQueriesContext(connections[self.using])
+        return self.captured.__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.captured.__exit__(exc_type, exc_value, traceback)
+        if exc_type is None and len(self.captured) > self.budget:
+            raise AssertionError(
+                f"{len(self.captured)} queries executed, the budget is "
+                f"{self.budget}\n{_listing(self.captured)}"
+            )
+
+
+class QueryBudgetMixin:
+    """Query count assertions for TestCase subclasses"""
+
+    def assertMaxQueries(self, budget, using=DEFAULT_DB_ALIAS):
+        return max_queries(budget, using)
+
+    def assertConstantQueries(self, populate, request, budget=None, size=1,
+                              factor=10, using=DEFAULT_DB_ALIAS):
+        """
+        Assert that request() runs as many queries once populate(count)
+        has created `size` objects as once it has created `size * factor`,
+        and no more than `budget` if given; return both responses.
+        """
+        populate(size)
+        with CaptureQueriesContext(connections[using]) as small:
+            small_response = request()
+        populate(size * factor - size)
+        with CaptureQueriesContext(connections[using]) as large:
+            large_response = request()
+
+        if len(small) != len(large):
+            self.fail(
+                f"{len(small)} queries with {size} objects but {len(large)} "
+                f"with {size * factor}\n{_listing(large)}"
+            )
+        if budget is not None and len(large) > budget:
+            self.fail(
+                f"{len(large)} queries executed, the budget is {budget}\n"
+                f"{_listing(large)}"
+            )
+        return small_response, large_response
+
+
+def _listing(captured):
+    return '\n'.join(
+        f"{number}. {query['sql']}"
+        for number, query in enumerate(captured.captured_queries, start=1)
+    )
@@ -1,9 +1,17 @@
+import os
+import json
+import tempfile
+from io import StringIO
 from unittest.mock import patch
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.db.utils import OperationalError
 from django.test import TestCase
 
+from core.models import Tag, Ingredient, Recipe
+
 
 class CommandTest(TestCase):
 
@@ -25,3 +33,126 @@ class CommandTest(TestCase):
             gi.side_effect = [OperationalError] * 5 + [True]
             call_command("wait_for_db")
             self.assertEqual(gi.call_count, 6)
+
+
+class ImportRecipesCommandTest(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass"
+        )
+
+    def _write(self, content, suffix):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, "w", encoding="utf-8") as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def _import(self, path, **options):
+        options.setdefault("user", self.user.email)
+        call_command(
+            "import_recipes", path,
+            stdout=StringIO(), stderr=StringIO(),
+            **options
+        )
+
+    def test_import_jsonl(self):
+        """
+        Test importing recipes from JSONL deduplicates tags and ingredients
+        """
+        Tag.objects.create(user=self.user, name="Vegan")
+        rows = [
+            {"title": "Soup", "time_minutes": 20, "price": "4.50",
+             "tags": ["Vegan", "Dinner"], "ingredients": ["Carrot", "Salt"]},
+            {"title": "Salad", "time_minutes": 5, "price": 3,
+             "tags": ["Vegan"], "ingredients": ["Carrot"]},
+        ]
+        path = self._write("".join(json.dumps(row) + "\n" for row in rows), ".jsonl")
+
+        self._import(path, batch_size=1)
+
+        recipes = Recipe.objects.filter(user=self.user).order_by("id")
+        self.assertEqual([recipe.title for recipe in recipes], ["Soup", "Salad"])
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 2)
+        soup, salad = recipes
+        self.assertEqual(
+            sorted(soup.tags.values_list("name", flat=True)),
+            ["Dinner", "Vegan"]
+        )
+        self.assertEqual(str(salad.price), "3.00")
+        self.assertEqual(
+            list(salad.ingredients.values_list("name", flat=True)),
+            ["Carrot"]
+        )
+
+    def test_import_csv(self):
+        """
+        Test importing recipes from the CSV export format
+        """
+        path = self._write(
+            "id,title,time_minutes,price,link,tags,ingredients\n"
+            "7,Pie,60,12.00,,Dessert,Apple;Flour\n",
+            ".csv"
+        )
+
+        self._import(path)
+
+        recipe = Recipe.objects.get(user=self.user)
+        self.assertEqual(recipe.title, "Pie")
+        self.assertEqual(
+            sorted(recipe.ingredients.values_list("name", flat=True)),
+            ["Apple", "Flour"]
+        )
+
+    def test_import_skips_invalid_rows(self):
+        """
+        Test invalid rows are skipped and the valid ones imported
+        """
+        path = self._write(
+            '{"title": "Soup", "time_minutes": 20, "price": "4.50"}\n'
+            '{"title": "No time", "price": "1.00"}\n'
+            'not json\n'
+            '{"title": "Stranger", "time_minutes": 1, "price": "1.00",'
+            ' "user": "other@test.com"}\n',
+            ".jsonl"
+        )
+
+        self._import(path)
+
+        self.assertEqual(
+            list(Recipe.objects.values_list("title", flat=True)),
+            ["Soup"]
+        )
+
+    def test_import_continues_after_skipped_batch(self):
+        """
+        Test rows after a batch of only invalid rows are imported
+        """
+        path = self._write(
+            '{"title": "A", "time_minutes": 1, "price": "1.00", "user": "x@test.com"}\n'
+            '{"title": "B", "time_minutes": 1, "price": "1.00", "user": "x@test.com"}\n'
+            '{"title": "Soup", "time_minutes": 20, "price": "4.50"}\n'
+            '{"title": "Salad", "time_minutes": 5, "price": "3.00"}\n'
+            '{"title": "Pie", "time_minutes": 60, "price": "12.00"}\n',
+            ".jsonl"
+        )
+
+        self._import(path, batch_size=2)
+
+        self.assertEqual(
+            sorted(Recipe.objects.values_list("title", flat=True)),
+            ["Pie", "Salad", "Soup"]
+        )
+
+    def test_import_strict_aborts(self):
+        """
+        Test an invalid row aborts the import in strict mode
+        """
+        path = self._write('{"title": "No time", "price": "1.00"}\n', ".jsonl")
+
+        with self.assertRaises(CommandError):
+            self._import(path, strict=True)
+        self.assertFalse(Recipe.objects.exists())
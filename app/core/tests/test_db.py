@@ -0,0 +1,53 @@
+from unittest.mock import Mock, patch
+
+from django.core.signals import request_started
+from django.test import SimpleTestCase
+
+from core.db import close_unusable_connections
+
+
+def fake_connection(usable=True, connected=True, in_atomic_block=False,
+                    health_checks=True):
+    return Mock(
+        connection=object() if connected else None,
+        in_atomic_block=in_atomic_block,
+        settings_dict={'CONN_HEALTH_CHECKS': health_checks},
+        is_usable=Mock(return_value=usable),
+    )
+
+
+class ConnectionHealthCheckTests(SimpleTestCase):
+
+    def check(self, *conns):
+        with patch('core.db.connections') as connections:
+            connections.all.return_value = conns
+            close_unusable_connections()
+
+    def test_broken_connection_closed(self):
+        """Test a reused connection that stopped working is closed"""
+        broken, working = fake_connection(usable=False), fake_connection()
+        self.check(broken, working)
+
+        broken.close.assert_called_once_with()
+        working.close.assert_not_called()
+
+    def test_connections_not_checked(self):
+        """Test new, disabled and in transaction connections are left alone"""
+        conns = (
+            fake_connection(usable=False, connected=False),
+            fake_connection(usable=False, health_checks=False),
+            fake_connection(usable=False, in_atomic_block=True),
+        )
+        self.check(*conns)
+
+        for conn in conns:
+            conn.is_usable.assert_not_called()
+            conn.close.assert_not_called()
+
+    def test_checked_on_request_started(self):
+        """Test the check runs at the start of every request"""
+        with patch('core.db.connections') as connections:
+            connections.all.return_value = ()
+            request_started.send(sender=self.__class__)
+
+        connections.all.assert_called_once_with()
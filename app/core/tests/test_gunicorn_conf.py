@@ -0,0 +1,67 @@
+import importlib
+from unittest.mock import patch
+
+from django.db import connections
+from django.test import SimpleTestCase
+from gunicorn.config import KNOWN_SETTINGS
+
+from app import gunicorn_conf
+
+
+def load_config(**environ):
+    with patch.dict('os.environ', environ), \
+            patch('os.sched_getaffinity', return_value=set(range(4))):
+        return importlib.reload(gunicorn_conf)
+
+
+class GunicornConfigTests(SimpleTestCase):
+
+    def tearDown(self):
+        importlib.reload(gunicorn_conf)
+
+    def test_settings_known_to_gunicorn(self):
+        """Test every setting of the module is a gunicorn setting"""
+        known = {setting.name for setting in KNOWN_SETTINGS}
+        names = {
+            name for name, value in vars(load_config()).items()
+            if not name.startswith('_') and not callable(value)
+            and not isinstance(value, type(gunicorn_conf))
+        }
+
+        self.assertEqual(names - known, set())
+        self.assertIn('pre_fork', known)
+
+    def test_cpu_derived_defaults(self):
+        """Test worker and thread counts follow the available CPUs"""
+        config = load_config()
+
+        self.assertEqual(config.workers, 5)
+        self.assertEqual(config.threads, 4)
+        self.assertEqual(config.worker_class, 'gthread')
+        self.assertTrue(config.preload_app)
+        self.assertEqual(config.max_requests, 1000)
+        self.assertEqual(config.max_requests_jitter, 100)
+        self.assertEqual(config.default_threads(16), 2)
+
+    def test_environment_overrides(self):
+        """Test settings are read from the environment"""
+        config = load_config(
+            GUNICORN_WORKERS='3',
+            GUNICORN_THREADS='1',
+            GUNICORN_PRELOAD='false',
+            GUNICORN_MAX_REQUESTS='200',
+            GUNICORN_ACCESSLOG='',
+        )
+
+        self.assertEqual(config.workers, 3)
+        self.assertEqual(config.worker_class, 'sync')
+        self.assertFalse(config.preload_app)
+        self.assertEqual(config.max_requests_jitter, 20)
+        self.assertIsNone(config.accesslog)
+
+    def test_pre_fork_closes_connections(self):
+        """Test workers do not inherit the master's database connections"""
+        with patch.object(connections, 'close_all') as close_all:
+            gunicorn_conf.pre_fork(None, None)
+
+        close_all.assert_called_once_with()
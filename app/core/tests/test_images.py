@@ -0,0 +1,194 @@
+import os
+import time
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from PIL import Image
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase
+
+from core import images
+from core.models import Recipe, ImageJob, ImageDerivative
+
+# EXIF block holding only Orientation = 6 (rotate 90 degrees clockwise)
+EXIF_ROTATED = (
+    b'Exif\x00\x00MM\x00*\x00\x00\x00\x08\x00\x01'
+    b'\x01\x12\x00\x03\x00\x00\x00\x01\x00\x06\x00\x00'
+    b'\x00\x00\x00\x00'
+)
+
+
+def sample_jpeg(size=(400, 300), **params):
+    content = BytesIO()
+    Image.new('RGB', size, (200, 30, 30)).save(content, 'JPEG', **params)
+    return ContentFile(content.getvalue())
+
+
+class ImagePipelineTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = self.settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        user = get_user_model().objects.create_user(
+            'test@test.com',
+            'testpass'
+        )
+        self.recipe = Recipe.objects.create(
+            user=user,
+            title='Soup',
+            time_minutes=10,
+            price=5.00
+        )
+
+    def _upload(self, content):
+        self.recipe.image.save('photo.jpg', content)
+        return images.enqueue_image_job(self.recipe)
+
+    def test_generate_derivatives(self):
+        """Test derivatives are resized, upright and without EXIF"""
+        self._upload(sample_jpeg(exif=EXIF_ROTATED))
+
+        images.generate_derivatives(self.recipe)
+
+        derivatives = ImageDerivative.objects.filter(recipe=self.recipe)
+        formats = images.derivative_formats()
+        self.assertEqual(
+            derivatives.count(),
+            len(images.DERIVATIVE_SIZES) * len(formats)
+        )
+        thumbnail = derivatives.get(name='thumbnail', format='jpeg')
+        self.assertEqual((thumbnail.width, thumbnail.height), (150, 200))
+        self.assertTrue(thumbnail.file.name.startswith('uploads/recipe/'))
+        for derivative in derivatives:
+            with Image.open(derivative.file.path) as image:
+                self.assertEqual(image.size, (derivative.width, derivative.height))
+                self.assertNotIn('exif', image.info)
+
+    def test_generate_derivatives_replaces_previous(self):
+        """Test a new image replaces the derivatives of the recipe"""
+        self._upload(sample_jpeg())
+        images.generate_derivatives(self.recipe)
+        old = list(ImageDerivative.objects.filter(recipe=self.recipe))
+
+        self._upload(sample_jpeg(size=(100, 100)))
+        images.generate_derivatives(self.recipe)
+
+        derivatives = ImageDerivative.objects.filter(recipe=self.recipe)
+        self.assertEqual(len(derivatives), len(old))
+        for derivative in derivatives:
+            self.assertEqual(derivative.source, self.recipe.image.name)
+        self.assertEqual(images.referenced_files(d.file.name for d in old), set())
+
+    def test_generate_derivatives_reuses_shared_files(self):
+        """Test recipes with the same image share derivative files"""
+        self._upload(sample_jpeg())
+        images.generate_derivatives(self.recipe)
+        other = Recipe.objects.create(
+            user=self.recipe.user,
+            title='Stew',
+            time_minutes=10,
+            price=5.00
+        )
+        other.image.save('copy.jpg', sample_jpeg())
+        self.assertEqual(other.image.name, self.recipe.image.name)
+
+        with patch.object(images, '_open_normalized') as open_normalized:
+            images.generate_derivatives(other)
+
+        open_normalized.assert_not_called()
+        self.assertEqual(
+            sorted(other.image_derivatives.values_list('file', 'width')),
+            sorted(self.recipe.image_derivatives.values_list('file', 'width'))
+        )
+
+    def test_worker_processes_queued_jobs(self):
+        """Test the worker command completes queued jobs"""
+        job = self._upload(sample_jpeg())
+
+        call_command('process_image_jobs', once=True, stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImageJob.DONE)
+        self.assertEqual(job.attempts, 1)
+        self.assertTrue(self.recipe.image_derivatives.exists())
+
+    def test_job_for_replaced_image_is_skipped(self):
+        """Test a job whose image was replaced creates no derivatives"""
+        job = self._upload(sample_jpeg())
+        self.recipe.image.save('other.jpg', sample_jpeg(size=(50, 50)))
+
+        call_command('process_image_jobs', once=True, stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImageJob.DONE)
+        self.assertFalse(self.recipe.image_derivatives.exists())
+
+    def test_failing_job_is_retried(self):
+        """Test failing jobs are queued again until out of attempts"""
+        job = self._upload(ContentFile(b'not an image'))
+
+        call_command(
+            'process_image_jobs', once=True, max_attempts=2,
+            stdout=StringIO(), stderr=StringIO()
+        )
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImageJob.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIn('OSError', job.error)
+
+
+class GarbageCollectImagesTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings = self.settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.recipe = Recipe.objects.create(
+            user=get_user_model().objects.create_user('test@test.com', 'pass'),
+            title='Soup',
+            time_minutes=10,
+            price=5.00
+        )
+        self.storage = Recipe._meta.get_field('image').storage
+
+    def _store(self, content, age):
+        name = self.storage.save('uploads/recipe/image.jpg', ContentFile(content))
+        mtime = time.time() - age
+        os.utime(self.storage.path(name), (mtime, mtime))
+        return name
+
+    def test_gc_images(self):
+        """Test only old unreferenced files are deleted"""
+        day = 24 * 60 * 60
+        referenced = self._store(b'referenced', age=2 * day)
+        Recipe.objects.filter(pk=self.recipe.pk).update(image=referenced)
+        orphan = self._store(b'orphan', age=2 * day)
+        recent = self._store(b'recent', age=60)
+
+        call_command('gc_images', batch_size=2, stdout=StringIO())
+
+        self.assertTrue(self.storage.exists(referenced))
+        self.assertFalse(self.storage.exists(orphan))
+        self.assertTrue(self.storage.exists(recent))
+
+    def test_gc_images_dry_run(self):
+        """Test a dry run deletes nothing"""
+        orphan = self._store(b'orphan', age=2 * 24 * 60 * 60)
+
+        out = StringIO()
+        call_command('gc_images', dry_run=True, stdout=out)
+
+        self.assertTrue(self.storage.exists(orphan))
+        self.assertIn('Would delete 1 of 1 files', out.getvalue())
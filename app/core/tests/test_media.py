@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.http import Http404
+from django.test import TestCase, RequestFactory, override_settings
+
+from core.views import serve_media
+
+
+@override_settings(MEDIA_ROOT='/vol/web/media', MEDIA_ACCEL_PREFIX='/protected-media/')
+class ServeMediaTests(TestCase):
+
+    def setUp(self):
+        self.request = RequestFactory().get('/media/uploads/recipe/a.jpg')
+
+    @override_settings(MEDIA_SERVE_MODE='accel')
+    def test_accel_redirect(self):
+        """Test only headers are sent for nginx to serve the file"""
+        res = serve_media(self.request, 'uploads/recipe/ab/cd/a b.jpg')
+
+        self.assertEqual(res['X-Accel-Redirect'], '/protected-media/uploads/recipe/ab/cd/a%20b.jpg')
+        self.assertEqual(res['Content-Type'], 'image/jpeg')
+        self.assertEqual(res.content, b'')
+        self.assertIn('immutable', res['Cache-Control'])
+        self.assertIn('max-age=31536000', res['Cache-Control'])
+
+    @override_settings(MEDIA_SERVE_MODE='sendfile')
+    def test_sendfile(self):
+        """Test the file path is sent in X-Sendfile"""
+        res = serve_media(self.request, 'uploads/recipe/a.webp')
+
+        self.assertEqual(res['X-Sendfile'], '/vol/web/media/uploads/recipe/a.webp')
+        self.assertEqual(res['Content-Type'], 'image/webp')
+
+    @override_settings(MEDIA_SERVE_MODE='accel')
+    def test_outside_media_root_not_found(self):
+        """Test paths leaving MEDIA_ROOT and temporary uploads are not served"""
+        for path in ('../../etc/passwd', '/etc/passwd', 'tmp/upload.jpg',
+                     './tmp/upload.jpg', 'uploads/../tmp/upload.jpg', 'tmp'):
+            with self.assertRaises(Http404):
+                serve_media(self.request, path)
+
+
+class CompressedStaticFilesTests(TestCase):
+
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.static_root)
+
+    def test_collectstatic_compresses_hashed_files(self):
+        """Test collectstatic writes gzip copies of hashed text assets"""
+        with override_settings(
+                STATIC_ROOT=self.static_root,
+                STATICFILES_STORAGE='core.staticfiles.CompressedManifestStaticFilesStorage'):
+            call_command('collectstatic', interactive=False, verbosity=0)
+
+        css_dir = os.path.join(self.static_root, 'admin', 'css')
+        names = os.listdir(css_dir)
+        compressed = [name for name in names if name.startswith('base.') and name.endswith('.css.gz')]
+        self.assertEqual(len(compressed), 1)
+        self.assertIn(compressed[0][:-len('.gz')], names)
+        self.assertNotIn('base.css.gz', names)
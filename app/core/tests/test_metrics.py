@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from prometheus_client import REGISTRY
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+RECIPES_URL = reverse('recipe:recipe-list')
+METRICS_URL = reverse('metrics')
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user('test@mail.com', 'testpass')
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user).key}'
+        )
+        self.route = {'route': 'recipe:recipe-list', 'action': 'list'}
+
+    def test_requests_recorded_per_route(self):
+        """Test requests are counted and timed by route and action"""
+        requests = sample('api_requests_total', method='GET', status='200', **self.route)
+        latencies = sample('api_request_duration_seconds_count', **self.route)
+        queries = sample('api_request_db_queries_sum', **self.route)
+
+        self.client.get(RECIPES_URL)
+        self.client.get(RECIPES_URL)
+
+        self.assertEqual(
+            sample('api_requests_total', method='GET', status='200', **self.route),
+            requests + 2
+        )
+        self.assertEqual(sample('api_request_duration_seconds_count', **self.route), latencies + 2)
+        self.assertGreater(sample('api_request_db_queries_sum', **self.route), queries)
+
+    def test_cache_hits_and_misses(self):
+        """Test list and token cache lookups are counted"""
+        before = {
+            (name, result): sample('api_cache_requests_total', cache=name, result=result)
+            for name in ('api_list', 'auth_token') for result in ('hit', 'miss')
+        }
+
+        self.client.get(RECIPES_URL)
+        self.client.get(RECIPES_URL)
+
+        for name in ('api_list', 'auth_token'):
+            for result in ('hit', 'miss'):
+                self.assertEqual(
+                    sample('api_cache_requests_total', cache=name, result=result),
+                    before[name, result] + 1
+                )
+
+    def test_metrics_endpoint(self):
+        """Test the metrics are exposed in the Prometheus text format"""
+        self.client.get(RECIPES_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        self.assertIn(
+            b'api_request_duration_seconds_bucket{action="list",le="0.005",'
+            b'route="recipe:recipe-list"}',
+            res.content
+        )
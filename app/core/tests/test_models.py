@@ -1,5 +1,7 @@
-from pathlib import Path
-from unittest.mock import patch
+import os
+import hashlib
+import tempfile
+from django.core.files.base import ContentFile
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -95,11 +97,26 @@ class TestModels(TestCase):
 
         self.assertEqual(str(recipe), recipe.title)
 
-    @patch("uuid.uuid4")
-    def test_recipe_file_name_uuid(self, uuid_mock):
-        """Test that image is saved in correct location"""
-        uuid = 'test_uuid'
-        uuid_mock.return_value = uuid
-        file_path = models.recipe_image_file_path(None, 'myimage.jpg')
-        exp_path = Path(f'uploads/recipe/{uuid}.jpg')
-        self.assertEqual(file_path, exp_path)
+    def test_recipe_file_name_content_hash(self):
+        """Test that images are stored once under their content hash"""
+        content = b'image content'
+        digest = hashlib.sha256(content).hexdigest()
+        recipes = [
+            models.Recipe.objects.create(
+                user=sample_user(f"user{i}@email.com"),
+                title="Chicken steak",
+                time_minutes=5,
+                price=5.00
+            )
+            for i in range(2)
+        ]
+        with tempfile.TemporaryDirectory() as media_root:
+            with self.settings(MEDIA_ROOT=media_root):
+                for recipe in recipes:
+                    recipe.image.save('MyImage.JPG', ContentFile(content))
+
+                exp_path = f'uploads/recipe/{digest[:2]}/{digest[2:4]}/{digest}.jpg'
+                self.assertEqual(recipes[0].image.name, exp_path)
+                self.assertEqual(recipes[1].image.name, exp_path)
+                directory = os.path.dirname(recipes[0].image.path)
+                self.assertEqual(os.listdir(directory), [f'{digest}.jpg'])
@@ -0,0 +1,59 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+@override_settings(
+    MIDDLEWARE=['core.middleware.PerformanceMiddleware'] + settings.MIDDLEWARE,
+    PERFORMANCE_SAMPLE_RATE=1.0,
+)
+class PerformanceMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user('test@mail.com', 'testpass')
+        recipe = Recipe.objects.create(user=self.user, title='Soup', time_minutes=5, price=1)
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_measured_request(self):
+        """Test a sampled request is timed and logged per view and action"""
+        with self.assertLogs('core.performance') as logs:
+            res = self.client.get(RECIPES_URL)
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['view'], 'RecipeViewSet.list')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['db_queries'], 0)
+        self.assertGreater(record['serialize_ms'], 0)
+        self.assertGreater(record['render_ms'], 0)
+        self.assertEqual(record['response_bytes'], len(res.content))
+        self.assertIn(f'desc="{record["db_queries"]} queries"', res['Server-Timing'])
+        for metric in ('db;dur=', 'serialize;dur=', 'render;dur=', 'total;dur='):
+            self.assertIn(metric, res['Server-Timing'])
+
+    @override_settings(PERFORMANCE_SAMPLE_RATE=0.0)
+    def test_unsampled_request(self):
+        """Test requests out of the sample are not measured"""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertNotIn('Server-Timing', res)
+
+    @override_settings(PERFORMANCE_SERVER_TIMING=False)
+    def test_server_timing_disabled(self):
+        """Test the header can be left out while requests are still logged"""
+        with self.assertLogs('core.performance'):
+            res = self.client.post(RECIPES_URL, {
+                'title': 'Stew', 'time_minutes': 10, 'price': '2.00',
+            })
+
+        self.assertEqual(res.status_code, 201)
+        self.assertNotIn('Server-Timing', res)
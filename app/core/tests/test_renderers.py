@@ -0,0 +1,53 @@
+import datetime
+import uuid
+from collections import OrderedDict
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import FastJSONRenderer
+
+PAYLOADS = (
+    None,
+    [],
+    {'results': [], 'next': None},
+    OrderedDict([('id', 1), ('title', 'Crème brûlée «maison»'), ('tags', [3, 1])]),
+    {'separators': 'line\u2028paragraph\u2029end', 'escapes': '"\\\n\t\x00'},
+    {'price': Decimal('4.00'), 'when': datetime.datetime(2020, 5, 17, 10, 30, 15, 123456)},
+    {'day': datetime.date(2020, 5, 17), 'uuid': uuid.UUID(int=1), 'lazy': gettext_lazy('Yes')},
+    {'aware': datetime.datetime(2020, 5, 17, tzinfo=datetime.timezone.utc)},
+    {1: 'non-string key', 'big': 2 ** 70, 'tuple': (True, False)},
+)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+
+    def test_same_bytes_as_json_renderer(self):
+        """Test that the output is JSONRenderer's, byte for byte"""
+        for data in PAYLOADS:
+            with self.subTest(data=data):
+                self.assertEqual(
+                    FastJSONRenderer().render(data),
+                    JSONRenderer().render(data)
+                )
+
+    def test_indent(self):
+        """Test that indented responses are rendered like JSONRenderer"""
+        data = {'id': 1, 'tags': [1, 2]}
+
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2')
+        )
+
+    def test_without_orjson(self):
+        """Test that the standard library is used without orjson"""
+        with patch('core.renderers.orjson', None):
+            for data in PAYLOADS:
+                self.assertEqual(
+                    FastJSONRenderer().render(data),
+                    JSONRenderer().render(data)
+                )
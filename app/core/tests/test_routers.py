@@ -0,0 +1,136 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import router
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import TestCase, RequestFactory, override_settings
+from rest_framework.authtoken.models import Token
+
+from core.middleware import ReplicaRoutingMiddleware
+from core.models import Recipe
+from core.routers import read_from_replicas, read_stale_replica
+from recipe.cache import bump_user_version
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRouterTests(TestCase):
+
+    def test_reads_from_replicas_when_enabled(self):
+        """Test reads go to a replica only inside read_from_replicas()"""
+        self.assertEqual(router.db_for_read(Recipe), 'default')
+        with read_from_replicas():
+            self.assertEqual(router.db_for_read(Recipe), 'replica1')
+            self.assertEqual(router.db_for_write(Recipe), 'default')
+
+    def test_credentials_read_from_primary(self):
+        """Test tokens are always read from the primary"""
+        with read_from_replicas():
+            self.assertEqual(router.db_for_read(Token), 'default')
+
+    def test_migrations_on_primary_only(self):
+        """Test migrations are not run on replicas"""
+        self.assertTrue(router.allow_migrate('default', 'core'))
+        self.assertFalse(router.allow_migrate('replica1', 'core'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'], DB_PRIMARY_PIN_SECONDS=10)
+class ReplicaRoutingMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.used = []
+        self.user = get_user_model().objects.create_user("pin@mail.com", "testpass")
+        self.other = get_user_model().objects.create_user("other@mail.com", "testpass")
+        # Saving the users pinned them
+        cache.clear()
+
+        def view(request):
+            # Authenticated by the view, after the middleware ran
+            request.user = request.authenticated_user
+            self.used.append(router.db_for_read(Recipe))
+            return HttpResponse()
+
+        self.middleware = ReplicaRoutingMiddleware(view)
+
+    def request(self, method, user=None):
+        request = getattr(self.factory, method)('/')
+        request.authenticated_user = user or AnonymousUser()
+        return self.middleware(request)
+
+    def test_safe_methods_read_from_replicas(self):
+        """Test GET reads from replicas and POST from the primary"""
+        self.request('get', self.user)
+        self.request('post', self.user)
+
+        self.assertEqual(self.used, ['replica1', 'default'])
+
+    def test_pinned_to_primary_after_write(self):
+        """Test a user reads from the primary after writing, whatever the credential"""
+        self.request('patch', self.user)
+        self.request('get', self.user)
+        self.request('get', self.other)
+        self.request('get')
+
+        self.assertEqual(self.used, ['default', 'default', 'replica1', 'replica1'])
+
+    def test_pinned_to_primary_after_data_change(self):
+        """Test a user whose data changed elsewhere reads from the primary"""
+        bump_user_version(self.user.pk)
+        self.request('get', self.user)
+
+        self.assertEqual(self.used, ['default'])
+
+    @override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+    def test_one_replica_per_request(self):
+        """Test every read of a request goes to the same replica"""
+        def view(request):
+            self.used.append({router.db_for_read(Recipe) for _ in range(20)})
+            return HttpResponse()
+
+        for _ in range(10):
+            ReplicaRoutingMiddleware(view)(self.factory.get('/'))
+
+        self.assertTrue(all(len(aliases) == 1 for aliases in self.used))
+        self.assertEqual(set.union(*self.used), {'replica1', 'replica2'})
+
+    @override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+    def test_streamed_body_reads_from_the_same_replica(self):
+        """Test a streamed body is produced while reading from the replica"""
+        def view(request):
+            self.used.append(router.db_for_read(Recipe))
+            return StreamingHttpResponse(
+                router.db_for_read(Recipe) for _ in range(10)
+            )
+
+        response = ReplicaRoutingMiddleware(view)(self.factory.get('/'))
+
+        self.assertEqual(
+            b''.join(response.streaming_content).decode(),
+            self.used[0] * 10
+        )
+        self.assertEqual(router.db_for_read(Recipe), 'default')
+
+    def test_replica_read_not_cached_while_pinned(self):
+        """Test that reads racing a write are flagged as possibly stale"""
+        with read_from_replicas() as reads:
+            router.db_for_read(Recipe)
+            self.assertFalse(read_stale_replica(self.user.pk))
+            bump_user_version(self.user.pk)
+
+            self.assertTrue(reads.from_replica)
+            self.assertTrue(read_stale_replica(self.user.pk))
+            self.assertFalse(read_stale_replica(self.other.pk))
+
+    @override_settings(CACHE_SHARED=False)
+    def test_cache_not_shared(self):
+        """Test reads stay on the primary when pins are not seen by all processes"""
+        self.request('get', self.user)
+
+        self.assertEqual(self.used, ['default'])
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        """Test everything reads from the primary without replicas"""
+        self.request('get')
+
+        self.assertEqual(self.used, ['default'])
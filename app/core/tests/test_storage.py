@@ -0,0 +1,51 @@
+import os
+import shutil
+import tempfile
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+
+from core.storage import ContentAddressedStorage
+
+DIGEST = '2cf24dba5fb0a30e26e83b2ac5b9e29e1b161e5c1fa7425e73043362938b9824'
+NAME = f'uploads/recipe/2c/f2/{DIGEST}.jpg'
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        self.storage = ContentAddressedStorage(location=location)
+
+    def test_named_after_content(self):
+        """Test files are named after the SHA-256 of their content"""
+        name = self.storage.save('uploads/recipe/image.JPG', ContentFile(b'hello'))
+
+        self.assertEqual(name, NAME)
+
+    def test_same_content_stored_once(self):
+        """Test saving the same content again reuses the stored file"""
+        first = self.storage.save('uploads/recipe/a.jpg', ContentFile(b'hello'))
+        second = self.storage.save('uploads/recipe/b.jpg', ContentFile(b'hello'))
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.storage.listdir('uploads/recipe/2c/f2')[1], [f'{DIGEST}.jpg'])
+
+    def test_concurrent_save_keeps_name(self):
+        """Test a file stored meanwhile under the name is a dedup hit, not renamed"""
+        self.storage.save('uploads/recipe/a.jpg', ContentFile(b'hello'))
+
+        self.assertEqual(self.storage.get_available_name(NAME), NAME)
+        self.assertEqual(self.storage._save(NAME, ContentFile(b'hello')), NAME)
+        self.assertEqual(os.listdir(os.path.dirname(self.storage.path(NAME))), [f'{DIGEST}.jpg'])
+
+    def test_long_name_not_truncated(self):
+        """Test a name too long for the field is rejected, not truncated"""
+        with self.assertRaises(SuspiciousFileOperation):
+            self.storage.save(
+                'uploads/recipe/a.' + 'x' * 20,
+                ContentFile(b'hello'),
+                max_length=100
+            )
@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core.models import Tag
+from core.testing import QueryBudgetMixin, max_queries
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'budget@mail.com',
+            'testpass'
+        )
+
+    def create_tags(self, count):
+        for i in range(count):
+            Tag.objects.create(user=self.user, name=f'Tag {i}')
+
+    def test_within_budget(self):
+        """Test that a block within its budget passes"""
+        with self.assertMaxQueries(1) as captured:
+            list(Tag.objects.all())
+
+        self.assertEqual(len(captured), 1)
+
+    def test_over_budget(self):
+        """Test that a block over its budget fails listing the queries"""
+        with self.assertRaisesMessage(AssertionError, '2 queries executed, the budget is 1'):
+            with self.assertMaxQueries(1):
+                list(Tag.objects.all())
+                list(Tag.objects.all())
+
+    def test_decorator(self):
+        """Test that the budget applies to each call of a decorated function"""
+        @max_queries(1)
+        def query():
+            return list(Tag.objects.all())
+
+        query()
+        query()
+
+    def test_constant_queries(self):
+        """Test that a bulk query passes and a query per object fails"""
+        small, large = self.assertConstantQueries(
+            self.create_tags, lambda: list(Tag.objects.all()), budget=1
+        )
+        self.assertEqual((len(small), len(large)), (1, 10))
+
+        with self.assertRaisesMessage(AssertionError, 'queries with 1 objects but'):
+            self.assertConstantQueries(
+                self.create_tags,
+                lambda: [tag.user.email for tag in Tag.objects.all()]
+            )
+
+    def test_constant_queries_over_budget(self):
+        """Test that constant queries still have to fit the budget"""
+        with self.assertRaisesMessage(AssertionError, 'the budget is 0'):
+            self.assertConstantQueries(
+                self.create_tags, lambda: list(Tag.objects.all()), budget=0
+            )
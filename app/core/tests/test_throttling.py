@@ -0,0 +1,119 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.throttling import ScopedUserRateThrottle
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class FakeTimeThrottle(ScopedUserRateThrottle):
+    now = 1000.0
+
+    def timer(self):
+        return FakeTimeThrottle.now
+
+
+@override_settings(REST_FRAMEWORK={
+    'DEFAULT_THROTTLE_RATES': {'read': '4/min', 'write': '2/min'},
+})
+class SlidingWindowThrottleTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        FakeTimeThrottle.now = 60 * 1000.0
+        self.request = APIRequestFactory().get('/')
+        self.request.user = None
+
+    def allow(self, request=None):
+        throttle = FakeTimeThrottle()
+        return throttle.allow_request(request or self.request, None), throttle.wait()
+
+    def test_limit_within_window(self):
+        """Test requests over the rate are refused until the window slides"""
+        results = [self.allow()[0] for _ in range(5)]
+
+        self.assertEqual(results, [True] * 4 + [False])
+        self.assertEqual(self.allow()[1], 60)
+
+    def test_previous_window_weighted(self):
+        """Test the previous window counts for the part still covered"""
+        for _ in range(4):
+            self.allow()
+
+        # 10s into the next window the 4 requests weigh 4 * 50/60
+        FakeTimeThrottle.now += 70
+        self.assertEqual(self.allow(), (True, None))
+        self.assertEqual(self.allow(), (False, 5))
+
+        FakeTimeThrottle.now += 6
+        self.assertEqual(self.allow(), (True, None))
+
+    def test_concurrent_requests(self):
+        """Test a request arriving while another is checked sees its count"""
+        for _ in range(3):
+            self.allow()
+        concurrent, pending = [], [True]
+
+        class InterleavedCache:
+            """The default cache, with a request served after each read"""
+
+            def __getattr__(self, name):
+                return getattr(cache, name)
+
+            def get(self, *args, **kwargs):
+                return self.serve(cache.get(*args, **kwargs))
+
+            def get_many(self, *args, **kwargs):
+                return self.serve(cache.get_many(*args, **kwargs))
+
+            def serve(self, value):
+                if pending:
+                    pending.pop()
+                    concurrent.append(self.test.allow()[0])
+                return value
+
+        InterleavedCache.test = self
+        with patch.object(FakeTimeThrottle, 'cache', InterleavedCache()):
+            allowed = self.allow()[0]
+
+        self.assertEqual(sorted([allowed] + concurrent), [False, True])
+        self.assertEqual(self.allow(), (False, 60))
+
+    def test_scopes_counted_apart(self):
+        """Test reads and writes have their own limits"""
+        post = APIRequestFactory().post('/')
+        post.user = None
+        writes = [self.allow(post)[0] for _ in range(3)]
+
+        self.assertEqual(writes, [True, True, False])
+        self.assertTrue(self.allow()[0])
+
+
+@override_settings(REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'read': '2/min'}})
+class ThrottledApiTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_throttled_per_user(self):
+        """Test a user over the rate gets 429 with Retry-After"""
+        user = get_user_model().objects.create_user('test@mail.com', 'testpass')
+        other = get_user_model().objects.create_user('other@mail.com', 'testpass')
+        self.client.force_authenticate(user)
+
+        statuses = [self.client.get(RECIPES_URL).status_code for _ in range(2)]
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(statuses, [200, 200])
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertTrue(1 <= int(res['Retry-After']) <= 60)
+
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(RECIPES_URL).status_code, status.HTTP_200_OK)
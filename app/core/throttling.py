@@ -0,0 +1,117 @@
+import math
+import time
+
+from django.core.cache import cache as default_cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class SlidingWindowRateThrottle(BaseThrottle):
+    """
+    Limit requests to the rate of `scope` in DEFAULT_THROTTLE_RATES with
+    a sliding window counter: requests are counted per fixed window of
+    the rate's duration, and the count of the previous window is weighted
+    by how much of it the sliding window still covers. That costs one
+    increment and one read per request, whatever the rate. A request is
+    counted before it is checked, against the count the increment
+    returns, so concurrent requests cannot all pass on the same count;
+    refused requests are uncounted. The cache must be shared by all
+    server processes for the rates to hold (see CACHE_SHARED).
+
+    Subclasses identify clients with get_cache_key(); None means the
+    request is not throttled.
+    """
+    cache = default_cache
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+    scope = None
+    timer = time.time
+
+    def get_cache_key(self, request, view):
+        raise NotImplementedError('.get_cache_key() must be overridden')
+
+    def get_scope(self, request, view):
+        return self.scope
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        scope = self.get_scope(request, view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if scope is None or rate is None:
+            return True
+        self.scope = scope
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        num_requests, duration = parse_rate(rate)
+        now = self.timer()
+        window = int(now // duration)
+        elapsed = now - window * duration
+        current_key, previous_key = f'{key}:{window}', f'{key}:{window - 1}'
+        current = self._count(current_key, duration)
+        previous = self.cache.get(previous_key, 0)
+
+        # The requests before this one must leave room for it
+        before = current - 1
+        weight = 1 - elapsed / duration
+        if previous * weight + before >= num_requests:
+            self.cache.decr(current_key)
+            self.wait_seconds = _wait(num_requests, duration, elapsed, before, previous)
+            return False
+        return True
+
+    def _count(self, key, duration):
+        """Count a request in the window of key and return its count"""
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            pass
+        # Kept for the next window, which weighs it
+        if self.cache.add(key, 1, timeout=2 * duration):
+            return 1
+        # Another request created it meanwhile
+        return self.cache.incr(key)
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class ScopedUserRateThrottle(SlidingWindowRateThrottle):
+    """
+    Throttle each user, or client address for anonymous requests, per
+    scope: the view's `throttle_scope` when set (e.g. on an action),
+    otherwise `read` for safe methods and `write` for the others.
+    """
+
+    def get_scope(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope:
+            return scope
+        return 'read' if request.method in SAFE_METHODS else 'write'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = f'user-{request.user.pk}'
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+def parse_rate(rate):
+    """Return the request count and duration in seconds of `<count>/<period>`"""
+    num, period = rate.split('/')
+    return int(num), DURATIONS[period[0]]
+
+
+def _wait(num_requests, duration, elapsed, current, previous):
+    """Seconds until the weighted count of the window drops below the rate"""
+    if current < num_requests:
+        # The weight of the previous window decreases over this one
+        wait = duration * (1 - (num_requests - current) / previous) - elapsed
+    else:
+        # The current window becomes the previous one
+        wait = duration - elapsed + duration * (1 - num_requests / current)
+    return max(math.ceil(wait), 1)
@@ -0,0 +1,91 @@
+import os
+import tempfile
+
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import TemporaryUploadedFile, UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, TemporaryFileUploadHandler
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+# Room left in a request body for multipart headers and form fields
+MULTIPART_OVERHEAD = 64 * 1024
+TEMP_DIR = 'tmp'
+
+
+class UploadTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'Upload too large.'
+    default_code = 'upload_too_large'
+
+    def __init__(self, max_size):
+        super().__init__(f'Files may be at most {max_size} bytes.')
+
+
+class MaxSizeUploadHandler(FileUploadHandler):
+    """
+    Reject a multipart request whose Content-Length could not fit within
+    max_size before any of it is read, and any file growing past max_size
+    while it is streamed. Must come first in the handler list.
+    """
+
+    def __init__(self, request=None, max_size=None):
+        super().__init__(request)
+        self.max_size = max_size
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        if content_length > self.max_size + MULTIPART_OVERHEAD:
+            raise UploadTooLarge(self.max_size)
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.max_size:
+            raise UploadTooLarge(self.max_size)
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+class MediaTemporaryUploadedFile(TemporaryUploadedFile):
+    """A temporary upload in a given directory"""
+
+    def __init__(self, name, content_type, size, charset,
+                 content_type_extra=None, dir=None):
+        _, ext = os.path.splitext(name)
+        file = tempfile.NamedTemporaryFile(suffix='.upload' + ext, dir=dir)
+        UploadedFile.__init__(
+            self, file, name, content_type, size, charset, content_type_extra
+        )
+
+
+class MediaTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Stream every upload to a temporary file on the media volume, however
+    small, so that storing it is a rename rather than a copy. Storages
+    without local paths fall back to FILE_UPLOAD_TEMP_DIR.
+    """
+
+    def new_file(self, *args, **kwargs):
+        FileUploadHandler.new_file(self, *args, **kwargs)
+        self.file = MediaTemporaryUploadedFile(
+            self.file_name, self.content_type, 0, self.charset,
+            self.content_type_extra, dir=media_temp_dir()
+        )
+
+
+def media_temp_dir():
+    """Return the temporary upload directory of the media storage"""
+    try:
+        path = default_storage.path(TEMP_DIR)
+    except NotImplementedError:
+        return None
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def streaming_upload_handlers(request, max_size):
+    """Upload handlers that bound files to max_size and never buffer them"""
+    return [
+        MaxSizeUploadHandler(request, max_size),
+        MediaTemporaryFileUploadHandler(request),
+    ]
@@ -0,0 +1,58 @@
+import mimetypes
+import posixpath
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import Http404, HttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.encoding import escape_uri_path
+from django.views.decorators.http import require_safe
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from core.metrics import render_latest
+from core.uploads import TEMP_DIR
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Hand a media file over to the front proxy. Only headers are sent:
+    with MEDIA_SERVE_MODE `accel` nginx serves the file from the internal
+    location MEDIA_ACCEL_PREFIX, with `sendfile` the server named by
+    X-Sendfile does. Stored media is never rewritten under the same name,
+    so it is cached for good.
+    """
+    # `./tmp/a` or `x/../tmp/a` must not get past the check
+    path = posixpath.normpath(path)
+    if path == TEMP_DIR or path.startswith(TEMP_DIR + '/'):
+        raise Http404
+    try:
+        full_path = default_storage.path(path)
+    except SuspiciousFileOperation:
+        raise Http404
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    response = HttpResponse(content_type=content_type or 'application/octet-stream')
+    if settings.MEDIA_SERVE_MODE == 'accel':
+        response['X-Accel-Redirect'] = escape_uri_path(
+            settings.MEDIA_ACCEL_PREFIX + path
+        )
+    else:
+        response['X-Sendfile'] = full_path
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=settings.MEDIA_CACHE_MAX_AGE,
+        immutable=True
+    )
+    return response
+
+
+@require_safe
+def metrics(request):
+    """
+    Expose the API metrics of all server processes to Prometheus. Only
+    reachable from inside the deployment, the proxy does not forward it.
+    """
+    return HttpResponse(render_latest(), content_type=CONTENT_TYPE_LATEST)
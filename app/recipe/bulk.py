@@ -0,0 +1,246 @@
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from core.bulk import bulk_create_with_pks, bulk_update, bulk_set_relations, bulk_delete
+from core.models import Recipe
+from core.search import update_search_vectors
+from recipe.cache import bump_user_version
+from recipe.serializers import PreloadedPrimaryKeyRelatedField
+
+
+class BulkModelMixin:
+    """
+    Create, update or delete a list of objects at `<list url>/bulk/` in
+    a single transaction. Nothing is written unless every item is valid;
+    errors are reported per item, in request order.
+
+    POST takes a list of objects, PATCH a list of partial objects with
+    their `id` and DELETE a list of ids. Model signals are not sent, the
+    linked recipes and the cache version are brought up to date once
+    per request instead.
+    """
+    bulk_max_items = 1000
+    bulk_batch_size = 500
+
+    @action(methods=['POST', 'PATCH', 'DELETE'], detail=False, url_path='bulk')
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            return self._bulk_error('Expected a list of items.')
+        if len(items) > self.bulk_max_items:
+            return self._bulk_error(
+                f'Expected at most {self.bulk_max_items} items.'
+            )
+
+        if request.method == 'POST':
+            return self.bulk_create_items(items)
+        if request.method == 'PATCH':
+            return self.bulk_update_items(items)
+        return self.bulk_destroy_items(items)
+
+    def bulk_create_items(self, items):
+        serializer = self.get_serializer_class()(
+            data=items,
+            many=True,
+            context=self.get_bulk_serializer_context(items)
+        )
+        if not serializer.is_valid():
+            return self._bulk_item_errors(serializer.errors)
+
+        model = self.get_queryset().model
+        objs, relations = [], []
+        for data in serializer.validated_data:
+            fields, related = self._split_relations(model, data)
+            objs.append(model(user=self.request.user, **fields))
+            relations.append(related)
+
+        with transaction.atomic():
+            objs = bulk_create_with_pks(model, objs, self.bulk_batch_size)
+            self._set_relations(model, objs, relations, replace=False)
+            if model is Recipe:
+                self._update_recipes(model, objs)
+        bump_user_version(self.request.user.pk)
+
+        return Response(
+            self._serialize_saved(objs),
+            status=status.HTTP_201_CREATED
+        )
+
+    def bulk_update_items(self, items):
+        ids = [item.get('id') if isinstance(item, dict) else None for item in items]
+        instances = self.get_queryset().in_bulk(
+            [pk for pk in ids if _is_id(pk)]
+        )
+        context = self.get_bulk_serializer_context(items)
+
+        serializers, errors = [], []
+        for pk, item in zip(ids, items):
+            instance = instances.get(pk)
+            if instance is None:
+                errors.append({'id': ['Not found.']})
+                continue
+            serializer = self.get_serializer_class()(
+                instance, data=item, partial=True, context=context
+            )
+            serializer.is_valid()
+            errors.append(serializer.errors)
+            serializers.append(serializer)
+        if any(errors):
+            return self._bulk_item_errors(errors)
+
+        model = self.get_queryset().model
+        objs, relations, field_names = [], [], {'updated_at'}
+        now = timezone.now()
+        for serializer in serializers:
+            fields, related = self._split_relations(model, serializer.validated_data)
+            instance = serializer.instance
+            for name, value in fields.items():
+                setattr(instance, name, value)
+            instance.updated_at = now
+            field_names.update(fields)
+            objs.append(instance)
+            relations.append(related)
+
+        with transaction.atomic():
+            bulk_update(model, objs, sorted(field_names), self.bulk_batch_size)
+            self._set_relations(model, objs, relations, replace=True)
+            if model is Recipe:
+                self._update_recipes(model, objs)
+            else:
+                self._update_recipes(model, objs, updated_at=now)
+        bump_user_version(self.request.user.pk)
+
+        return Response(self._serialize_saved(objs))
+
+    def bulk_destroy_items(self, ids):
+        queryset = self.get_queryset()
+        existing = set(queryset.filter(
+            pk__in=[pk for pk in ids if _is_id(pk)]
+        ).values_list('pk', flat=True))
+        errors = [
+            {} if _is_id(pk) and pk in existing else {'id': ['Not found.']}
+            for pk in ids
+        ]
+        if any(errors):
+            return self._bulk_item_errors(errors)
+
+        model = queryset.model
+        with transaction.atomic():
+            if model is Recipe:
+                bulk_delete(model.objects.filter(pk__in=existing))
+            else:
+                recipe_ids = list(self._linked_recipes(
+                    model, existing
+                ).values_list('pk', flat=True).distinct())
+                bulk_delete(model.objects.filter(pk__in=existing))
+                update_search_vectors(
+                    Recipe.objects.filter(pk__in=recipe_ids),
+                    updated_at=timezone.now()
+                )
+        bump_user_version(self.request.user.pk)
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def get_bulk_serializer_context(self, items):
+        """
+        Preload every object referenced by a related primary key field of
+        the items with one query per field.
+        """
+        context = self.get_serializer_context()
+        related_objects = {}
+        for name, field in self.get_serializer().fields.items():
+            child = getattr(field, 'child_relation', None)
+            if not isinstance(child, PreloadedPrimaryKeyRelatedField):
+                continue
+            ids = set()
+            for item in items:
+                ids.update(_related_ids(item, name))
+            queryset = child.get_queryset()
+            related_objects[queryset.model] = queryset.in_bulk(ids)
+        context['related_objects'] = related_objects
+        return context
+
+    def _split_relations(self, model, data):
+        m2m = {field.name for field in model._meta.many_to_many}
+        fields = {name: value for name, value in data.items() if name not in m2m}
+        related = {name: value for name, value in data.items() if name in m2m}
+        return fields, related
+
+    def _set_relations(self, model, objs, relations, replace):
+        for field in model._meta.many_to_many:
+            links = {
+                obj: related[field.name]
+                for obj, related in zip(objs, relations)
+                if field.name in related
+            }
+            if links:
+                bulk_set_relations(
+                    model, field.name, links,
+                    replace=replace,
+                    batch_size=self.bulk_batch_size
+                )
+
+    def _update_recipes(self, model, objs, **fields):
+        """
+        Bring the recipes that are, or are linked to, the saved objects up
+        to date, as the model signals would for single saves.
+        """
+        pks = [obj.pk for obj in objs]
+        if model is Recipe:
+            recipes = Recipe.objects.filter(pk__in=pks)
+        else:
+            recipes = self._linked_recipes(model, pks)
+        update_search_vectors(recipes, **fields)
+
+    def _linked_recipes(self, model, pks):
+        """Recipes linked to the tags or ingredients with the given pks"""
+        relation = next(
+            field.name for field in Recipe._meta.many_to_many
+            if field.related_model is model
+        )
+        return Recipe.objects.filter(**{relation + '__in': pks})
+
+    def _serialize_saved(self, objs):
+        model = self.get_queryset().model
+        queryset = model.objects.filter(
+            pk__in=[obj.pk for obj in objs]
+        ).prefetch_related(
+            *(field.name for field in model._meta.many_to_many)
+        ).in_bulk()
+        return self.get_serializer(
+            [queryset[obj.pk] for obj in objs],
+            many=True
+        ).data
+
+    def _bulk_item_errors(self, errors):
+        return Response({'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+    def _bulk_error(self, message):
+        return Response(
+            {'non_field_errors': [message]},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+
+def _related_ids(item, name):
+    """Integer ids listed under name in JSON or form data"""
+    if hasattr(item, 'getlist'):
+        values = item.getlist(name)
+    elif isinstance(item, dict):
+        values = item.get(name)
+    else:
+        values = None
+    if not isinstance(values, list):
+        return []
+    return [
+        int(pk) for pk in values
+        if _is_id(pk) or (isinstance(pk, str) and pk.isdecimal())
+    ]
+
+
+def _is_id(value):
+    """Whether value is an integer id, booleans are not"""
+    return isinstance(value, int) and not isinstance(value, bool)
@@ -0,0 +1,89 @@
+import time
+import hashlib
+
+from django.conf import settings
+from django.db import transaction
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.metrics import observe_cache
+from core.routers import pin_to_primary, read_stale_replica
+
+VERSION_KEY = 'recipe-api:version:{user_id}'
+RESPONSE_KEY = 'recipe-api:response:{user_id}:{version}:{digest}'
+
+
+def get_user_version(user_id):
+    """Return the current cache version of a user's recipe data"""
+    key = VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        # Start above any version that may still be cached for this user
+        # in case the version key itself was evicted
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_user_version(user_id):
+    """
+    Invalidate every cached response of a user. The version is bumped
+    again once the surrounding transaction commits, so a response built
+    from data read before the commit cannot be stored under the new one.
+    The user is pinned to the primary first, so requests that see the
+    new version do not read it from a lagging replica.
+    """
+    _incr_version(user_id)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _incr_version(user_id))
+
+
+def _incr_version(user_id):
+    pin_to_primary(user_id)
+    key = VERSION_KEY.format(user_id=user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def response_cache_key(request):
+    """Build the cache key of a GET request made by an authenticated user"""
+    user_id = request.user.pk
+    digest = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return RESPONSE_KEY.format(
+        user_id=user_id,
+        version=get_user_version(user_id),
+        digest=digest,
+    )
+
+
+class CachedListMixin:
+    """
+    Serve list responses from the cache, keyed by user data version and
+    full request URL. Writes bump the version so stale data is never read;
+    lists read from a replica while the user is pinned to the primary
+    are not stored either. Nothing is cached unless CACHE_SHARED, as the
+    bumps would not reach the other processes.
+    """
+    cache_timeout = None
+
+    def list(self, request, *args, **kwargs):
+        if not settings.CACHE_SHARED:
+            return super().list(request, *args, **kwargs)
+
+        key = response_cache_key(request)
+        data = cache.get(key)
+        observe_cache('api_list', data is not None)
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        if (response.status_code == status.HTTP_200_OK
+                and not read_stale_replica(request.user.pk)):
+            timeout = self.cache_timeout
+            if timeout is None:
+                timeout = settings.API_CACHE_TIMEOUT
+            cache.set(key, response.data, timeout)
+        return response
@@ -0,0 +1,82 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, quote_etag
+from rest_framework import status
+
+from core.routers import read_stale_replica
+from recipe.cache import get_user_version
+
+VALIDATORS_KEY = 'recipe-api:validators:{user_id}:{version}:{model}'
+
+
+def collection_validators(queryset, user_id):
+    """
+    Return the newest `updated_at` and the row count of a user's
+    collection. Both are cached until the user's data version changes,
+    unless CACHE_SHARED is off: writes of the other processes would not
+    bump the version.
+    """
+    if not settings.CACHE_SHARED:
+        return _collection_stats(queryset)
+
+    key = VALIDATORS_KEY.format(
+        user_id=user_id,
+        version=get_user_version(user_id),
+        model=queryset.model._meta.label_lower,
+    )
+    validators = cache.get(key)
+    if validators is None:
+        validators = _collection_stats(queryset)
+        if not read_stale_replica(user_id):
+            cache.set(key, validators, settings.API_CACHE_TIMEOUT)
+    return validators
+
+
+def _collection_stats(queryset):
+    stats = queryset.order_by().aggregate(
+        last_modified=Max('updated_at'),
+        count=Count('pk'),
+    )
+    return stats['last_modified'], stats['count']
+
+
+class ConditionalListMixin:
+    """
+    Answer list requests carrying If-None-Match with 304 Not Modified
+    when the user's collection has not changed, before any object is
+    loaded or serialized.
+
+    Lists have no Last-Modified: the newest `updated_at` does not change
+    when an object is deleted, and HTTP dates cannot tell apart writes
+    made within the same second. The ETag covers both.
+    """
+
+    def list(self, request, *args, **kwargs):
+        etag = self.get_list_etag(request)
+        not_modified = get_conditional_response(request._request, etag=etag)
+        if not_modified is not None:
+            response = not_modified
+        else:
+            response = super().list(request, *args, **kwargs)
+
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+        return response
+
+    def get_list_etag(self, request):
+        """Return the ETag of the list, from its URL, format and collection"""
+        updated_at, count = collection_validators(
+            self.get_queryset(),
+            request.user.pk
+        )
+        renderer = getattr(request, 'accepted_renderer', None)
+        fingerprint = ':'.join((
+            request.get_full_path(),
+            getattr(renderer, 'format', ''),
+            updated_at.isoformat() if updated_at else '',
+            str(count),
+        ))
+        return quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
@@ -0,0 +1,94 @@
+import csv
+import json
+from itertools import islice
+from collections import defaultdict
+
+from rest_framework.renderers import BaseRenderer
+
+EXPORT_FIELDS = (
+    'id', 'title', 'time_minutes', 'price', 'link', 'tags', 'ingredients',
+)
+RELATION_SEPARATOR = ';'
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Negotiates the newline delimited JSON export format. The export body
+    is streamed by the view; rendering only happens for error responses.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data) + '\n'
+
+
+class CSVRenderer(NDJSONRenderer):
+    """Negotiates the CSV export format"""
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+def iter_recipes(queryset, chunk_size):
+    """
+    Yield recipes as dicts of EXPORT_FIELDS. Recipes are read through a
+    chunked iterator and the tag and ingredient names of every chunk are
+    loaded with one query per relation.
+    """
+    rows = queryset.order_by('id').values_list(
+        'id', 'title', 'time_minutes', 'price', 'link'
+    ).iterator(chunk_size=chunk_size)
+    model = queryset.model
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        ids = [row[0] for row in chunk]
+        tags = _related_names(model, 'tags', ids)
+        ingredients = _related_names(model, 'ingredients', ids)
+        for pk, title, time_minutes, price, link in chunk:
+            yield {
+                'id': pk,
+                'title': title,
+                'time_minutes': time_minutes,
+                'price': str(price),
+                'link': link,
+                'tags': tags[pk],
+                'ingredients': ingredients[pk],
+            }
+
+
+def stream_ndjson(recipes):
+    for recipe in recipes:
+        yield json.dumps(recipe, ensure_ascii=False) + '\n'
+
+
+def stream_csv(recipes):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for recipe in recipes:
+        recipe['tags'] = RELATION_SEPARATOR.join(recipe['tags'])
+        recipe['ingredients'] = RELATION_SEPARATOR.join(recipe['ingredients'])
+        yield writer.writerow([recipe[field] for field in EXPORT_FIELDS])
+
+
+def _related_names(model, relation, ids):
+    field = model._meta.get_field(relation)
+    source = field.m2m_field_name() + '_id'
+    target = field.m2m_reverse_field_name()
+    names = defaultdict(list)
+    rows = field.remote_field.through.objects.filter(
+        **{source + '__in': ids}
+    ).order_by(target + '__name').values_list(source, target + '__name')
+    for pk, name in rows:
+        names[pk].append(name)
+    return names
+
+
+class _Echo:
+    """File-like object that returns what is written to it"""
+
+    def write(self, value):
+        return value
@@ -0,0 +1,283 @@
+from collections import defaultdict
+from decimal import Decimal
+from functools import lru_cache
+from operator import itemgetter
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import serializers
+from rest_framework.generics import get_object_or_404
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from core.performance import timed_serialization
+
+# Serializer fields whose representation of a value of the model field
+# is the value itself
+IDENTITY_FIELDS = (
+    (serializers.IntegerField, (models.IntegerField, models.AutoField)),
+    (serializers.CharField, (models.CharField, models.TextField)),
+    (serializers.BooleanField, (models.BooleanField,)),
+)
+
+
+class NotCompilable(Exception):
+    """A serializer field has no row equivalent"""
+
+
+class RowRepresentation:
+    """
+    Build the representation of a ModelSerializer from `values()` rows
+    instead of model instances, without running the serializer.
+
+    The serializer's fields are compiled once into an accessor per field:
+    columns are read with itemgetter, or converted by the same rules as
+    the field's to_representation(), many-to-many primary keys and nested
+    model serializers are loaded for all rows with one query per relation.
+    A field with `source='*'` takes part when it implements
+    `row_columns` and `rows_representation(rows, context)`, which returns
+    its representations keyed by row primary key.
+
+    The representation is equal to the serializer's, except that related
+    objects are listed by primary key, which the serializer's querysets
+    have to match (see RecipeViewSet.fetch_plans).
+    """
+
+    def __init__(self, serializer_class):
+        serializer = serializer_class()
+        self.model = serializer.Meta.model
+        self.pk = self.model._meta.pk.attname
+        self.columns = [self.pk]
+        self.fields = []
+        for field in serializer.fields.values():
+            if not field.write_only:
+                self.fields.append((field.field_name, self._compile(field)))
+
+    def _compile(self, field):
+        if field.source == '*':
+            if not hasattr(field, 'rows_representation'):
+                raise NotCompilable(field.field_name)
+            self._add_columns(*field.row_columns)
+            return _CustomStep(field)
+        if '.' in field.source:
+            raise NotCompilable(field.field_name)
+
+        try:
+            model_field = self.model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            raise NotCompilable(field.field_name)
+
+        if isinstance(field, ManyRelatedField):
+            child = field.child_relation
+            if not isinstance(child, PrimaryKeyRelatedField) or child.pk_field:
+                raise NotCompilable(field.field_name)
+            return _PrimaryKeysStep(model_field)
+        if isinstance(field, serializers.ListSerializer):
+            if not model_field.many_to_many:
+                raise NotCompilable(field.field_name)
+            return _NestedStep(model_field, row_representation(type(field.child)))
+        if model_field.is_relation or not model_field.concrete:
+            raise NotCompilable(field.field_name)
+
+        self._add_columns(model_field.attname)
+        if isinstance(field, serializers.FileField):
+            return _FileStep(field, model_field)
+        return _ColumnStep(model_field.attname, _converter(field, model_field))
+
+    def _add_columns(self, *columns):
+        for column in columns:
+            if column not in self.columns:
+                self.columns.append(column)
+
+    def values(self, queryset):
+        """
+        Turn a queryset of the model into one of the rows to build from,
+        keeping its annotations, which cursor pagination may order by.
+        """
+        return queryset.prefetch_related(None).values(
+            *self.columns, *queryset.query.annotations
+        )
+
+    @timed_serialization
+    def build(self, rows, context=None):
+        """Return the representations of rows, in order"""
+        context = context or {}
+        getters = [
+            (name, step.getter(self, rows, context))
+            for name, step in self.fields
+        ]
+        return [{name: get(row) for name, get in getters} for row in rows]
+
+
+@lru_cache(maxsize=None)
+def row_representation(serializer_class):
+    """Return the compiled RowRepresentation of serializer_class"""
+    return RowRepresentation(serializer_class)
+
+
+@lru_cache(maxsize=None)
+def _optional_row_representation(serializer_class):
+    try:
+        return row_representation(serializer_class)
+    except NotCompilable:
+        return None
+
+
+def _converter(field, model_field):
+    """Return a function converting non-null values like field, or None"""
+    for field_class, model_field_classes in IDENTITY_FIELDS:
+        if isinstance(field, field_class) and isinstance(model_field, model_field_classes):
+            return None
+    if isinstance(field, serializers.DecimalField):
+        return _decimal_converter(field)
+    return field.to_representation
+
+
+def _decimal_converter(field):
+    coerce_to_string = getattr(
+        field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING
+    )
+    if not coerce_to_string or field.localize or field.decimal_places is None:
+        return field.to_representation
+    exponent = -field.decimal_places
+
+    def convert(value):
+        # Databases return the column's scale, which quantizing keeps
+        if isinstance(value, Decimal) and value.as_tuple().exponent == exponent:
+            return '{0:f}'.format(value)
+        return field.to_representation(value)
+    return convert
+
+
+class _ColumnStep:
+
+    def __init__(self, column, convert):
+        self.column = column
+        self.convert = convert
+
+    def getter(self, representation, rows, context):
+        if self.convert is None:
+            return itemgetter(self.column)
+        column, convert = self.column, self.convert
+
+        def get(row):
+            value = row[column]
+            return None if value is None else convert(value)
+        return get
+
+
+class _FileStep:
+    """Same as FileField.to_representation, from the stored name"""
+
+    def __init__(self, field, model_field):
+        self.use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+        self.column = model_field.attname
+        self.storage = model_field.storage
+
+    def getter(self, representation, rows, context):
+        column, storage = self.column, self.storage
+        request = context.get('request')
+
+        def get(row):
+            name = row[column]
+            if not name:
+                return None
+            if not self.use_url:
+                return name
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+        return get
+
+
+class _PrimaryKeysStep:
+    """Primary keys of the related objects, in primary key order"""
+
+    def __init__(self, model_field):
+        self.through = model_field.remote_field.through
+        self.source = model_field.m2m_field_name() + '_id'
+        self.target = model_field.m2m_reverse_field_name() + '_id'
+
+    def getter(self, representation, rows, context):
+        related = defaultdict(list)
+        links = self.through.objects.filter(
+            **{self.source + '__in': [row[representation.pk] for row in rows]}
+        ).order_by(self.target).values_list(self.source, self.target)
+        for source, target in links:
+            related[source].append(target)
+        return lambda row: related[row[representation.pk]]
+
+
+class _NestedStep:
+    """Related objects represented by a nested serializer, in primary key order"""
+
+    def __init__(self, model_field, child):
+        self.related_model = model_field.related_model
+        self.query_name = model_field.related_query_name()
+        self.child = child
+
+    def getter(self, representation, rows, context):
+        related_rows = list(self.related_model.objects.filter(**{
+            self.query_name + '__in': [row[representation.pk] for row in rows]
+        }).order_by(self.child.pk).values(
+            *self.child.columns, _source=models.F(self.query_name)
+        ))
+        related = defaultdict(list)
+        for related_row, item in zip(related_rows, self.child.build(related_rows, context)):
+            related[related_row['_source']].append(item)
+        return lambda row: related[row[representation.pk]]
+
+
+class _CustomStep:
+
+    def __init__(self, field):
+        self.field = field
+
+    def getter(self, representation, rows, context):
+        values = self.field.rows_representation(rows, context)
+        return lambda row: values[row[representation.pk]]
+
+
+class FastReadMixin:
+    """
+    Serve list and retrieve from `values()` rows built by the serializer's
+    RowRepresentation, which skips model instances and the per-field
+    serializer machinery. Serializers with fields that cannot be built
+    from rows, or RECIPE_FAST_READS off, use the regular path.
+    """
+
+    def get_row_representation(self):
+        if not settings.RECIPE_FAST_READS:
+            return None
+        return _optional_row_representation(self.get_serializer_class())
+
+    def list(self, request, *args, **kwargs):
+        representation = self.get_row_representation()
+        if representation is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = representation.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                representation.build(page, self.get_serializer_context())
+            )
+        return Response(
+            representation.build(list(rows), self.get_serializer_context())
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        representation = self.get_row_representation()
+        if representation is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        rows = representation.values(self.filter_queryset(self.get_queryset()))
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            rows, **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        self.check_object_permissions(request, row)
+        return Response(
+            representation.build([row], self.get_serializer_context())[0]
+        )
@@ -0,0 +1,137 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import Count, DecimalField, F, FloatField, Q, Value
+from django.db.models.functions import Cast
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from core.search import SEARCH_CONFIG
+
+
+class RecipeRelationFilter(BaseFilterBackend):
+    """
+    Filter recipes by tag and ingredient ids.
+
+    `?tags=1,2` keeps recipes having any of the tags, `&tags_match=all`
+    keeps recipes having every one of them; `ingredients` works the same
+    way. Matching runs against the M2M join tables in a subquery, so the
+    recipe rows are never multiplied by joins.
+    """
+    MATCH_ANY = 'any'
+    MATCH_ALL = 'all'
+    relations = ('tags', 'ingredients')
+
+    def filter_queryset(self, request, queryset, view):
+        return self.filter_params(queryset, request.query_params)
+
+    def filter_params(self, queryset, params):
+        """Apply the relation filters found in a query params mapping"""
+        for relation in self.relations:
+            ids = self._params_to_ids(params, relation)
+            if not ids:
+                continue
+            mode = self._match_mode(params, relation)
+            if mode == self.MATCH_ALL:
+                queryset = self._filter_all(queryset, relation, ids)
+            else:
+                queryset = self._filter_any(queryset, relation, ids)
+        return queryset
+
+    def _through(self, queryset, relation):
+        field = queryset.model._meta.get_field(relation)
+        return (
+            field.remote_field.through,
+            field.m2m_column_name(),
+            field.m2m_reverse_name(),
+        )
+
+    def _filter_any(self, queryset, relation, ids):
+        # Django 2.1 can only filter on an Exists() annotation compared to
+        # True, which hides the semi-join from the planner. A plain IN
+        # subquery is planned as the same semi-join.
+        through, source, target = self._through(queryset, relation)
+        matches = through.objects.filter(
+            **{target + '__in': ids}
+        ).values(source)
+        return queryset.filter(pk__in=matches)
+
+    def _filter_all(self, queryset, relation, ids):
+        through, source, target = self._through(queryset, relation)
+        matches = through.objects.filter(
+            **{target + '__in': ids}
+        ).values(source).annotate(
+            matched=Count(target)
+        ).filter(matched=len(ids)).values(source)
+        return queryset.filter(pk__in=matches)
+
+    def _params_to_ids(self, params, relation):
+        value = params.get(relation)
+        if not value:
+            return set()
+        try:
+            return {int(str_id) for str_id in value.split(',')}
+        except ValueError:
+            raise ValidationError(
+                {relation: 'Expected a comma separated list of ids.'}
+            )
+
+    def _match_mode(self, params, relation):
+        param = f'{relation}_match'
+        mode = params.get(param, self.MATCH_ANY)
+        if mode not in (self.MATCH_ANY, self.MATCH_ALL):
+            raise ValidationError(
+                {param: f'Expected "{self.MATCH_ANY}" or "{self.MATCH_ALL}".'}
+            )
+        return mode
+
+
+class RecipeSearchFilter(BaseFilterBackend):
+    """
+    Full-text search of recipe titles and tag and ingredient names with
+    `?search=`.
+
+    On PostgreSQL recipes are matched against their stored search vector,
+    which is GIN indexed, and ordered by rank, best match first. Other
+    databases fall back to substring matching of every word. The filter
+    also provides the ordering used by cursor pagination, so ranked pages
+    can be walked with the cursor.
+    """
+    search_param = 'search'
+    rank_ordering = ('-search_rank', 'id')
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+        if connections[queryset.db].vendor == 'postgresql':
+            return self._search_vector(queryset, terms)
+        return self._search_contains(queryset, terms)
+
+    def get_ordering(self, request, queryset, view):
+        if self.get_search_terms(request):
+            return self.rank_ordering
+        return view.paginator.ordering
+
+    def get_search_terms(self, request):
+        return request.query_params.get(self.search_param, '').strip()
+
+    def _search_vector(self, queryset, terms):
+        query = SearchQuery(terms, config=SEARCH_CONFIG)
+        # Ranks are computed as real, which does not round trip exactly
+        # through its text form; a fixed scale numeric keeps the cursor
+        # position equal to the value it was taken from.
+        rank = Cast(
+            SearchRank(F('search_vector'), query),
+            DecimalField(max_digits=12, decimal_places=9)
+        )
+        return queryset.filter(search_vector=query).annotate(search_rank=rank)
+
+    def _search_contains(self, queryset, terms):
+        for word in terms.split():
+            matches = queryset.model.objects.filter(
+                Q(title__icontains=word) |
+                Q(tags__name__icontains=word) |
+                Q(ingredients__name__icontains=word)
+            ).values('pk')
+            queryset = queryset.filter(pk__in=matches)
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
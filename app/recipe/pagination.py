@@ -0,0 +1,140 @@
+from base64 import b64decode
+from urllib import parse
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, Cursor, _reverse_ordering
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Cursor pagination that seeks on every field of a unique ordering.
+
+    DRF's CursorPagination only stores the first ordering field in the
+    cursor and falls back to an OFFSET for ties. Here the cursor keeps a
+    value for each ordering field, so every page is an index range scan
+    that costs the same no matter how deep it is.
+    """
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request, view)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.position_fields = [
+            _ordering_field(queryset, order.lstrip('-')) for order in self.ordering
+        ]
+        self.cursor = self.decode_cursor(request)
+
+        reverse = self.cursor is not None and self.cursor.reverse
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(
+                self._seek_filter(ordering, self.cursor.position)
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        return self.page
+
+    def get_page_size(self, request, view=None):
+        """Allow a view to override the default page size"""
+        default = getattr(view, 'page_size', None)
+        if default is not None:
+            self.page_size = default
+        return super().get_page_size(request)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        position = self._get_position_from_instance(self.page[-1], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        position = self._get_position_from_instance(self.page[0], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+            position = tokens.get('p', [])
+            if len(position) != len(self.ordering):
+                raise ValueError('One position per ordering field expected')
+            # Tampered values must not reach the seek filter
+            position = [
+                field.to_python(value)
+                for field, value in zip(self.position_fields, position)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return Cursor(offset=0, reverse=reverse, position=position)
+
+    def _get_position_from_instance(self, instance, ordering):
+        position = []
+        for order in ordering:
+            field_name = order.lstrip('-')
+            if isinstance(instance, dict):
+                attr = instance[field_name]
+            else:
+                attr = getattr(instance, field_name)
+            position.append(str(attr))
+        return position
+
+    def _seek_filter(self, ordering, position):
+        """
+        Build the row comparison `(a, b, c) > (x, y, z)` for the ordering,
+        honouring the direction of every field.
+        """
+        seek = Q()
+        equal = {}
+        for order, value in zip(ordering, position):
+            field_name = order.lstrip('-')
+            lookup = '__lt' if order.startswith('-') else '__gt'
+            seek |= Q(**equal, **{field_name + lookup: value})
+            equal[field_name] = value
+        return seek
+
+
+def _ordering_field(queryset, name):
+    """The model field or annotation a queryset is ordered by"""
+    annotation = queryset.query.annotations.get(name)
+    if annotation is not None:
+        return annotation.output_field
+    return queryset.model._meta.get_field(name)
+
+
+class RecipeAttrPagination(KeysetCursorPagination):
+    """Paginate tags and ingredients by name"""
+    ordering = ('-name', 'id')
+
+
+class RecipePagination(KeysetCursorPagination):
+    """Paginate recipes in creation order"""
+    ordering = ('id',)
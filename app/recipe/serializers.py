@@ -1,9 +1,35 @@
+from collections import defaultdict
+
+from django.conf import settings
 from rest_framework import serializers
 
-from core.models import Tag, Ingredient, Recipe
+from core.models import Tag, Ingredient, Recipe, ImageDerivative
+from core.performance import TimedSerializerMixin
+from recipe.fastread import row_representation
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key field that resolves ids from objects preloaded into the
+    serializer context, so validating many objects does not cost one
+    query per id. Without preloaded objects it queries as usual.
+    """
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get('related_objects', {}).get(
+            self.get_queryset().model
+        )
+        if preloaded is None:
+            return super().to_internal_value(data)
+        try:
+            return preloaded[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Tag objects"""
 
     class Meta:
@@ -12,7 +38,7 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ("id",)
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Ingredient objects"""
 
     class Meta:
@@ -21,13 +47,13 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ("id",)
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serialize a recipe"""
-    ingredients = serializers.PrimaryKeyRelatedField(
+    ingredients = PreloadedPrimaryKeyRelatedField(
         many=True,
         queryset=Ingredient.objects.all()
     )
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = PreloadedPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all()
     )
@@ -41,14 +67,94 @@ class RecipeSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
+class ImageDerivativeSerializer(serializers.ModelSerializer):
+    """Serialize a resized copy of a recipe image"""
+    url = serializers.ImageField(source='file', read_only=True)
+
+    class Meta:
+        model = ImageDerivative
+        fields = ('name', 'format', 'width', 'height', 'url')
+        read_only_fields = fields
+
+
+class ImageDerivativesField(serializers.Field):
+    """Read only list of the derivatives of a recipe's current image"""
+    row_columns = ('image',)
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, recipe):
+        derivatives = [
+            derivative for derivative in recipe.image_derivatives.all()
+            if recipe.image and derivative.source == recipe.image.name
+        ]
+        return ImageDerivativeSerializer(
+            derivatives,
+            many=True,
+            context=self.context
+        ).data
+
+    def rows_representation(self, rows, context):
+        """Derivatives by recipe id of recipe rows, for RowRepresentation"""
+        images = {row['id']: row['image'] for row in rows if row['image']}
+        representation = row_representation(ImageDerivativeSerializer)
+        derivatives = [
+            derivative for derivative in ImageDerivative.objects.filter(
+                recipe_id__in=images
+            ).order_by('id').values('recipe_id', 'source', *representation.columns)
+            if derivative['source'] == images[derivative['recipe_id']]
+        ]
+        by_recipe = defaultdict(list)
+        items = representation.build(derivatives, context)
+        for derivative, item in zip(derivatives, items):
+            by_recipe[derivative['recipe_id']].append(item)
+        return by_recipe
+
+
 class RecipeDetailSerializer(RecipeSerializer):
     tags = TagSerializer(many=True, read_only=True)
     ingredients = IngredientSerializer(many=True, read_only=True)
+    image = serializers.ImageField(read_only=True)
+    image_derivatives = ImageDerivativesField()
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ('image', 'image_derivatives')
 
 
-class RecipeImageSerializer(serializers.ModelSerializer):
+class RecipeImageSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    image_status = serializers.SerializerMethodField()
+    image_derivatives = ImageDerivativesField()
 
     class Meta:
         model = Recipe
-        fields = ('id', 'image')
+        fields = ('id', 'image', 'image_status', 'image_derivatives')
         read_only_fields = ('id',)
+
+    def validate_image(self, image):
+        """
+        Check the format and dimensions Pillow read from the image header
+        while validating the field; no pixel data has been decoded.
+        """
+        header = image.image
+        if header.format not in settings.RECIPE_IMAGE_FORMATS:
+            raise serializers.ValidationError(
+                f'Unsupported image format {header.format}.'
+            )
+        width, height = header.size
+        if width * height > settings.RECIPE_IMAGE_MAX_PIXELS:
+            raise serializers.ValidationError(
+                f'Images may have at most {settings.RECIPE_IMAGE_MAX_PIXELS} pixels.'
+            )
+        return image
+
+    def get_image_status(self, recipe):
+        """Status of the derivative job of the current image"""
+        if not recipe.image:
+            return None
+        job = recipe.image_jobs.filter(
+            source=recipe.image.name
+        ).order_by('-id').first()
+        return job.status if job else None
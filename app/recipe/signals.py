@@ -0,0 +1,92 @@
+from django.conf import settings
+from django.utils import timezone
+from django.dispatch import receiver
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
+
+from core.models import Tag, Ingredient, Recipe
+from core.search import update_search_vectors
+from recipe.cache import bump_user_version
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+def invalidate_owner_cache(sender, instance, **kwargs):
+    """Invalidate the cached responses of the object owner"""
+    bump_user_version(instance.user_id)
+
+
+@receiver(post_save, sender=Recipe)
+def index_saved_recipe(sender, instance, **kwargs):
+    """Recompute the search vector of a saved recipe"""
+    update_search_vectors(Recipe.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def touch_recipes_of_saved_relation(sender, instance, created, **kwargs):
+    """Mark recipes as modified when one of their tags or ingredients changes"""
+    if not created:
+        _touch_recipes(**{_relation(sender): instance})
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=Ingredient)
+def remember_recipes_of_deleted_relation(sender, instance, **kwargs):
+    """Remember the recipes of a tag or ingredient before it is removed"""
+    instance._linked_recipe_ids = _recipe_ids(**{_relation(sender): instance})
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def touch_recipes_of_deleted_relation(sender, instance, **kwargs):
+    """Mark the recipes of a removed tag or ingredient as modified"""
+    _touch_recipes(pk__in=getattr(instance, '_linked_recipe_ids', []))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def invalidate_relation_cache(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Mark recipes as modified and invalidate cached responses when recipe
+    relations change. Recipes are touched before the cache version is
+    bumped, so validators cached under the new version are never stale.
+    """
+    if reverse:
+        if action == 'pre_clear':
+            relation = 'tags' if sender is Recipe.tags.through else 'ingredients'
+            instance._cleared_recipe_ids = _recipe_ids(**{relation: instance})
+        elif action == 'post_clear':
+            _touch_recipes(pk__in=getattr(instance, '_cleared_recipe_ids', []))
+        elif action in ('post_add', 'post_remove'):
+            _touch_recipes(pk__in=pk_set)
+    elif action.startswith('post_'):
+        _touch_recipes(pk=instance.pk)
+
+    if action.startswith('post_'):
+        bump_user_version(instance.user_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_cache(sender, instance, **kwargs):
+    """Give a saved user a fresh cache namespace"""
+    bump_user_version(instance.pk)
+
+
+def _relation(sender):
+    return 'tags' if sender is Tag else 'ingredients'
+
+
+def _recipe_ids(**filters):
+    return list(Recipe.objects.filter(**filters).values_list('pk', flat=True))
+
+
+def _touch_recipes(**filters):
+    """Mark recipes as modified and recompute their search vectors"""
+    update_search_vectors(
+        Recipe.objects.filter(**filters),
+        updated_at=timezone.now()
+    )
@@ -0,0 +1,306 @@
+from django.urls import reverse
+from django.test import TestCase, skipUnlessDBFeature
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from core.testing import QueryBudgetMixin
+
+TAGS_BULK_URL = reverse("recipe:tag-bulk")
+RECIPES_BULK_URL = reverse("recipe:recipe-bulk")
+RECIPES_URL = reverse("recipe:recipe-list")
+
+
+def sample_recipe(user, **params):
+    default = {
+        'title': "New recipe",
+        'time_minutes': 10,
+        'price': 4.00
+    }
+    default.update(params)
+
+    return Recipe.objects.create(user=user, **default)
+
+
+class BulkApiTests(QueryBudgetMixin, TestCase):
+    """Test the bulk create, update and delete endpoints"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "bulk@mail.com",
+            "testpass"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_tags(self):
+        """Test creating several tags in one request"""
+        payload = [{"name": "Vegan"}, {"name": "Quick"}]
+
+        res = self.client.post(TAGS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([tag["name"] for tag in res.data], ["Vegan", "Quick"])
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_create_reports_item_errors(self):
+        """Test that one invalid item rejects the whole batch"""
+        payload = [{"name": "Vegan"}, {"name": ""}]
+
+        res = self.client.post(TAGS_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["errors"][0], {})
+        self.assertIn("name", res.data["errors"][1])
+        self.assertFalse(Tag.objects.exists())
+
+    def test_bulk_requires_list(self):
+        """Test that a single object is rejected"""
+        res = self.client.post(TAGS_BULK_URL, {"name": "Vegan"}, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_recipes_with_relations(self):
+        """Test that relations of bulk created recipes are linked"""
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=f"Ing {i}")
+            for i in range(3)
+        ]
+        payload = [
+            {
+                "title": f"Recipe {i}",
+                "time_minutes": 10,
+                "price": "5.00",
+                "tags": [tag.id],
+                "ingredients": [ingredient.id for ingredient in ingredients],
+            }
+            for i in range(20)
+        ]
+
+        res = self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 20)
+        recipes = Recipe.objects.filter(user=self.user)
+        self.assertEqual(recipes.count(), 20)
+        for recipe in recipes:
+            self.assertEqual(list(recipe.tags.all()), [tag])
+            self.assertEqual(recipe.ingredients.count(), 3)
+
+    # Elsewhere recipes are inserted one by one to learn their ids
+    @skipUnlessDBFeature('can_return_ids_from_bulk_insert')
+    def test_bulk_create_recipes_query_count_is_constant(self):
+        """Test that bulk creating does not query per recipe or relation"""
+        tags = [Tag.objects.create(user=self.user, name=f"Tag {i}") for i in range(3)]
+        ingredient = Ingredient.objects.create(user=self.user, name="Rice")
+        payload = []
+
+        def add_items(count):
+            payload.extend(
+                {
+                    "title": f"Recipe {len(payload) + i}",
+                    "time_minutes": 10,
+                    "price": "5.00",
+                    "tags": [tag.id for tag in tags],
+                    "ingredients": [ingredient.id],
+                }
+                for i in range(count)
+            )
+
+        small, large = self.assertConstantQueries(
+            add_items,
+            lambda: self.client.post(RECIPES_BULK_URL, payload, format='json'),
+            budget=11
+        )
+
+        self.assertEqual(large.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(large.data), 10)
+
+    def test_bulk_create_recipes_unknown_relation(self):
+        """Test that unknown related ids are reported per item"""
+        payload = [{
+            "title": "Recipe",
+            "time_minutes": 10,
+            "price": "5.00",
+            "tags": [999],
+            "ingredients": [],
+        }]
+
+        res = self.client.post(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("tags", res.data["errors"][0])
+
+    def test_related_ids_that_are_not_integers(self):
+        """Test that digits int() cannot read are reported, not a crash"""
+        payload = {
+            "title": "Recipe",
+            "time_minutes": 10,
+            "price": "5.00",
+            "tags": ["\u00b2"],
+            "ingredients": [],
+        }
+
+        single = self.client.post(RECIPES_URL, payload, format='json')
+        bulk = self.client.post(RECIPES_BULK_URL, [payload], format='json')
+
+        self.assertEqual(single.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("tags", single.data)
+        self.assertEqual(bulk.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("tags", bulk.data["errors"][0])
+
+    def test_bulk_update_recipes(self):
+        """Test updating fields and relations of several recipes"""
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        recipe1 = sample_recipe(self.user, title="One")
+        recipe2 = sample_recipe(self.user, title="Two")
+        recipe2.tags.add(Tag.objects.create(user=self.user, name="Old"))
+        payload = [
+            {"id": recipe1.id, "title": "First", "price": "7.50"},
+            {"id": recipe2.id, "tags": [tag.id]},
+        ]
+
+        res = self.client.patch(RECIPES_BULK_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe1.refresh_from_db()
+        recipe2.refresh_from_db()
+        self.assertEqual(recipe1.title, "First")
+        self.assertEqual(str(recipe1.price), "7.50")
+        self.assertEqual(recipe2.title, "Two")
+        self.assertEqual(list(recipe2.tags.all()), [tag])
+
+    def test_bulk_update_recipes_query_count_is_constant(self):
+        """Test that bulk updating does not query per recipe or relation"""
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        payload = []
+
+        def add_items(count):
+            payload.extend(
+                {"id": sample_recipe(self.user).id, "title": "Updated", "tags": [tag.id]}
+                for _ in range(count)
+            )
+
+        small, large = self.assertConstantQueries(
+            add_items,
+            lambda: self.client.patch(RECIPES_BULK_URL, payload, format='json'),
+            budget=11
+        )
+
+        self.assertEqual(large.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(large.data), 10)
+
+    def test_bulk_update_unknown_id(self):
+        """Test that updating another user's recipe is reported"""
+        other = get_user_model().objects.create_user(
+            "other@mail.com",
+            "testpass"
+        )
+        recipe = sample_recipe(other)
+
+        res = self.client.patch(
+            RECIPES_BULK_URL,
+            [{"id": recipe.id, "title": "Mine"}],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("id", res.data["errors"][0])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.title, "New recipe")
+
+    def test_bulk_delete_recipes(self):
+        """Test deleting several recipes in one request"""
+        recipes = [sample_recipe(self.user) for _ in range(3)]
+
+        res = self.client.delete(
+            RECIPES_BULK_URL,
+            [recipes[0].id, recipes[1].id],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(
+            list(Recipe.objects.values_list('id', flat=True)),
+            [recipes[2].id]
+        )
+
+    def test_bulk_delete_recipes_query_count_is_constant(self):
+        """Test that bulk deleting does not query per recipe or relation"""
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        ids = []
+
+        def add_recipes(count):
+            for _ in range(count):
+                recipe = sample_recipe(self.user)
+                recipe.tags.add(tag)
+                ids.append(recipe.id)
+
+        def delete():
+            payload, ids[:] = list(ids), []
+            return self.client.delete(RECIPES_BULK_URL, payload, format='json')
+
+        small, large = self.assertConstantQueries(add_recipes, delete, budget=8)
+
+        self.assertEqual(large.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Recipe.objects.exists())
+        self.assertEqual(list(Tag.objects.all()), [tag])
+
+    def test_bulk_delete_tags_query_count_is_constant(self):
+        """Test that bulk deleting tags touches their recipes in bulk"""
+        recipe = sample_recipe(self.user)
+        ids = []
+
+        def add_tags(count):
+            tags = [
+                Tag.objects.create(user=self.user, name=f"Tag {len(ids) + i}")
+                for i in range(count)
+            ]
+            recipe.tags.add(*tags)
+            ids.extend(tag.id for tag in tags)
+
+        def delete():
+            payload, ids[:] = list(ids), []
+            return self.client.delete(TAGS_BULK_URL, payload, format='json')
+
+        updated_at = Recipe.objects.get(pk=recipe.pk).updated_at
+        small, large = self.assertConstantQueries(add_tags, delete, budget=7)
+
+        self.assertEqual(large.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Tag.objects.exists())
+        recipe.refresh_from_db()
+        self.assertEqual(list(recipe.tags.all()), [])
+        self.assertGreater(recipe.updated_at, updated_at)
+
+    def test_bulk_ids_are_not_booleans(self):
+        """Test that true and false are not taken for ids 1 and 0"""
+        recipe = sample_recipe(self.user)
+        Recipe.objects.filter(pk=recipe.pk).update(id=1)
+
+        res = self.client.delete(RECIPES_BULK_URL, [True], format='json')
+        patched = self.client.patch(
+            RECIPES_BULK_URL,
+            [{"id": True, "title": "Mine"}],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(patched.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue(Recipe.objects.filter(pk=1).exists())
+
+    def test_bulk_delete_unknown_id(self):
+        """Test that nothing is deleted when an id is unknown"""
+        recipe = sample_recipe(self.user)
+
+        res = self.client.delete(
+            RECIPES_BULK_URL,
+            [recipe.id, recipe.id + 100],
+            format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["errors"][0], {})
+        self.assertTrue(Recipe.objects.filter(id=recipe.id).exists())
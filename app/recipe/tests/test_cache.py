@@ -0,0 +1,116 @@
+from django.urls import reverse
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe import cache as recipe_cache
+
+RECIPE_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+def sample_recipe(user, **params):
+    default = {
+        'title': "New recipe",
+        'time_minutes': 10,
+        'price': 4.00
+    }
+    default.update(params)
+
+    return Recipe.objects.create(user=user, **default)
+
+
+class ResponseCacheTests(TestCase):
+    """Test the per-user list response cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "cache@mail.com",
+            "testpass"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_served_from_cache(self):
+        """Test that a repeated list request does not hit the database"""
+        sample_recipe(self.user)
+        first = self.client.get(RECIPE_URL)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(RECIPE_URL)
+
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data, second.data)
+
+    @override_settings(CACHE_SHARED=False)
+    def test_not_cached_when_cache_not_shared(self):
+        """Test that lists are not cached in a cache other processes miss"""
+        sample_recipe(self.user)
+        self.client.get(RECIPE_URL)
+        # Written by another process, which cannot bump this one's version
+        Recipe.objects.filter(user=self.user).update(title="Changed")
+
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.data['results'][0]['title'], "Changed")
+
+    def test_query_params_are_cached_separately(self):
+        """Test that different query strings get their own entries"""
+        sample_recipe(self.user, title="First")
+        sample_recipe(self.user, title="Second")
+        self.client.get(RECIPE_URL)
+
+        res = self.client.get(RECIPE_URL, {'page_size': 1})
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_api_write_invalidates_cache(self):
+        """Test that creating a recipe through the API invalidates lists"""
+        self.client.get(RECIPE_URL)
+        payload = {'title': "Soup", 'time_minutes': 5, 'price': 1.00}
+        self.client.post(RECIPE_URL, payload)
+
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_model_write_invalidates_cache(self):
+        """Test that writes outside the API invalidate lists too"""
+        recipe = sample_recipe(self.user)
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        self.client.get(RECIPE_URL)
+        self.client.get(TAGS_URL)
+
+        recipe.tags.add(tag)
+        res = self.client.get(RECIPE_URL)
+        self.assertEqual(res.data['results'][0]['tags'], [tag.id])
+
+        tag.delete()
+        res = self.client.get(TAGS_URL)
+        self.assertEqual(res.data['results'], [])
+
+    def test_cache_is_per_user(self):
+        """Test that users never see each other's cached lists"""
+        sample_recipe(self.user)
+        self.client.get(RECIPE_URL)
+        other = get_user_model().objects.create_user(
+            "other@mail.com",
+            "testpass"
+        )
+        self.client.force_authenticate(other)
+
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.data['results'], [])
+
+    def test_bump_user_version(self):
+        """Test that bumping a version changes the cache keys"""
+        version = recipe_cache.get_user_version(self.user.pk)
+        recipe_cache.bump_user_version(self.user.pk)
+
+        self.assertGreater(recipe_cache.get_user_version(self.user.pk), version)
@@ -0,0 +1,161 @@
+import time
+
+from django.urls import reverse
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from django.utils.http import http_date
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+
+RECIPE_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+TAGS_BULK_URL = reverse("recipe:tag-bulk")
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+def sample_recipe(user, **params):
+    default = {
+        'title': "New recipe",
+        'time_minutes': 10,
+        'price': 4.00
+    }
+    default.update(params)
+
+    return Recipe.objects.create(user=user, **default)
+
+
+class ConditionalListTests(TestCase):
+    """Test conditional GET support on list endpoints"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            "etag@mail.com",
+            "testpass"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = sample_recipe(self.user)
+
+    def test_list_has_etag(self):
+        """Test that list responses carry an ETag but no Last-Modified"""
+        res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.has_header('ETag'))
+        self.assertFalse(res.has_header('Last-Modified'))
+
+    def test_if_none_match_not_modified(self):
+        """Test that an unchanged list is answered with 304"""
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
+
+    def test_if_modified_since_ignored(self):
+        """Test that If-Modified-Since alone never answers 304"""
+        res = self.client.get(
+            TAGS_URL,
+            HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_query_string_changes_etag(self):
+        """Test that different pages of the same list differ in ETag"""
+        first = self.client.get(RECIPE_URL)['ETag']
+        second = self.client.get(RECIPE_URL, {'page_size': 1})['ETag']
+
+        self.assertNotEqual(first, second)
+
+    def test_relation_change_modifies_list(self):
+        """Test that adding a tag to a recipe changes the list ETag"""
+        etag = self.client.get(RECIPE_URL)['ETag']
+        self.recipe.tags.add(Tag.objects.create(user=self.user, name="Vegan"))
+
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_deleted_tag_modifies_recipe_list(self):
+        """Test that deleting a tag changes the list of its recipes"""
+        tag = Tag.objects.create(user=self.user, name="Vegan")
+        self.recipe.tags.add(tag)
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        tag.delete()
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['tags'], [])
+
+    def test_deleted_recipe_modifies_list(self):
+        """Test that deleting a recipe changes the list ETag"""
+        sample_recipe(self.user, title="Other")
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        self.recipe.delete()
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_bulk_deleted_older_tag_modifies_list(self):
+        """Test that bulk deleting a tag older than the others changes the ETag"""
+        older = Tag.objects.create(user=self.user, name="Older")
+        Tag.objects.create(user=self.user, name="Newer")
+        etag = self.client.get(TAGS_URL)['ETag']
+
+        self.client.delete(TAGS_BULK_URL, [older.id], format='json')
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_deleted_older_recipe_modifies_list(self):
+        """Test that deleting a recipe older than the others changes the ETag"""
+        sample_recipe(self.user, title="Newer")
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        self.client.delete(detail_url(self.recipe.id))
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_update_within_the_same_second_modifies_list(self):
+        """Test that consecutive writes within a second change the ETag"""
+        self.client.patch(detail_url(self.recipe.id), {'title': "First"})
+        etag = self.client.get(RECIPE_URL)['ETag']
+
+        self.client.patch(detail_url(self.recipe.id), {'title': "Second"})
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['title'], "Second")
+
+    @override_settings(CACHE_SHARED=False)
+    def test_write_of_another_process_modifies_list(self):
+        """Test validators are not cached when the cache is not shared"""
+        etag = self.client.get(RECIPE_URL)['ETag']
+        # Skips the signals, as a write in another process would
+        Recipe.objects.filter(pk=self.recipe.pk).update(
+            title="Changed", updated_at=timezone.now()
+        )
+
+        res = self.client.get(RECIPE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['title'], "Changed")
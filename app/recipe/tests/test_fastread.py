@@ -0,0 +1,111 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient, ImageDerivative
+from recipe.fastread import NotCompilable, row_representation
+from recipe.serializers import RecipeImageSerializer
+
+RECIPE_URL = reverse("recipe:recipe-list")
+TAGS_URL = reverse("recipe:tag-list")
+
+
+def detail_url(recipe_id):
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class FastReadTests(TestCase):
+    """Test that row built responses are the serialized ones, byte for byte"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "fast@mail.com",
+            "testpass"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ("Végétarien", "Quick", "Line\u2028break", "Spicy")
+        ]
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ("Rice", "Tomato", "Crème fraîche")
+        ]
+        self.recipes = []
+        for i in range(5):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f"Tomato stew {i} «maison»",
+                time_minutes=10 * i,
+                price=[4, "12.5", "0.99", "999.10", 0][i],
+                link="https://example.com/" if i % 2 else "",
+            )
+            # Added out of primary key order
+            recipe.tags.add(*reversed(tags[:i]))
+            recipe.ingredients.add(*ingredients[i % 3:])
+            self.recipes.append(recipe)
+
+    def assertSameResponse(self, url, params=None):
+        cache.clear()
+        with override_settings(RECIPE_FAST_READS=False):
+            expected = self.client.get(url, params)
+        cache.clear()
+        res = self.client.get(url, params)
+
+        self.assertEqual(res.status_code, expected.status_code)
+        self.assertEqual(res.content, expected.content)
+        return res
+
+    def test_recipe_list(self):
+        """Test recipe list pages, filters and search"""
+        res = self.assertSameResponse(RECIPE_URL, {'page_size': 2})
+        self.assertSameResponse(res.data['next'])
+
+        tag = Tag.objects.get(name="Quick")
+        self.assertSameResponse(RECIPE_URL, {'tags': tag.id})
+        self.assertSameResponse(RECIPE_URL, {'search': 'tomato', 'page_size': 2})
+        self.assertSameResponse(RECIPE_URL, {'tags': 'abc'})
+
+    def test_recipe_detail(self):
+        """Test recipe detail with its image and derivatives"""
+        recipe = self.recipes[3]
+        source = 'uploads/recipe/ab/cd/abcd.jpg'
+        Recipe.objects.filter(pk=recipe.pk).update(image=source)
+        for name, fmt, image_source in (
+            ('thumbnail', 'jpeg', source),
+            ('medium', 'jpeg', source),
+            ('thumbnail', 'webp', 'uploads/recipe/old.jpg'),
+        ):
+            ImageDerivative.objects.create(
+                recipe=recipe, source=image_source, name=name, format=fmt,
+                file=f'derivatives/{name}.{fmt}', width=200, height=200,
+            )
+
+        res = self.assertSameResponse(detail_url(recipe.id))
+        self.assertEqual(len(res.data['image_derivatives']), 2)
+        self.assertSameResponse(detail_url(self.recipes[0].id))
+        self.assertSameResponse(detail_url(0))
+
+    def test_tag_list(self):
+        """Test tag list pages"""
+        res = self.assertSameResponse(TAGS_URL, {'page_size': 2})
+        self.assertSameResponse(res.data['next'])
+
+    def test_list_query_count(self):
+        """Test that rows are built with one query per relation"""
+        cache.clear()
+        with self.assertNumQueries(4):
+            res = self.client.get(RECIPE_URL)
+
+        self.assertEqual(len(res.data['results']), 5)
+        # Serializers return ordered dicts
+        self.assertIs(type(res.data['results'][0]), dict)
+
+    def test_serializer_without_row_equivalent(self):
+        """Test that serializers with method fields are not compiled"""
+        with self.assertRaises(NotCompilable):
+            row_representation(RecipeImageSerializer)
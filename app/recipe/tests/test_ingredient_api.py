@@ -1,3 +1,4 @@
+from django.db import connection
 from django.urls import reverse
 from django.test import TestCase
 from django.contrib.auth import get_user_model
@@ -6,11 +7,23 @@ from rest_framework import status
 from rest_framework.test import APIClient
 
 from core.models import Ingredient
+from core.testing import QueryBudgetMixin
 from recipe.serializers import IngredientSerializer
+from recipe.typeahead import trigram_installed
 
 INGREDIENT_URL = reverse("recipe:ingredient-list")
 
 
+def typeahead_budget():
+    """
+    Queries of an autocompletion: the list validators and the search, which
+    with pg_trgm also sets its timeout in a savepoint that is rolled back
+    """
+    if connection.vendor == 'postgresql' and trigram_installed(connection):
+        return 5
+    return 2
+
+
 class PublicIngredientApiTests(TestCase):
     """Test public ingredient API"""
 
@@ -24,7 +37,7 @@ class PublicIngredientApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateIngredientsApiTests(TestCase):
+class PrivateIngredientsApiTests(QueryBudgetMixin, TestCase):
     """Test private ingredients API"""
 
     def setUp(self):
@@ -46,7 +59,7 @@ class PrivateIngredientsApiTests(TestCase):
         res = self.client.get(INGREDIENT_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_ingredient_limited_to_the_specific_user(self):
         """Test that ingredients are shown per specific user"""
@@ -61,8 +74,8 @@ class PrivateIngredientsApiTests(TestCase):
         res = self.client.get(INGREDIENT_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]["name"], ingredient.name)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(res.data["results"][0]["name"], ingredient.name)
 
     def test_create_ingredient_success(self):
         """Test successful ingredient creation"""
@@ -83,3 +96,38 @@ class PrivateIngredientsApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_ingredients_typeahead(self):
+        """Test autocompleting ingredient names"""
+        Ingredient.objects.create(user=self.user, name="Cherry tomato")
+        Ingredient.objects.create(user=self.user, name="Tomato")
+        Ingredient.objects.create(user=self.user, name="Kale")
+
+        res = self.client.get(INGREDIENT_URL, {"q": "tom"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [ingredient["name"] for ingredient in res.data],
+            ["Tomato", "Cherry tomato"]
+        )
+
+    def test_ingredients_query_budget(self):
+        """Test listing, autocompleting and creating ingredients within a query budget"""
+        def create(count):
+            start = Ingredient.objects.filter(user=self.user).count()
+            for i in range(start, start + count):
+                Ingredient.objects.create(user=self.user, name=f"Spicy {i}")
+
+        small, large = self.assertConstantQueries(
+            create, lambda: self.client.get(INGREDIENT_URL), budget=2
+        )
+        self.assertEqual(len(large.data["results"]), 10)
+
+        # The first autocompletion checks once whether pg_trgm is installed
+        self.client.get(INGREDIENT_URL, {"q": "spicy"})
+        self.assertConstantQueries(
+            create, lambda: self.client.get(INGREDIENT_URL, {"q": "spicy"}),
+            budget=typeahead_budget()
+        )
+        with self.assertMaxQueries(1):
+            res = self.client.post(INGREDIENT_URL, {"name": "Sweet"})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
@@ -1,7 +1,14 @@
 import os
+import csv
+import json
 import tempfile
+from base64 import b64encode
+from io import StringIO
+from unittest.mock import patch
 from PIL import Image
+from django.db import connection
 from django.urls import reverse
+from django.core.management import call_command
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -9,9 +16,18 @@ from rest_framework import status
 from rest_framework.test import APIClient
 
 from core.models import Recipe, Tag, Ingredient
+from core.testing import QueryBudgetMixin
+from core.uploads import media_temp_dir
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
+from recipe.views import RecipeViewSet
 
 RECIPE_URL = reverse("recipe:recipe-list")
+EXPORT_URL = reverse("recipe:recipe-export")
+
+# Writes set both relations and refresh the search vector on each change
+MAX_RECIPE_CREATE_QUERIES = 14
+MAX_RECIPE_UPDATE_QUERIES = 15
+MAX_IMAGE_UPLOAD_QUERIES = 8
 
 
 def image_upload_url(recipe_id):
@@ -53,7 +69,7 @@ class PublicRecipeApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateRecipeApiTests(TestCase):
+class PrivateRecipeApiTests(QueryBudgetMixin, TestCase):
     """Test authenticated user recipe API"""
 
     def setUp(self):
@@ -71,10 +87,10 @@ class PrivateRecipeApiTests(TestCase):
 
         res = self.client.get(RECIPE_URL)
 
-        recipes = Recipe.objects.all()
+        recipes = Recipe.objects.all().order_by('id')
         serializer = RecipeSerializer(recipes, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipe_limited_to_user(self):
         """Test that recipes list is shown only to the owner"""
@@ -86,12 +102,272 @@ class PrivateRecipeApiTests(TestCase):
         sample_recipe(self.user, title="BestRecipe")
         res = self.client.get(RECIPE_URL)
 
-        recipes = Recipe.objects.filter(user=self.user)
+        recipes = Recipe.objects.filter(user=self.user).order_by('id')
         serializer = RecipeSerializer(recipes, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'], serializer.data)
+
+    def _create_tagged_recipes(self, count):
+        tag = sample_tag(self.user)
+        ingredient = sample_ingredient(self.user)
+        for _ in range(count):
+            recipe = sample_recipe(self.user)
+            recipe.tags.add(tag)
+            recipe.ingredients.add(ingredient)
+
+    def test_list_recipes_query_count_is_constant(self):
+        """Test that listing recipes does not query per recipe"""
+        small, large = self.assertConstantQueries(
+            self._create_tagged_recipes,
+            lambda: self.client.get(RECIPE_URL),
+            budget=4,
+            size=2
+        )
+
+        self.assertEqual(len(small.data['results']), 2)
+        self.assertEqual(len(large.data['results']), 20)
+
+    def test_filter_recipes_query_count_is_constant(self):
+        """Test that filtering recipes does not query per recipe"""
+        tag = sample_tag(self.user, 'Vegan')
+        ingredient = sample_ingredient(self.user, 'Rice')
+
+        def create(count):
+            for _ in range(count):
+                recipe = sample_recipe(self.user)
+                recipe.tags.add(tag)
+                recipe.ingredients.add(ingredient)
+
+        for params in ({'tags': tag.id}, {'ingredients': ingredient.id},
+                       {'tags': tag.id, 'tags_match': 'all'}):
+            Recipe.objects.filter(user=self.user).delete()
+            self.assertConstantQueries(
+                create, lambda: self.client.get(RECIPE_URL, params), budget=4
+            )
+
+    def test_search_recipes_query_count_is_constant(self):
+        """Test that searching recipes does not query per result"""
+        tag = sample_tag(self.user, 'Tomato')
+
+        def create(count):
+            for _ in range(count):
+                sample_recipe(self.user, title='Tomato soup').tags.add(tag)
+
+        small, large = self.assertConstantQueries(
+            create,
+            lambda: self.client.get(RECIPE_URL, {'search': 'tomato'}),
+            budget=4
+        )
+
+        self.assertEqual(len(large.data['results']), 10)
+
+    def test_view_recipe_detail_query_count(self):
+        """Test that recipe detail loads nested objects in bulk"""
+        recipe = sample_recipe(self.user)
+
+        def add_relations(count):
+            start = recipe.tags.count()
+            for i in range(start, start + count):
+                recipe.tags.add(sample_tag(self.user, name=f'Tag {i}'))
+                recipe.ingredients.add(sample_ingredient(self.user, f'Ing {i}'))
+
+        small, large = self.assertConstantQueries(
+            add_relations,
+            lambda: self.client.get(detail_url(recipe.id)),
+            budget=4
+        )
+
+        self.assertEqual(len(large.data['tags']), 10)
+        self.assertEqual(len(large.data['ingredients']), 10)
+
+    def test_write_recipe_query_count_is_constant(self):
+        """Test that writing relations does not query per related object"""
+        recipe = sample_recipe(self.user)
+        tags, ingredients = [], []
+
+        def create_relations(count):
+            for _ in range(count):
+                tags.append(sample_tag(self.user, f'Tag {len(tags)}').id)
+                ingredients.append(
+                    sample_ingredient(self.user, f'Ing {len(ingredients)}').id
+                )
+
+        def payload():
+            return {'title': 'Stew', 'time_minutes': 60, 'price': '8.00',
+                    'tags': tags, 'ingredients': ingredients}
+
+        self.assertConstantQueries(
+            create_relations,
+            lambda: self.client.post(RECIPE_URL, payload(), format='json'),
+            budget=MAX_RECIPE_CREATE_QUERIES
+        )
+        tags.clear()
+        ingredients.clear()
+        self.assertConstantQueries(
+            create_relations,
+            lambda: self.client.put(detail_url(recipe.id), payload(), format='json'),
+            budget=MAX_RECIPE_UPDATE_QUERIES
+        )
+        with self.assertMaxQueries(MAX_RECIPE_UPDATE_QUERIES):
+            res = self.client.patch(detail_url(recipe.id), {'title': 'Soup'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(recipe.tags.count(), 10)
+
+    def test_recipes_are_paginated_by_cursor(self):
+        """Test walking recipe pages with the next and previous cursors"""
+        recipes = [sample_recipe(self.user, title=f'R{i}') for i in range(5)]
+
+        res = self.client.get(RECIPE_URL, {'page_size': 2})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [recipes[0].id, recipes[1].id]
+        )
+        self.assertIsNone(res.data['previous'])
+
+        seen = []
+        url = RECIPE_URL + '?page_size=2'
+        while url:
+            res = self.client.get(url)
+            seen.extend(r['id'] for r in res.data['results'])
+            last_page = res.data
+            url = res.data['next']
+        self.assertEqual(seen, [recipe.id for recipe in recipes])
+
+        res = self.client.get(last_page['previous'])
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [recipes[2].id, recipes[3].id]
+        )
+
+    def test_recipes_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        res = self.client.get(RECIPE_URL, {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_recipes_tampered_cursor(self):
+        """Test that a cursor with positions of the wrong type is rejected"""
+        for querystring in (b'p=abc', b'p=', b'r=x&p=1'):
+            res = self.client.get(
+                RECIPE_URL, {'cursor': b64encode(querystring).decode()}
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_filter_by_tags_returns_distinct_recipes(self):
+        """Test that a recipe matching several tags is listed once"""
+        tag1 = sample_tag(self.user, name='Vegan')
+        tag2 = sample_tag(self.user, name='Quick')
+        recipe = sample_recipe(self.user)
+        recipe.tags.add(tag1, tag2)
+
+        res = self.client.get(RECIPE_URL, {'tags': f'{tag1.id},{tag2.id}'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [recipe.id]
+        )
+
+    def test_filter_by_all_tags_and_ingredients(self):
+        """Test that match mode all requires every requested relation"""
+        tag1 = sample_tag(self.user, name='Vegan')
+        tag2 = sample_tag(self.user, name='Quick')
+        ingredient1 = sample_ingredient(self.user, 'Rice')
+        ingredient2 = sample_ingredient(self.user, 'Beans')
+        both = sample_recipe(self.user, title='Both')
+        both.tags.add(tag1, tag2)
+        both.ingredients.add(ingredient1, ingredient2)
+        one_tag = sample_recipe(self.user, title='One tag')
+        one_tag.tags.add(tag1)
+        one_tag.ingredients.add(ingredient1, ingredient2)
+        one_ingredient = sample_recipe(self.user, title='One ingredient')
+        one_ingredient.tags.add(tag1, tag2)
+        one_ingredient.ingredients.add(ingredient2)
+
+        res = self.client.get(RECIPE_URL, {
+            'tags': f'{tag1.id},{tag2.id}',
+            'tags_match': 'all',
+            'ingredients': f'{ingredient1.id},{ingredient2.id}',
+            'ingredients_match': 'all',
+        })
+
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [both.id]
+        )
+
+        res = self.client.get(RECIPE_URL, {
+            'tags': f'{tag1.id},{tag2.id}',
+            'tags_match': 'all',
+        })
+
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [both.id, one_ingredient.id]
+        )
+
+    def test_filter_invalid_params(self):
+        """Test that malformed filter params are rejected"""
+        res = self.client.get(RECIPE_URL, {'tags': '1,abc'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(RECIPE_URL, {'tags': '1', 'tags_match': 'some'})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_titles_tags_and_ingredients(self):
+        """Test searching ranks title matches above relation matches"""
+        by_ingredient = sample_recipe(self.user, title='Pasta')
+        by_ingredient.ingredients.add(sample_ingredient(self.user, 'Tomatoes'))
+        by_tag = sample_recipe(self.user, title='Salad')
+        by_tag.tags.add(sample_tag(self.user, 'Tomato'))
+        by_title = sample_recipe(self.user, title='Tomato soup')
+        sample_recipe(self.user, title='Cake')
+
+        res = self.client.get(RECIPE_URL, {'search': 'tomato'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertCountEqual(ids, [by_ingredient.id, by_tag.id, by_title.id])
+        if connection.vendor == 'postgresql':
+            self.assertEqual(ids, [by_title.id, by_tag.id, by_ingredient.id])
+
+    def test_search_follows_relation_changes(self):
+        """Test search results follow renamed and removed tags"""
+        recipe = sample_recipe(self.user, title='Salad')
+        tag = sample_tag(self.user, 'Vegan')
+        recipe.tags.add(tag)
+
+        tag.name = 'Spicy'
+        tag.save()
+        res = self.client.get(RECIPE_URL, {'search': 'spicy'})
+        self.assertEqual([r['id'] for r in res.data['results']], [recipe.id])
+
+        tag.delete()
+        res = self.client.get(RECIPE_URL, {'search': 'spicy'})
+        self.assertEqual(res.data['results'], [])
+
+    def test_search_results_are_paginated_by_cursor(self):
+        """Test walking ranked search results with the cursor"""
+        recipes = [
+            sample_recipe(self.user, title=title)
+            for title in ('Tomato', 'Tomato soup', 'Tomato and tomato', 'Cake')
+        ]
+
+        seen = []
+        res = self.client.get(RECIPE_URL, {'search': 'tomato', 'page_size': 1})
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            seen.extend(recipe['id'] for recipe in res.data['results'])
+            if not res.data['next']:
+                break
+            res = self.client.get(res.data['next'])
+
+        self.assertCountEqual(seen, [recipe.id for recipe in recipes[:3]])
 
     def test_view_recipe_detail(self):
         recipe = sample_recipe(self.user)
@@ -191,7 +467,7 @@ class PrivateRecipeApiTests(TestCase):
         self.assertEqual(len(tags), 0)
 
 
-class RecipeImageUploadTests(TestCase):
+class RecipeImageUploadTests(QueryBudgetMixin, TestCase):
 
     def setUp(self):
         self.client = APIClient()
@@ -218,6 +494,82 @@ class RecipeImageUploadTests(TestCase):
         self.assertIn('image', res.data)
         self.assertTrue(os.path.exists(self.recipe.image.path))
 
+    def test_upload_image_queues_derivatives(self):
+        """Test uploading returns before derivatives are generated"""
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as ntf:
+            Image.new('RGB', (300, 300)).save(ntf, format='JPEG')
+            ntf.seek(0)
+            res = self.client.post(url, {'image': ntf}, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['image_status'], 'pending')
+        self.assertEqual(res.data['image_derivatives'], [])
+
+        self.recipe.refresh_from_db()
+        call_command('process_image_jobs', once=True, stdout=StringIO())
+        for derivative in self.recipe.image_derivatives.all():
+            self.addCleanup(derivative.file.delete, save=False)
+
+        res = self.client.get(detail_url(self.recipe.id))
+        derivatives = res.data['image_derivatives']
+        self.assertTrue(derivatives)
+        self.assertIn(
+            {'name': 'thumbnail', 'format': 'jpeg', 'width': 200, 'height': 200},
+            [{k: d[k] for k in ('name', 'format', 'width', 'height')}
+             for d in derivatives]
+        )
+        self.assertTrue(derivatives[0]['url'].startswith('http://testserver/'))
+
+    def _post_image(self, image, suffix='.png', fmt='PNG'):
+        url = image_upload_url(self.recipe.id)
+        with tempfile.NamedTemporaryFile(suffix=suffix) as ntf:
+            image.save(ntf, format=fmt)
+            ntf.seek(0)
+            return self.client.post(url, {'image': ntf}, format='multipart')
+
+    def test_upload_image_query_budget(self):
+        """Test uploading stays within its query budget"""
+        with self.assertMaxQueries(MAX_IMAGE_UPLOAD_QUERIES):
+            res = self._post_image(Image.new('RGB', (10, 10)))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_upload_image_streams_to_media_storage(self):
+        """Test uploads are moved from the media temp dir into place"""
+        res = self._post_image(Image.new('RGB', (10, 10)))
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(os.path.exists(self.recipe.image.path))
+        self.assertEqual(
+            [name for name in os.listdir(media_temp_dir()) if name.endswith('.png')],
+            []
+        )
+
+    def test_upload_image_too_large(self):
+        """Test files over the size limit are rejected while uploading"""
+        noise = Image.frombytes('RGB', (200, 200), os.urandom(200 * 200 * 3))
+
+        with self.settings(RECIPE_IMAGE_MAX_SIZE=100 * 1024):
+            res = self._post_image(noise)
+        with self.settings(RECIPE_IMAGE_MAX_SIZE=16):
+            res_early = self._post_image(noise)
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual(res_early.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertFalse(self.recipe.image)
+
+    def test_upload_image_unsupported(self):
+        """Test image formats and sizes are checked from the header"""
+        res = self._post_image(Image.new('RGB', (10, 10)), '.bmp', 'BMP')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with self.settings(RECIPE_IMAGE_MAX_PIXELS=50):
+            res = self._post_image(Image.new('RGB', (10, 10)))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_upload_image_bad_request(self):
         url = image_upload_url(self.recipe.id)
         res = self.client.post(url, {'image': 'notimage'}, format='multipart')
@@ -242,9 +594,9 @@ class RecipeImageUploadTests(TestCase):
         serializer2 = RecipeSerializer(recipe2)
         serializer3 = RecipeSerializer(recipe3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serializer3.data, res.data['results'])
 
     def test_recipes_filtering_by_ingredients(self):
         recipe1 = sample_recipe(user=self.user, title='Recipe1')
@@ -264,6 +616,93 @@ class RecipeImageUploadTests(TestCase):
         serializer2 = RecipeSerializer(recipe2)
         serializer3 = RecipeSerializer(recipe3)
 
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serializer3.data, res.data)
\ No newline at end of file
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serializer3.data, res.data['results'])
+
+
+class RecipeExportTests(QueryBudgetMixin, TestCase):
+    """Test streaming export of the recipe library"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'export@email.com',
+            'testpass'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = sample_recipe(self.user, title='Curry')
+        self.recipe.tags.add(sample_tag(self.user, 'Spicy'))
+        self.recipe.tags.add(sample_tag(self.user, 'Asian'))
+        self.recipe.ingredients.add(sample_ingredient(self.user, 'Rice'))
+
+    def test_export_ndjson(self):
+        """Test that recipes are streamed as NDJSON by default"""
+        sample_recipe(self.user, title='Salad')
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertTrue(res['Content-Type'].startswith('application/x-ndjson'))
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        recipes = [json.loads(line) for line in lines]
+        self.assertEqual([r['title'] for r in recipes], ['Curry', 'Salad'])
+        self.assertEqual(recipes[0]['tags'], ['Asian', 'Spicy'])
+        self.assertEqual(recipes[0]['ingredients'], ['Rice'])
+        self.assertEqual(recipes[0]['price'], '4.00')
+
+    def test_export_csv(self):
+        """Test that recipes are streamed as CSV when requested"""
+        res = self.client.get(EXPORT_URL, {'format': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        rows = list(csv.reader(
+            b''.join(res.streaming_content).decode().splitlines()
+        ))
+        self.assertEqual(rows[0][:2], ['id', 'title'])
+        self.assertEqual(rows[1][1], 'Curry')
+        self.assertEqual(rows[1][5], 'Asian;Spicy')
+
+    def test_export_in_chunks(self):
+        """Test that chunking keeps every recipe and its relations"""
+        for i in range(4):
+            sample_recipe(self.user, title=f'Recipe {i}')
+
+        with patch.object(RecipeViewSet, 'export_chunk_size', 2):
+            res = self.client.get(EXPORT_URL)
+
+        recipes = [
+            json.loads(line)
+            for line in b''.join(res.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual(len(recipes), 5)
+        self.assertEqual(recipes[0]['tags'], ['Asian', 'Spicy'])
+
+    def test_export_limited_to_user(self):
+        """Test that only the owner's recipes are exported"""
+        other = get_user_model().objects.create_user(
+            'other@email.com',
+            'testpass'
+        )
+        sample_recipe(other, title='Foreign')
+
+        res = self.client.get(EXPORT_URL)
+
+        content = b''.join(res.streaming_content).decode()
+        self.assertNotIn('Foreign', content)
+
+    def test_export_query_count_is_constant(self):
+        """Test that exporting does not query per recipe"""
+        tag = sample_tag(self.user, 'Quick')
+
+        def create(count):
+            for _ in range(count):
+                sample_recipe(self.user).tags.add(tag)
+
+        def export():
+            return b''.join(self.client.get(EXPORT_URL).streaming_content)
+
+        small, large = self.assertConstantQueries(create, export, budget=4)
+
+        self.assertEqual(len(large.splitlines()), 11)
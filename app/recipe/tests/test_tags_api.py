@@ -1,3 +1,6 @@
+from base64 import b64encode
+
+from django.db import connection
 from django.urls import reverse
 from django.test import TestCase
 from django.contrib.auth import get_user_model
@@ -6,11 +9,23 @@ from rest_framework import status
 from rest_framework.test import APIClient
 
 from core.models import Tag
+from core.testing import QueryBudgetMixin
 from recipe.serializers import TagSerializer
+from recipe.typeahead import trigram_installed
 
 TAGS_URL = reverse("recipe:tag-list")
 
 
+def typeahead_budget():
+    """
+    Queries of an autocompletion: the list validators and the search, which
+    with pg_trgm also sets its timeout in a savepoint that is rolled back
+    """
+    if connection.vendor == 'postgresql' and trigram_installed(connection):
+        return 5
+    return 2
+
+
 class PublicTagsApiTests(TestCase):
     """Test Tags public API"""
 
@@ -24,7 +39,7 @@ class PublicTagsApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivateTagsApiTests(TestCase):
+class PrivateTagsApiTests(QueryBudgetMixin, TestCase):
     """test the authorised user tags API"""
 
     def setUp(self):
@@ -45,7 +60,7 @@ class PrivateTagsApiTests(TestCase):
         tags = Tag.objects.all().order_by("-name")
         serializer = TagSerializer(tags, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data["results"], serializer.data)
 
     def test_retrieve_tags_to_specific_user(self):
         user2 = get_user_model().objects.create_user(
@@ -57,8 +72,8 @@ class PrivateTagsApiTests(TestCase):
 
         res = self.client.get(TAGS_URL)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]["name"], tag.name)
+        self.assertEqual(len(res.data["results"]), 1)
+        self.assertEqual(res.data["results"][0]["name"], tag.name)
 
     def test_create_tag_success(self):
         """Test successful tag creation"""
@@ -78,3 +93,80 @@ class PrivateTagsApiTests(TestCase):
         res = self.client.post(TAGS_URL, payload)
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_tags_pagination_with_duplicate_names(self):
+        """Test that tag pages neither skip nor repeat equally named tags"""
+        for name in ["Vegan", "Spicy", "Spicy", "Spicy", "Asian"]:
+            Tag.objects.create(user=self.user, name=name)
+
+        names = []
+        url = TAGS_URL + "?page_size=2"
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            names.extend(tag["name"] for tag in res.data["results"])
+            url = res.data["next"]
+
+        expected = Tag.objects.filter(user=self.user).order_by("-name", "id")
+        self.assertEqual(names, [tag.name for tag in expected])
+
+    def test_tags_tampered_cursor(self):
+        """Test that a cursor with positions of the wrong type is rejected"""
+        cursor = b64encode(b'p=x&p=abc').decode()
+
+        res = self.client.get(TAGS_URL, {'cursor': cursor})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tags_typeahead(self):
+        """Test autocompleting tag names puts prefix matches first"""
+        user2 = get_user_model().objects.create_user(
+            "em@mail.com",
+            "password333"
+        )
+        Tag.objects.create(user=user2, name="Vegetarian")
+        Tag.objects.create(user=self.user, name="Pure vegan")
+        Tag.objects.create(user=self.user, name="Vegan")
+        Tag.objects.create(user=self.user, name="Desert")
+
+        res = self.client.get(TAGS_URL, {"q": "vega"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [tag["name"] for tag in res.data],
+            ["Vegan", "Pure vegan"]
+        )
+
+    def test_tags_typeahead_limit(self):
+        """Test autocompletion returns at most limit names"""
+        for i in range(5):
+            Tag.objects.create(user=self.user, name=f"Spicy {i}")
+
+        res = self.client.get(TAGS_URL, {"q": "spicy", "limit": 3})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data), 3)
+
+        res = self.client.get(TAGS_URL, {"q": "spicy", "limit": 500})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_tags_query_budget(self):
+        """Test listing, autocompleting and creating tags within a query budget"""
+        def create(count):
+            start = Tag.objects.filter(user=self.user).count()
+            for i in range(start, start + count):
+                Tag.objects.create(user=self.user, name=f"Spicy {i}")
+
+        small, large = self.assertConstantQueries(
+            create, lambda: self.client.get(TAGS_URL), budget=2
+        )
+        self.assertEqual(len(large.data["results"]), 10)
+
+        # The first autocompletion checks once whether pg_trgm is installed
+        self.client.get(TAGS_URL, {"q": "spicy"})
+        self.assertConstantQueries(
+            create, lambda: self.client.get(TAGS_URL, {"q": "spicy"}),
+            budget=typeahead_budget()
+        )
+        with self.assertMaxQueries(1):
+            res = self.client.post(TAGS_URL, {"name": "Sweet"})
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
@@ -0,0 +1,77 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, Tag
+from recipe.typeahead import trigram_installed
+from recipe.views import TagViewSet
+
+TAGS_URL = reverse("recipe:tag-list")
+INGREDIENT_URL = reverse("recipe:ingredient-list")
+
+
+class TrigramTypeaheadTests(TestCase):
+    """Test autocompletion served by pg_trgm, where it is installed"""
+
+    def setUp(self):
+        if not (connection.vendor == 'postgresql' and trigram_installed(connection)):
+            self.skipTest("pg_trgm is not installed")
+        self.user = get_user_model().objects.create_user(
+            "test@email.com",
+            "password123"
+        )
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_prefix_matches_first(self):
+        """Test names starting with the query come before other matches"""
+        Tag.objects.create(user=self.user, name="Pure vegan")
+        Tag.objects.create(user=self.user, name="Vegetarian")
+        Tag.objects.create(user=self.user, name="Vegan")
+        Tag.objects.create(user=self.user, name="Desert")
+
+        res = self.client.get(TAGS_URL, {"q": "veg"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = [tag["name"] for tag in res.data]
+        self.assertEqual(sorted(names[:2]), ["Vegan", "Vegetarian"])
+        self.assertEqual(names[2:], ["Pure vegan"])
+
+    def test_fuzzy_match(self):
+        """Test a misspelt query still finds similar names"""
+        Ingredient.objects.create(user=self.user, name="Tomato")
+        Ingredient.objects.create(user=self.user, name="Cucumber")
+
+        res = self.client.get(INGREDIENT_URL, {"q": "tomatoe"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [ingredient["name"] for ingredient in res.data],
+            ["Tomato"]
+        )
+
+    def test_timeout(self):
+        """Test a search slower than the timeout responds 503"""
+        Tag.objects.create(user=self.user, name="Vegan")
+        get_queryset = TagViewSet.get_queryset
+
+        def slow_queryset(view):
+            return get_queryset(view).annotate(
+                delay=RawSQL("SELECT 1 FROM pg_sleep(0.5)", [])
+            )
+
+        with patch.object(TagViewSet, 'get_queryset', slow_queryset), \
+                patch.object(TagViewSet, 'typeahead_timeout', 10):
+            res = self.client.get(TAGS_URL, {"q": "vegan"})
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res.data["detail"].code, 'typeahead_timeout')
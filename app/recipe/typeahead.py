@@ -0,0 +1,143 @@
+from django.db import OperationalError, connections, transaction
+from django.db.models import (
+    Case, CharField, FloatField, Func, IntegerField, Lookup, Q, Value, When,
+)
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+QUERY_CANCELED = '57014'
+
+
+@CharField.register_lookup
+class ILikePrefix(Lookup):
+    """`field ILIKE 'value%'`, which a pg_trgm index can serve"""
+    lookup_name = 'ilike_prefix'
+
+    def get_db_prep_lookup(self, value, connection):
+        return '%s', [connection.ops.prep_for_like_query(value) + '%']
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} ILIKE {rhs}', lhs_params + rhs_params
+
+
+@CharField.register_lookup
+class TrigramWordSimilar(Lookup):
+    """`value <% field`, true when value is similar to a part of field"""
+    lookup_name = 'trigram_word_similar'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{rhs} <%% {lhs}', rhs_params + lhs_params
+
+
+class TrigramWordSimilarity(Func):
+    function = 'word_similarity'
+    output_field = FloatField()
+
+    def __init__(self, string, expression, **extra):
+        super().__init__(Value(string), expression, **extra)
+
+
+class TypeaheadTimeout(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Autocomplete took too long, try a longer query.'
+    default_code = 'typeahead_timeout'
+
+
+_trigram_installed = {}
+
+
+def trigram_installed(connection):
+    """Tell whether the pg_trgm extension is installed on a connection"""
+    if connection.alias not in _trigram_installed:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_installed[connection.alias] = cursor.fetchone() is not None
+    return _trigram_installed[connection.alias]
+
+
+class TypeaheadMixin:
+    """
+    Autocomplete names on a list endpoint with `?q=`: respond with a plain
+    list of the best `?limit=` matches instead of a page. Names starting
+    with the query come first, then fuzzy matches by similarity.
+
+    On PostgreSQL with pg_trgm both matches are served by trigram indexes
+    on the name and the query must finish within `typeahead_timeout`
+    milliseconds. Elsewhere names are matched by substring.
+    """
+    typeahead_param = 'q'
+    typeahead_limit = 10
+    typeahead_max_limit = 50
+    typeahead_timeout = 200
+
+    def list(self, request, *args, **kwargs):
+        term = request.query_params.get(self.typeahead_param)
+        if term is None:
+            return super().list(request, *args, **kwargs)
+
+        term = term.strip()
+        limit = self._typeahead_limit(request)
+        results = self.typeahead(self.get_queryset(), term, limit) if term else []
+        return Response(self.get_serializer(results, many=True).data)
+
+    def typeahead(self, queryset, term, limit):
+        """Return the best limit objects of queryset matching term"""
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and trigram_installed(connection):
+            return self._typeahead_trigram(connection, queryset, term, limit)
+        return self._typeahead_contains(queryset, term, limit)
+
+    def _typeahead_trigram(self, connection, queryset, term, limit):
+        queryset = queryset.filter(
+            Q(name__ilike_prefix=term) | Q(name__trigram_word_similar=term)
+        ).annotate(
+            prefix=self._prefix_rank(Q(name__ilike_prefix=term)),
+            similarity=TrigramWordSimilarity(term, 'name'),
+        ).order_by('-prefix', '-similarity', 'name', 'id')[:limit]
+
+        try:
+            with transaction.atomic(using=connection.alias):
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT set_config('statement_timeout', %s, true)",
+                        [f'{self.typeahead_timeout}ms']
+                    )
+                results = list(queryset)
+                # Nothing was written; rolling back drops the timeout
+                transaction.set_rollback(True, using=connection.alias)
+        except OperationalError as exc:
+            if getattr(exc.__cause__, 'pgcode', None) == QUERY_CANCELED:
+                raise TypeaheadTimeout()
+            raise
+        return results
+
+    def _typeahead_contains(self, queryset, term, limit):
+        return list(queryset.filter(name__icontains=term).annotate(
+            prefix=self._prefix_rank(Q(name__istartswith=term)),
+        ).order_by('-prefix', 'name', 'id')[:limit])
+
+    def _prefix_rank(self, condition):
+        return Case(
+            When(condition, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField()
+        )
+
+    def _typeahead_limit(self, request):
+        value = request.query_params.get('limit')
+        if value is None:
+            return self.typeahead_limit
+        try:
+            limit = int(value)
+        except ValueError:
+            limit = 0
+        if not 0 < limit <= self.typeahead_max_limit:
+            raise ValidationError({'limit': (
+                f'Expected a number between 1 and {self.typeahead_max_limit}.'
+            )})
+        return limit
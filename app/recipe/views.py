@@ -1,23 +1,46 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework import viewsets, mixins, status
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.renderers import BrowsableAPIRenderer
 
-from core.models import Tag, Ingredient, Recipe
+from core.images import enqueue_image_job
+from core.models import Tag, Ingredient, Recipe, ImageDerivative
+from core.renderers import FastJSONRenderer
+from core.throttling import ScopedUserRateThrottle
+from core.uploads import streaming_upload_handlers
 from recipe.serializers import TagSerializer, IngredientSerializer, RecipeSerializer, \
     RecipeDetailSerializer, RecipeImageSerializer
-
-
-class BaseRecipeAttrViewSet(viewsets.GenericViewSet, mixins.ListModelMixin, mixins.CreateModelMixin):
-    authentication_classes = (TokenAuthentication, )
+from recipe.bulk import BulkModelMixin
+from recipe.cache import CachedListMixin, bump_user_version
+from recipe.conditional import ConditionalListMixin
+from recipe.export import NDJSONRenderer, CSVRenderer, iter_recipes, stream_ndjson, stream_csv
+from recipe.fastread import FastReadMixin
+from recipe.filters import RecipeRelationFilter, RecipeSearchFilter
+from recipe.pagination import RecipeAttrPagination, RecipePagination
+from recipe.typeahead import TypeaheadMixin
+from user.authentication import CachedTokenAuthentication
+
+
+class BaseRecipeAttrViewSet(ConditionalListMixin, CachedListMixin, TypeaheadMixin,
+                            FastReadMixin, BulkModelMixin, viewsets.GenericViewSet,
+                            mixins.ListModelMixin, mixins.CreateModelMixin):
+    authentication_classes = (CachedTokenAuthentication, )
     permission_classes = (IsAuthenticated, )
+    throttle_classes = (ScopedUserRateThrottle, )
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
+    pagination_class = RecipeAttrPagination
 
     def get_queryset(self):
-        return self.queryset.filter(user=self.request.user).order_by("-name")
+        return self.queryset.filter(user=self.request.user).order_by("-name", "id")
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        bump_user_version(self.request.user.pk)
 
 
 class TagViewSet(BaseRecipeAttrViewSet):
@@ -30,28 +53,64 @@ class IngredientViewSet(BaseRecipeAttrViewSet):
     serializer_class = IngredientSerializer
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalListMixin, CachedListMixin, FastReadMixin,
+                    BulkModelMixin, viewsets.ModelViewSet):
     """Manage recipes in the database"""
     serializer_class = RecipeSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
-
-    def _params_to_int(self, qs):
-        return [int(str_id) for str_id in qs.split(',')]
+    throttle_classes = (ScopedUserRateThrottle,)
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
+    # Read or write unless an action names its own scope
+    throttle_scope = None
+    pagination_class = RecipePagination
+    filter_backends = (RecipeRelationFilter, RecipeSearchFilter)
+    page_size = 50
+    export_chunk_size = 2000
+    # Columns and related columns rendered by the read-only actions when
+    # RECIPE_FAST_READS is off; related objects are listed in primary key
+    # order, like recipe.fastread does
+    fetch_plans = {
+        'list': {
+            'fields': ('id', 'title', 'time_minutes', 'price', 'link'),
+            'related_fields': ('id',),
+        },
+        'retrieve': {
+            'fields': ('id', 'title', 'time_minutes', 'price', 'link', 'image'),
+            'related_fields': ('id', 'name'),
+            'prefetch': (
+                Prefetch(
+                    'image_derivatives',
+                    queryset=ImageDerivative.objects.order_by('id')
+                ),
+            ),
+        },
+    }
 
     def get_queryset(self):
         """Retrieve the recipes for the authenticated user"""
-        tags = self.request.query_params.get('tags')
-        ingredients = self.request.query_params.get('ingredients')
-        queryset = self.queryset
-        if tags:
-            tags_id = self._params_to_int(tags)
-            queryset = queryset.filter(tags__id__in=tags_id)
-        if ingredients:
-            ingredients_id = self._params_to_int(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredients_id)
-        return queryset.filter(user=self.request.user)
+        queryset = self.queryset.filter(user=self.request.user)
+        return self._apply_fetch_plan(queryset)
+
+    def _apply_fetch_plan(self, queryset):
+        """Load tags and ingredients in bulk and only the needed columns"""
+        plan = self.fetch_plans.get(self.action)
+        if plan is None:
+            return queryset
+
+        related_fields = plan['related_fields']
+        return queryset.only(*plan['fields']).prefetch_related(
+            Prefetch(
+                'tags',
+                queryset=Tag.objects.only(*related_fields).order_by('id')
+            ),
+            Prefetch(
+                'ingredients',
+                queryset=Ingredient.objects.only(*related_fields).order_by('id')
+            ),
+            *plan.get('prefetch', ()),
+        )
 
     def get_serializer_class(self):
         if self.action == 'retrieve':
@@ -60,16 +119,47 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return RecipeImageSerializer
         return self.serializer_class
 
+    def get_serializer(self, *args, **kwargs):
+        """Resolve the tags and ingredients of a written recipe in bulk"""
+        serializer = super().get_serializer(*args, **kwargs)
+        if self.action in ('create', 'update', 'partial_update') and 'data' in kwargs:
+            serializer.context.update(
+                self.get_bulk_serializer_context([kwargs['data']])
+            )
+        return serializer
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+        bump_user_version(self.request.user.pk)
 
-    @action(methods=['POST'], detail=True, url_path='upload-image')
+    def perform_update(self, serializer):
+        serializer.save()
+        bump_user_version(self.request.user.pk)
+
+    def perform_destroy(self, instance):
+        instance.delete()
+        bump_user_version(self.request.user.pk)
+
+    @action(methods=['POST'], detail=True, url_path='upload-image',
+            throttle_scope='upload_image')
     def upload_image(self, request, pk=None):
+        """
+        Store the uploaded image and queue the generation of its
+        derivatives, which the response lists once they are ready.
+        Uploads are streamed to disk and bounded by RECIPE_IMAGE_MAX_SIZE.
+        """
+        request._request.upload_handlers = streaming_upload_handlers(
+            request._request,
+            settings.RECIPE_IMAGE_MAX_SIZE
+        )
         recipe = self.get_object()
         serializer = self.get_serializer(recipe, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                recipe = serializer.save()
+                enqueue_image_job(recipe)
+            bump_user_version(request.user.pk)
             return Response(
                 serializer.data,
                 status=status.HTTP_200_OK
@@ -79,3 +169,23 @@ class RecipeViewSet(viewsets.ModelViewSet):
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
         )
+
+    @action(methods=['GET'], detail=False, renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request):
+        """
+        Stream the user's recipes with tag and ingredient names as NDJSON
+        (default) or CSV, chosen with `?format=` or the Accept header.
+        """
+        recipes = iter_recipes(
+            self.filter_queryset(self.get_queryset()),
+            self.export_chunk_size
+        )
+        renderer = request.accepted_renderer
+        stream = stream_csv if renderer.format == 'csv' else stream_ndjson
+        response = StreamingHttpResponse(
+            stream(recipes),
+            content_type=f'{renderer.media_type}; charset={renderer.charset}'
+        )
+        response['Content-Disposition'] = \
+            f'attachment; filename="recipes.{renderer.format}"'
+        return response
@@ -0,0 +1,51 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+
+from core.metrics import observe_cache
+
+TOKEN_KEY = 'auth-token:{digest}'
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication that keeps tokens with their user in the cache
+    for AUTH_TOKEN_CACHE_TIMEOUT seconds, so authenticated requests do
+    not query the database. Entries are dropped when the token is
+    deleted or its user saved (see user.signals); changes that bypass
+    model signals, like queryset updates, apply once they expire.
+    Nothing is cached unless CACHE_SHARED, the other processes would not
+    see the entries dropped.
+    """
+
+    def authenticate_credentials(self, key):
+        if not settings.CACHE_SHARED:
+            return super().authenticate_credentials(key)
+
+        cache_key = token_cache_key(key)
+        token = cache.get(cache_key)
+        observe_cache('auth_token', token is not None)
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(cache_key, token, settings.AUTH_TOKEN_CACHE_TIMEOUT)
+        return token.user, token
+
+
+def token_cache_key(key):
+    """Return the cache key of a token, which never holds the token itself"""
+    return TOKEN_KEY.format(digest=hashlib.sha256(key.encode()).hexdigest())
+
+
+def invalidate_cached_token(key):
+    """
+    Drop a cached token. It is dropped again once the surrounding
+    transaction commits, so a request that read the old rows before the
+    commit cannot cache them for good.
+    """
+    cache_key = token_cache_key(key)
+    cache.delete(cache_key)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: cache.delete(cache_key))
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
+from rest_framework.authtoken.models import Token
+
+from user.authentication import invalidate_cached_token
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_deleted_token(sender, instance, **kwargs):
+    """Stop accepting a deleted token from the cache"""
+    invalidate_cached_token(instance.key)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """Drop the cached tokens of an edited or deactivated user"""
+    if created or not settings.CACHE_SHARED:
+        return
+    keys = Token.objects.filter(user_id=instance.pk).values_list('key', flat=True)
+    for key in keys:
+        invalidate_cached_token(key)
@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+ME_URL = reverse("user:me")
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test token authentication through the cache"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@mail.com",
+            password="testpass",
+            name="testuser"
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_cached_token_skips_query(self):
+        """Test a known token authenticates without a query"""
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["email"], self.user.email)
+
+    @override_settings(CACHE_SHARED=False)
+    def test_not_cached_when_cache_not_shared(self):
+        """Test tokens are read from the database without a shared cache"""
+        self.client.get(ME_URL)
+        # An update skips the signals, as invalidations of other processes would
+        get_user_model().objects.filter(pk=self.user.pk).update(is_active=False)
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_token_rejected(self):
+        """Test a deleted token stops authenticating"""
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_rejected(self):
+        """Test the token of a deactivated user stops authenticating"""
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_edited_user_reloaded(self):
+        """Test requests see the user as edited"""
+        self.client.get(ME_URL)
+        self.client.patch(ME_URL, {"name": "new name"})
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data["name"], "new name")
@@ -0,0 +1,120 @@
+import base64
+from unittest.mock import patch, Mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import hashers
+
+TOKEN_URL = reverse("user:token")
+PASSWORD = "testpass"
+
+
+class PasswordHashingTests(TestCase):
+    """Test tunable password hashing and hash upgrades"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email="test@mail.com",
+            password=PASSWORD,
+            name="testuser"
+        )
+
+    def login(self, email="test@mail.com"):
+        return self.client.post(TOKEN_URL, {"email": email, "password": PASSWORD})
+
+    @override_settings(PASSWORD_ARGON2_TIME_COST=3, PASSWORD_ARGON2_MEMORY_COST=1024)
+    def test_costs_from_settings(self):
+        """Test new hashes use the configured costs"""
+        encoded = make_password(PASSWORD)
+
+        self.assertTrue(encoded.startswith("argon2$argon2i$v=19$m=1024,t=3,"))
+
+    @override_settings(PASSWORD_REHASH_ASYNC=False)
+    def test_outdated_hash_upgraded_on_login(self):
+        """Test a hash of another hasher is replaced at login"""
+        self.user.password = make_password(PASSWORD, hasher="pbkdf2_sha256")
+        self.user.save()
+
+        res = self.login()
+
+        self.user.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(self.user.password.startswith("argon2$"))
+        self.assertTrue(self.user.check_password(PASSWORD))
+
+    def test_upgrade_in_background(self):
+        """Test the login does not wait for the upgraded hash"""
+        old_hash = make_password(PASSWORD, hasher="pbkdf2_sha256")
+        self.user.password = old_hash
+        self.user.save()
+        executor = Mock()
+
+        with patch("core.hashers._rehash_pool", return_value=(executor, Mock())):
+            res = self.login()
+
+        self.user.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.user.password, old_hash)
+        executor.submit.assert_called_once()
+        self.assertEqual(executor.submit.call_args[0][2:], (self.user.pk, old_hash, PASSWORD))
+
+    def test_rehash_skipped_after_password_change(self):
+        """Test a background rehash does not undo a password change"""
+        old_hash = self.user.password
+        self.user.set_password("newpass")
+        self.user.save()
+
+        hashers.rehash_password(self.user.pk, old_hash, PASSWORD)
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("newpass"))
+
+
+@override_settings(REST_FRAMEWORK={
+    "DEFAULT_THROTTLE_RATES": {"token": "5/min", "login_email": "2/min"},
+})
+class LoginThrottleTests(TestCase):
+    """Test throttling of token requests"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def login(self, email):
+        return self.client.post(TOKEN_URL, {"email": email, "password": "wrong"})
+
+    def test_throttled_per_email(self):
+        """Test attempts on one email are limited"""
+        statuses = [self.login("Test@mail.com ").status_code for _ in range(3)]
+
+        self.assertEqual(statuses, [400, 400, 429])
+        self.assertEqual(self.login("other@mail.com").status_code, 400)
+
+    def test_throttled_per_address(self):
+        """Test attempts from one address are limited across emails"""
+        statuses = [self.login(f"user{i}@mail.com").status_code for i in range(6)]
+
+        self.assertEqual(statuses, [400] * 5 + [429])
+
+    def test_basic_credentials_throttled(self):
+        """Test passwords sent with basic authentication are throttled too"""
+        credentials = base64.b64encode(b"test@mail.com:wrong").decode()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Basic {credentials}")
+
+        statuses = [self.client.post(TOKEN_URL).status_code for _ in range(6)]
+
+        self.assertEqual(statuses, [400] * 5 + [429])
+
+    def test_body_not_an_object(self):
+        """Test that a body which is not an object is rejected, not throttled"""
+        res = self.client.post(TOKEN_URL, [1, 2], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -5,6 +5,8 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core.testing import QueryBudgetMixin
+
 CREATE_USER_URL = reverse("user:create")
 TOKEN_URL = reverse("user:token")
 ME_URL = reverse("user:me")
@@ -14,7 +16,7 @@ def create_user(**params):
     return get_user_model().objects.create_user(**params)
 
 
-class PublicUserAPITests(TestCase):
+class PublicUserAPITests(QueryBudgetMixin, TestCase):
     """Test the user API (public)"""
 
     def setUp(self):
@@ -94,13 +96,28 @@ class PublicUserAPITests(TestCase):
         self.assertNotIn("token", res.data)
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_create_user_and_token_query_budget(self):
+        """Test signing up and logging in within a query budget"""
+        payload = {
+            "email": "budget@mail.com",
+            "password": "testpassword",
+            "name": "Budget"
+        }
+        with self.assertMaxQueries(2):
+            res = self.__client.post(CREATE_USER_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        with self.assertMaxQueries(5):
+            res = self.__client.post(TOKEN_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
     def test_retrieve_user_unauthorized(self):
         """Test that authentication is required for user"""
         res = self.__client.get(ME_URL)
         self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
-class PrivetUserApiTests(TestCase):
+class PrivetUserApiTests(QueryBudgetMixin, TestCase):
     """Test API requests that require authentication"""
 
     def setUp(self):
@@ -138,3 +155,13 @@ class PrivetUserApiTests(TestCase):
         self.assertEqual(self.user.name, payload["name"])
         self.assertTrue(self.user.check_password(payload["password"]))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_user_profile_query_budget(self):
+        """Test reading and updating the profile within a query budget"""
+        with self.assertMaxQueries(0):
+            res = self.client.get(ME_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        with self.assertMaxQueries(2):
+            res = self.client.patch(ME_URL, {"name": "other_name"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
@@ -0,0 +1,22 @@
+import hashlib
+from collections.abc import Mapping
+
+from core.throttling import SlidingWindowRateThrottle
+
+
+class LoginEmailRateThrottle(SlidingWindowRateThrottle):
+    """
+    Limit token requests per email, against password guessing spread
+    over many addresses. Requests without an email, or whose body is
+    not an object, are left to the serializer.
+    """
+    scope = 'login_email'
+
+    def get_cache_key(self, request, view):
+        if not isinstance(request.data, Mapping):
+            return None
+        email = request.data.get('email')
+        if not isinstance(email, str) or not email.strip():
+            return None
+        digest = hashlib.sha256(email.strip().lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': digest}
@@ -1,26 +1,40 @@
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
+from core.throttling import ScopedUserRateThrottle
+
+from .authentication import CachedTokenAuthentication
 from .serializers import UserSerializer, AuthTokenSerializer
+from .throttling import LoginEmailRateThrottle
 
 
 class CreateUserView(generics.CreateAPIView):
     """Create a new user view"""
     serializer_class = UserSerializer
+    # No credentials are needed: failing session or basic authentication
+    # would answer before the throttles run
+    authentication_classes = ()
+    throttle_classes = (ScopedUserRateThrottle,)
 
 
 class CreateTokenView(ObtainAuthToken):
     """Create a new auth token for user"""
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    # Passwords are only checked by the serializer, after the throttles:
+    # basic authentication would verify them with no limit
+    authentication_classes = ()
+    throttle_classes = (ScopedUserRateThrottle, LoginEmailRateThrottle)
+    throttle_scope = 'token'
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
     """Manage authenticated user"""
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
+    throttle_classes = (ScopedUserRateThrottle,)
 
     def get_object(self):
         """Retrieve and return authenticated user"""